@@ -0,0 +1,113 @@
+"""
+Cost and latency accounting for outbound calls (OpenAI, SerpAPI, caches).
+
+`record()` adds one call to the process-wide `totals` and, when a job scope is
+active, to that job's usage dict as well. Scopes are context variables: wrapping a
+bulk run in `scope(job["usage"])` attributes every call made by its workers (and by
+the MicroBatcher tasks they start) to the job without threading it through the
+call chain. Keys are "<provider>:<operation>", e.g. "openai:suggest:arabic".
+
+Costs are estimates from `MODEL_PRICES` (USD per million prompt / completion
+tokens); OPENAI_PRICE_PER_MTOK="<prompt>,<completion>" overrides them.
+"""
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+}
+_price_override = os.getenv("OPENAI_PRICE_PER_MTOK")
+
+_scope: ContextVar[Optional[Dict[str, Any]]] = ContextVar("usage_scope", default=None)
+
+# process-wide usage since start, by key
+totals: Dict[str, Dict[str, float]] = {}
+
+
+def _price(model: Optional[str]):
+    if _price_override:
+        prompt, completion = _price_override.split(",")
+        return float(prompt), float(completion)
+    return MODEL_PRICES.get(model or "", (0.0, 0.0))
+
+
+@contextmanager
+def scope(usage: Dict[str, Any]):
+    """Attribute calls made inside the block (and tasks it starts) to `usage`."""
+    token = _scope.set(usage)
+    try:
+        yield usage
+    finally:
+        _scope.reset(token)
+
+
+def record(
+    provider: str,
+    operation: str,
+    seconds: float = 0.0,
+    prompt_tokens: int = 0,
+    completion_tokens: int = 0,
+    retries: int = 0,
+    error: bool = False,
+    cache_hit: bool = False,
+    model: Optional[str] = None,
+    calls: int = 1,
+):
+    key = f"{provider}:{operation}"
+    prompt_price, completion_price = _price(model)
+    cost = (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1e6
+    current = _scope.get()
+    for target in (totals, current) if current is not None else (totals,):
+        entry = target.get(key)
+        if entry is None:
+            entry = target[key] = {
+                "calls": 0,
+                "errors": 0,
+                "retries": 0,
+                "cache_hits": 0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "seconds": 0.0,
+                "max_seconds": 0.0,
+                "cost_usd": 0.0,
+            }
+        entry["calls"] += calls
+        entry["errors"] += int(error)
+        entry["retries"] += retries
+        entry["cache_hits"] += int(cache_hit)
+        entry["prompt_tokens"] += prompt_tokens
+        entry["completion_tokens"] += completion_tokens
+        entry["seconds"] += seconds
+        entry["max_seconds"] = max(entry["max_seconds"], seconds)
+        entry["cost_usd"] += cost
+
+
+def record_retry(provider: str):
+    """Count one rate-limited attempt that was retried (ProviderLimiter.on_throttle)."""
+    record(provider, "retry", retries=1, calls=0)
+
+
+def summarize(usage: Optional[Dict[str, Dict[str, float]]]) -> Dict[str, Any]:
+    """Per-key figures with average latency, plus overall totals."""
+    usage = usage or {}
+    by_key = {}
+    overall = {"calls": 0, "errors": 0, "retries": 0, "cache_hits": 0}
+    overall.update(prompt_tokens=0, completion_tokens=0, seconds=0.0, cost_usd=0.0)
+    for key, entry in sorted(usage.items()):
+        by_key[key] = {
+            **entry,
+            "avg_seconds": round(entry["seconds"] / entry["calls"], 3)
+            if entry["calls"]
+            else 0.0,
+            "cost_usd": round(entry["cost_usd"], 6),
+        }
+        for field in overall:
+            overall[field] += entry[field]
+    overall["seconds"] = round(overall["seconds"], 3)
+    overall["cost_usd"] = round(overall["cost_usd"], 6)
+    return {"total": overall, "by_call": by_key}
@@ -0,0 +1,584 @@
+"""
+Benchmarks for the service's data paths.
+
+Seeds a products table with synthetic rows (deterministic, so runs are comparable),
+times the hot paths through the same functions the endpoints use, and writes JSON
+that can be compared between releases:
+
+    PYTHONPATH=. python -m fastapi_app.benchmark --rows 10000,100000 --out bench.json
+    PYTHONPATH=. python -m fastapi_app.benchmark --dsn postgresql://localhost/bench \\
+        --rows 10000,100000,1000000 --out bench-pg.json
+    PYTHONPATH=. python -m fastapi_app.benchmark --compare old.json bench.json
+
+Backends:
+
+- with --dsn, a throwaway schema is created in that database, seeded with
+  generate_series (columns of the Prisma Product model) and dropped afterwards;
+  the service connects to it through its normal startup (pool, table detection)
+- without it, `MemoryProducts` stands in for the data layer, holding the same rows
+  as per-column sorted "missing" indexes. Its numbers cover the service's own
+  overhead (pagination, templates, bulk engine, write batching), not database time
+
+Bulk commits run against the local fake LLM (providers.FakeLLM), which answers
+with schema-valid values after --llm-latency seconds, so only the service and the
+database are measured.
+"""
+import argparse
+import asyncio
+import bisect
+import heapq
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+from itertools import groupby, islice
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from unittest import mock
+
+import httpx
+from fastapi.templating import Jinja2Templates
+
+try:
+    from . import clients, main, product_db, providers
+    from .product_db import quote_ident
+except ImportError:  # imported as a top-level module
+    import clients
+    import main
+    import product_db
+    import providers
+    from product_db import quote_ident
+
+FORMAT_VERSION = 1
+PAGE_SIZE = 100
+# the fields bulk autofill checks by default
+KEYS = [
+    "descriptionEn",
+    "descriptionAr",
+    "activeIngredients",
+    "skinType",
+    "concerns",
+    "features",
+    "ingredients",
+    "howToUse",
+    "metaTitle",
+    "metaDescription",
+]
+LONG_TEXT = "Gentle daily formula with hyaluronic acid and ceramides. " * 5
+EPOCH = datetime(2025, 1, 1)
+
+# column: (SQL type, value kind, % of rows where it is empty); the Product model
+SEED_COLUMNS = {
+    "title": ("text NOT NULL", "text", 0),
+    "titleAr": ("text", "text", 35),
+    "slug": ("text NOT NULL", "text", 0),
+    "descriptionEn": ("text", "long", 20),
+    "descriptionAr": ("text", "long", 55),
+    "price": ("double precision NOT NULL", "float", 0),
+    "compareAtPrice": ("double precision", "float", 70),
+    "currency": ("text NOT NULL", "const", 0),
+    "sku": ("text", "text", 10),
+    "barcode": ("text", "text", 30),
+    "isActive": ("boolean NOT NULL", "bool", 0),
+    "isFeatured": ("boolean NOT NULL", "bool", 0),
+    "isNew": ("boolean NOT NULL", "bool", 0),
+    "activeIngredients": ("text", "text", 45),
+    "skinType": ("text", "text", 40),
+    "concerns": ("text", "text", 40),
+    "usage": ("text", "text", 50),
+    "features": ("text", "long", 45),
+    "ingredients": ("text", "long", 25),
+    "howToUse": ("text", "long", 35),
+    "featuresAr": ("text", "long", 65),
+    "ingredientsAr": ("text", "long", 60),
+    "howToUseAr": ("text", "long", 60),
+    "metaTitle": ("text", "text", 50),
+    "metaDescription": ("text", "text", 55),
+    "stockQuantity": ("integer NOT NULL", "int", 0),
+    "viewCount": ("integer NOT NULL", "int", 0),
+    "salesCount": ("integer NOT NULL", "int", 0),
+    "categoryId": ("text", "text", 5),
+    "brandId": ("text", "text", 5),
+    "createdAt": ("timestamp(3) NOT NULL", "time", 0),
+    "updatedAt": ("timestamp(3) NOT NULL", "time", 0),
+}
+# per-column multipliers (coprime with 100) so columns go missing on different rows
+_MULTIPLIERS = dict(zip(SEED_COLUMNS, [i for i in range(3, 200, 2) if i % 5]))
+
+
+def product_id(i: int) -> str:
+    return f"p{i:07d}"
+
+
+def _is_missing(column: str, i: int) -> bool:
+    return (i * _MULTIPLIERS[column]) % 100 < SEED_COLUMNS[column][2]
+
+
+def _value(column: str, i: int) -> Any:
+    kind = SEED_COLUMNS[column][1]
+    if kind == "text":
+        return f"{column} {i}"
+    if kind == "long":
+        return LONG_TEXT
+    if kind == "const":
+        return "JOD"
+    if kind == "float":
+        return i % 500 + 0.99
+    if kind == "int":
+        return i % 50
+    if kind == "bool":
+        return i % 3 == 0
+    return EPOCH + timedelta(seconds=i)
+
+
+def _value_sql(column: str) -> str:
+    """SQL expression over generate_series' `i` producing the same value as _value."""
+    kind = SEED_COLUMNS[column][1]
+    expr = {
+        "text": f"'{column} ' || i",
+        "long": f"'{LONG_TEXT}'",
+        "const": "'JOD'",
+        "float": "(i % 500) + 0.99",
+        "int": "i % 50",
+        "bool": "i % 3 = 0",
+        "time": "timestamp '2025-01-01' + i * interval '1 second'",
+    }[kind]
+    pct = SEED_COLUMNS[column][2]
+    if pct:
+        expr = f"CASE WHEN (i * {_MULTIPLIERS[column]}) % 100 < {pct} THEN NULL ELSE {expr} END"
+    return expr
+
+
+def _missing_indexes(column: str, rows: int) -> List[int]:
+    """Sorted row numbers (1..rows) where `column` is empty, without testing each row."""
+    inverse = pow(_MULTIPLIERS[column], -1, 100)
+    starts = [(r * inverse) % 100 for r in range(SEED_COLUMNS[column][2])]
+    return sorted(
+        i for start in starts for i in range(start or 100, rows + 1, 100)
+    )
+
+
+class MemoryProducts:
+    """
+    In-process stand-in for the product_db adapters over `rows` seeded rows.
+    Rows are generated on read; writes are kept as per-row changes and keep the
+    missing indexes current, so bulk runs move through the table as they would
+    in Postgres.
+    """
+
+    def __init__(self, rows: int):
+        self.rows = rows
+        self.changes: Dict[int, Dict[str, Any]] = {}
+        self.missing = {
+            c: _missing_indexes(c, rows) for c, spec in SEED_COLUMNS.items() if spec[2]
+        }
+
+    def _index(self, product_id: str) -> Optional[int]:
+        try:
+            i = int(str(product_id).lstrip("p"))
+        except ValueError:
+            return None
+        return i if 0 < i <= self.rows else None
+
+    def _row(self, i: int, columns: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        changed = self.changes.get(i, {})
+        row = {"id": product_id(i)}
+        for c in columns or SEED_COLUMNS:
+            if c in changed:
+                row[c] = changed[c]
+            elif c in SEED_COLUMNS:
+                row[c] = None if _is_missing(c, i) else _value(c, i)
+        return row
+
+    def _lists(self, key_list: Sequence[str]) -> List[List[int]]:
+        return [self.missing[k] for k in key_list if k in self.missing]
+
+    def _page(self, key_list, limit, offset=0, after_id=None, before_id=None) -> List[int]:
+        lists = self._lists(key_list)
+        if before_id is not None:
+            end = self._index(before_id) or self.rows + 1
+            found = set()
+            for lst in lists:
+                pos = bisect.bisect_left(lst, end)
+                found.update(lst[max(0, pos - limit) : pos])
+            return sorted(found)[-limit:]
+        if after_id is not None or not offset:
+            start = (self._index(after_id) or 0) if after_id is not None else 0
+            found = set()
+            for lst in lists:
+                pos = bisect.bisect_right(lst, start)
+                found.update(lst[pos : pos + limit])
+            return sorted(found)[:limit]
+        merged = (i for i, _ in groupby(heapq.merge(*lists)))
+        return list(islice(merged, offset, offset + limit))
+
+    def _products(self, indexes: List[int], key_list) -> List[Dict[str, Any]]:
+        columns = ["title", *key_list]
+        return [product_db.missing_row(self._row(i, columns), key_list) for i in indexes]
+
+    async def find_missing(self, key_list, limit, offset=0, after_id=None, before_id=None):
+        return self._products(self._page(key_list, limit, offset, after_id, before_id), key_list)
+
+    async def find_missing_page(
+        self, key_list, limit, after_id=None, before_id=None, with_count=True
+    ):
+        products = await self.find_missing(
+            key_list, limit, after_id=after_id, before_id=before_id
+        )
+        return products, (await self.count_missing(key_list) if with_count else None)
+
+    async def count_missing(self, key_list) -> int:
+        return len(set().union(*self._lists(key_list)))
+
+    async def missing_counts(self, fields) -> Dict[str, Any]:
+        return {
+            "total": self.rows,
+            "missing": {f: len(self.missing.get(f, ())) for f in fields},
+        }
+
+    async def fetch(self, product_id: str) -> Optional[Dict[str, Any]]:
+        i = self._index(product_id)
+        return self._row(i) if i else None
+
+    def _apply(self, i: int, updates: Dict[str, Any]):
+        self.changes.setdefault(i, {}).update(updates)
+        for column, value in updates.items():
+            lst = self.missing.get(column)
+            if lst is None:
+                continue
+            pos = bisect.bisect_left(lst, i)
+            present = pos < len(lst) and lst[pos] == i
+            if value in (None, "") and not present:
+                lst.insert(pos, i)
+            elif value not in (None, "") and present:
+                del lst[pos]
+
+    async def update(self, product_id, updates, returning=None):
+        i = self._index(product_id)
+        if not i:
+            return None
+        self._apply(i, updates)
+        return self._row(i, returning)
+
+    async def bulk_update(self, rows: List[tuple], expected=None) -> List[Dict[str, Any]]:
+        results = []
+        for n, (product_id, updates) in enumerate(rows):
+            i = self._index(product_id)
+            if i and expected is not None:
+                current = self._row(i, list(updates))
+                if any(current.get(c) != v for c, v in expected[n].items()):
+                    results.append({"status": "conflict"})
+                    continue
+            if i:
+                self._apply(i, updates)
+            results.append({"status": "updated" if i else "not_found"})
+        return results
+
+
+async def seed_postgres(dsn: str, schema: str, rows: int) -> None:
+    import asyncpg
+
+    table = f'{quote_ident(schema)}."Product"'
+    columns = ", ".join(f"{quote_ident(c)} {spec[0]}" for c, spec in SEED_COLUMNS.items())
+    names = ", ".join(quote_ident(c) for c in SEED_COLUMNS)
+    values = ", ".join(_value_sql(c) for c in SEED_COLUMNS)
+    conn = await asyncpg.connect(dsn)
+    try:
+        await conn.execute(f"DROP SCHEMA IF EXISTS {quote_ident(schema)} CASCADE")
+        await conn.execute(f"CREATE SCHEMA {quote_ident(schema)}")
+        await conn.execute(
+            f'CREATE TABLE {table} ("id" text PRIMARY KEY, {columns})'
+        )
+        await conn.execute(
+            f"INSERT INTO {table} (\"id\", {names}) "
+            f"SELECT 'p' || lpad(i::text, 7, '0'), {values} "
+            f"FROM generate_series(1, $1::int) AS i",
+            rows,
+        )
+        await conn.execute(f"ANALYZE {table}")
+    finally:
+        await conn.close()
+
+
+async def drop_schema(dsn: str, schema: str) -> None:
+    import asyncpg
+
+    conn = await asyncpg.connect(dsn)
+    try:
+        await conn.execute(f"DROP SCHEMA IF EXISTS {quote_ident(schema)} CASCADE")
+    finally:
+        await conn.close()
+
+
+def _with_schema(dsn: str, schema: str) -> str:
+    return f"{dsn}{'&' if '?' in dsn else '?'}schema={schema}"
+
+
+def fake_llm(latency: float = 0.0):
+    """Serve LLM calls from providers.FakeLLM, answering after `latency` seconds."""
+    return mock.patch.multiple(
+        clients,
+        LLM_PROVIDER="fake",
+        _openai_client=providers.FakeLLM(providers.Faults(latency=latency), seed=0),
+    )
+
+
+def summarize(samples: List[float], **extra) -> Dict[str, Any]:
+    ms = sorted(s * 1000 for s in samples)
+    return {
+        "runs": len(ms),
+        "min_ms": round(ms[0], 3),
+        "median_ms": round(statistics.median(ms), 3),
+        "p95_ms": round(ms[min(len(ms) - 1, int(len(ms) * 0.95))], 3),
+        "mean_ms": round(statistics.fmean(ms), 3),
+        "max_ms": round(ms[-1], 3),
+        **extra,
+    }
+
+
+async def _time(fn: Callable, repeat: int, warmup: int = 1) -> List[float]:
+    for _ in range(warmup):
+        await fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def _reset_caches():
+    main._missing_count_cache.clear()
+    main._missing_stats_cache.update(value=None, computed_at=0.0)
+    main.product_cache.clear()
+
+
+async def run_cases(
+    rows: int, repeat: int, bulk_size: int, concurrency: int
+) -> Dict[str, Any]:
+    """Time every case against the configured data layer; bulk commits run last."""
+    mid = product_id(rows // 2)
+    results: Dict[str, Any] = {}
+    _reset_caches()
+
+    async def count_cold():
+        await main.db_count_missing_products(KEYS, cached=False)
+
+    async def stats_cold():
+        await main.get_missing_stats(cached=False)
+
+    cases = {
+        "db_find_missing_products.first_page": lambda: main.db_find_missing_products(
+            KEYS, PAGE_SIZE
+        ),
+        "db_find_missing_products.keyset_mid": lambda: main.db_find_missing_products(
+            KEYS, PAGE_SIZE, after_id=mid
+        ),
+        "db_find_missing_products.offset_mid": lambda: main.db_find_missing_products(
+            KEYS, PAGE_SIZE, offset=rows // 4
+        ),
+        "db_count_missing_products": count_cold,
+        "get_missing_stats": stats_cold,
+    }
+    for name, fn in cases.items():
+        results[name] = summarize(await _time(fn, repeat))
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        keys = ",".join(KEYS)
+
+        async def first_page():
+            main._missing_count_cache.clear()  # page views after the count TTL
+            resp = await client.get("/", params={"keys": keys, "limit": PAGE_SIZE})
+            resp.raise_for_status()
+
+        async def next_page():
+            resp = await client.get(
+                "/", params={"keys": keys, "limit": PAGE_SIZE, "after": mid}
+            )
+            resp.raise_for_status()
+
+        results["ui_index.first_page"] = summarize(await _time(first_page, repeat))
+        results["ui_index.keyset_mid"] = summarize(await _time(next_page, repeat))
+
+    samples, processed = [], 0
+    for _ in range(max(1, repeat // 2)):
+        started = time.perf_counter()
+        out = await main.bulk_autofill_products(
+            limit=bulk_size,
+            strategy="llm",
+            commit=True,
+            required_fields=None,
+            background=False,
+            concurrency=concurrency,
+            batch_size=main.LLM_BATCH_SIZE,
+            order="id",
+            whole_catalog=False,
+        )
+        samples.append(time.perf_counter() - started)
+        processed += out.get("processed_successfully", 0)
+    results["bulk_autofill_commit"] = summarize(
+        samples,
+        products=bulk_size,
+        products_per_second=round(processed / sum(samples), 1) if processed else 0.0,
+    )
+    return results
+
+
+async def run(
+    sizes: List[int],
+    repeat: int,
+    bulk_size: int,
+    dsn: Optional[str] = None,
+    schema: str = "benchmark",
+    keep_schema: bool = False,
+    llm_latency: float = 0.0,
+    concurrency: Optional[int] = None,
+) -> Dict[str, Any]:
+    concurrency = concurrency or main.BULK_CONCURRENCY
+    report: Dict[str, Any] = {
+        "format": FORMAT_VERSION,
+        "meta": {
+            "backend": "postgres" if dsn else "memory",
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "repeat": repeat,
+            "page_size": PAGE_SIZE,
+            "bulk_size": bulk_size,
+            "bulk_concurrency": concurrency,
+            "llm_batch_size": main.LLM_BATCH_SIZE,
+            "db_write_batch_size": main.DB_WRITE_BATCH_SIZE,
+            "llm_latency": llm_latency,
+            "keys": KEYS,
+        },
+        "results": {},
+    }
+    templates = Jinja2Templates(
+        directory=os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+    )
+    # no local stores: their caches would hide the data layer
+    settings = dict(
+        templates=templates,
+        JOB_STORE_PATH="",
+        SUGGESTION_CACHE_PATH="",
+        TRANSLATION_MEMORY_PATH="",
+        DRAFTS_PATH="",
+        PRODUCT_CACHE_CHANNEL="",
+    )
+    for rows in sizes:
+        print(f"⏱️ {rows} rows ({report['meta']['backend']})", file=sys.stderr)
+        started = time.perf_counter()
+        if dsn:
+            await seed_postgres(dsn, schema, rows)
+            patches = mock.patch.multiple(
+                main,
+                DATABASE_URL=_with_schema(dsn, schema),
+                PRODUCTS_TABLE="Product",
+                QUOTED_PRODUCTS_TABLE='"Product"',
+                **settings,
+            )
+        else:
+            store = MemoryProducts(rows)
+            patches = mock.patch.multiple(
+                main, _products=lambda background=False: store, **settings
+            )
+        seed_seconds = time.perf_counter() - started
+        with patches, fake_llm(llm_latency):
+            if dsn:
+                await main.startup()
+            try:
+                results = await run_cases(rows, repeat, bulk_size, concurrency)
+            finally:
+                if dsn:
+                    await main.shutdown()
+                    main.pool = None
+                    if not keep_schema:
+                        await drop_schema(dsn, schema)
+        results["seed"] = {"seconds": round(seed_seconds, 3)}
+        report["results"][str(rows)] = results
+    return report
+
+
+def compare(
+    base: Dict[str, Any], new: Dict[str, Any], threshold: float = 1.25
+) -> List[str]:
+    """Lines describing cases whose median got more than `threshold` times slower."""
+    regressions = []
+    print(f"{'rows':>8} {'case':<40} {'base ms':>10} {'new ms':>10} {'ratio':>7}")
+    for rows, cases in new.get("results", {}).items():
+        for name, result in cases.items():
+            before = base.get("results", {}).get(rows, {}).get(name, {})
+            old_ms, new_ms = before.get("median_ms"), result.get("median_ms")
+            if not old_ms or new_ms is None:
+                continue
+            ratio = new_ms / old_ms
+            line = f"{rows:>8} {name:<40} {old_ms:>10.2f} {new_ms:>10.2f} {ratio:>6.2f}x"
+            print(line + ("  ⚠️" if ratio > threshold else ""))
+            if ratio > threshold:
+                regressions.append(line)
+    return regressions
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def cli(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--rows", default="10000,100000,1000000")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--bulk-size", type=int, default=200)
+    parser.add_argument("--dsn", help="Postgres DSN; without it the in-memory stand-in is used")
+    parser.add_argument("--schema", default="benchmark")
+    parser.add_argument("--keep-schema", action="store_true")
+    parser.add_argument("--concurrency", type=int, help="bulk concurrency (default BULK_CONCURRENCY)")
+    parser.add_argument("--llm-latency", type=float, default=0.0)
+    parser.add_argument("--out", help="write JSON here instead of stdout")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"))
+    parser.add_argument("--threshold", type=float, default=1.25)
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            base = json.load(f)
+        with open(args.compare[1]) as f:
+            new = json.load(f)
+        return 1 if compare(base, new, args.threshold) else 0
+
+    report = asyncio.run(
+        run(
+            [int(n) for n in args.rows.split(",") if n.strip()],
+            args.repeat,
+            args.bulk_size,
+            dsn=args.dsn,
+            schema=args.schema,
+            keep_schema=args.keep_schema,
+            llm_latency=args.llm_latency,
+            concurrency=args.concurrency,
+        )
+    )
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(cli())
@@ -0,0 +1,395 @@
+"""
+Concurrency helpers for bulk autofill runs.
+
+- `RateLimiter`: async token bucket expressed in requests per minute
+- `ProviderLimiter`: bounds in-flight calls to one provider (OpenAI, SerpAPI, the DB),
+  applies its rate limit and backs off adaptively when the provider answers 429
+- `MicroBatcher`: coalesces concurrent single-item calls into batched calls
+- `BulkAutofillEngine`: drives a bounded worker pool over a list or async stream of
+  products and reports into the shared `ProgressState` job
+
+The module has no dependency on `main.py` so it can be reused by scripts and tests.
+"""
+import asyncio
+import itertools
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+
+def is_rate_limit_error(exc: BaseException) -> bool:
+    """True when `exc` represents an HTTP 429 from openai, httpx or similar clients."""
+    if exc.__class__.__name__ == "RateLimitError":
+        return True
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status == 429
+
+
+def _retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """Read a Retry-After hint (seconds) from the error's HTTP response if present."""
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        value = headers.get("retry-after")
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+    """Token bucket limiting calls to `per_minute` requests per minute (0 disables it)."""
+
+    def __init__(self, per_minute: int = 0, burst: Optional[int] = None):
+        self.per_minute = per_minute
+        self.capacity = float(burst or max(1, per_minute // 6)) if per_minute else 0.0
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if not self.per_minute:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                rate = self.per_minute / 60.0
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / rate)
+
+
+class ProviderLimiter:
+    """
+    Per-provider admission control: a semaphore for in-flight calls, an optional
+    requests-per-minute bucket, and a shared cooldown that grows exponentially on
+    consecutive 429 responses and resets once calls succeed again.
+    `on_throttle(name)` is called for every retried 429, e.g. for cost accounting.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_in_flight: int,
+        requests_per_minute: int = 0,
+        max_retries: int = 5,
+        base_backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        on_throttle: Optional[Callable[[str], None]] = None,
+    ):
+        self.name = name
+        self.on_throttle = on_throttle
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._sem = asyncio.Semaphore(self.max_in_flight)
+        self._rate = RateLimiter(requests_per_minute)
+        self._cooldown_until = 0.0
+        self._throttle_streak = 0
+        self.in_flight = 0
+        self.throttled = 0
+
+    async def _wait_cooldown(self):
+        delay = self._cooldown_until - time.monotonic()
+        while delay > 0:
+            await asyncio.sleep(delay)
+            delay = self._cooldown_until - time.monotonic()
+
+    def _register_throttle(self, exc: BaseException) -> float:
+        self.throttled += 1
+        self._throttle_streak += 1
+        delay = _retry_after_seconds(exc)
+        if delay is None:
+            delay = min(
+                self.max_backoff, self.base_backoff * (2 ** (self._throttle_streak - 1))
+            )
+            delay += random.uniform(0, delay / 4)
+        self._cooldown_until = max(self._cooldown_until, time.monotonic() + delay)
+        return delay
+
+    def _register_success(self):
+        self._throttle_streak = 0
+
+    @asynccontextmanager
+    async def slot(self):
+        """Wait for cooldown, rate limit and a free in-flight slot."""
+        await self._wait_cooldown()
+        await self._rate.acquire()
+        async with self._sem:
+            self.in_flight += 1
+            try:
+                yield
+            finally:
+                self.in_flight -= 1
+
+    async def call(self, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """Run `await fn(*args, **kwargs)` inside a slot, retrying 429s with backoff."""
+        attempt = 0
+        while True:
+            try:
+                async with self.slot():
+                    result = await fn(*args, **kwargs)
+            except Exception as e:
+                if is_rate_limit_error(e) and attempt < self.max_retries:
+                    attempt += 1
+                    delay = self._register_throttle(e)
+                    if self.on_throttle is not None:
+                        self.on_throttle(self.name)
+                    print(
+                        f"⏳ {self.name} rate limited, backing off {delay:.1f}s "
+                        f"(attempt {attempt}/{self.max_retries})"
+                    )
+                    continue
+                raise
+            self._register_success()
+            return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self.in_flight,
+            "requests_per_minute": self._rate.per_minute,
+            "throttled": self.throttled,
+            "cooling_down": self._cooldown_until > time.monotonic(),
+        }
+
+
+class MicroBatcher:
+    """
+    Collect items submitted concurrently and hand them to `flush_fn` in groups of up
+    to `max_batch`, waiting at most `max_wait` seconds for a group to fill.
+
+    `flush_fn(items)` returns one result per item, in order. Each `submit()` caller
+    gets its own result back (or the exception raised by the batch).
+    """
+
+    def __init__(
+        self,
+        flush_fn: Callable[[List[Any]], Awaitable[List[Any]]],
+        max_batch: int = 5,
+        max_wait: float = 0.05,
+    ):
+        self.flush_fn = flush_fn
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait
+        self._pending: List[Any] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+
+    async def submit(self, item: Any) -> Any:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(
+                self.max_wait, self._flush
+            )
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Any]):
+        try:
+            results = await self.flush_fn([item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+
+async def _iterate(items):
+    for item in items:
+        yield item
+
+
+class BulkAutofillEngine:
+    """
+    Process products with at most `concurrency` items in flight, reporting progress
+    to `tracker` (a ProgressState) under `job_id`.
+
+    `process_item(product)` returns a result dict (or None to skip the product) and
+    raises on failure; failures are recorded and never stop the remaining items.
+    Provider-level limits are enforced by the ProviderLimiters used inside
+    `process_item`, so `concurrency` only caps how many products are being worked on.
+
+    Products come from a list or an async iterator (e.g. a `PriorityFeeder`) and are
+    pulled by the workers as they free up. The job's `checkpoint` is
+    `checkpoint_of(product)` for the last product before which everything has
+    finished (`checkpoint_done` counts them), so a restarted job can continue after
+    it; by default that is the product id, which suits id-ordered sources.
+    `done_offset` is the finished count when resuming. With a `done_ids` list every
+    finished product's id is appended to it and saved as the job's "done_ids", so a
+    resumed priority-ordered job can skip products whose score has since dropped
+    below the checkpoint (see PriorityFeeder). With `keep_results=False`
+    (background and whole-catalog runs) per-product results are only reported to
+    the tracker, so memory stays flat however many products stream through.
+    """
+
+    def __init__(
+        self,
+        tracker,
+        job_id: str,
+        process_item: Callable[[Dict[str, Any]], Awaitable[Optional[Dict[str, Any]]]],
+        concurrency: int = 4,
+        done_offset: int = 0,
+        checkpoint_of: Callable[[Dict[str, Any]], Any] = lambda p: p.get("id"),
+        keep_results: bool = True,
+        done_ids: Optional[List[str]] = None,
+    ):
+        self.tracker = tracker
+        self.job_id = job_id
+        self.process_item = process_item
+        self.concurrency = max(1, concurrency)
+        self.checkpoint_of = checkpoint_of
+        self.keep_results = keep_results
+        self.done_ids = done_ids
+        self.processed_count = 0
+        self.error_count = 0
+        self._done = done_offset
+        self._done_offset = done_offset
+        # index -> checkpoint of finished products past the watermark
+        self._finished: Dict[int, Any] = {}
+        self._watermark = -1
+
+    def _advance_checkpoint(self, index: int, product: Dict[str, Any]):
+        self._finished[index] = self.checkpoint_of(product)
+        if self._watermark + 1 not in self._finished:
+            return
+        while self._watermark + 1 in self._finished:
+            self._watermark += 1
+            checkpoint = self._finished.pop(self._watermark)
+        self.tracker.update_job(
+            self.job_id,
+            checkpoint=checkpoint,
+            checkpoint_done=self._done_offset + self._watermark + 1,
+        )
+
+    def _cancelled(self) -> bool:
+        if self.job_id in self.tracker.lost:
+            return True  # another worker claimed the job; it carries on there
+        job = self.tracker.get_job(self.job_id)
+        return bool(job and job.get("cancelled"))
+
+    async def _run_one(self, index: int, product: Dict[str, Any], results: Dict):
+        product_id = product.get("id", "unknown")
+        product_title = product.get("title") or "Unknown"
+        self.tracker.update_job(
+            self.job_id, status_message=f"Processing: {product_title[:50]}..."
+        )
+        finished = False
+        try:
+            entry = await self.process_item(product)
+            finished = True
+            if entry is not None:
+                self.processed_count += 1
+                if self.keep_results:
+                    results[index] = entry
+                self.tracker.add_processed_item(
+                    self.job_id,
+                    {
+                        "item_id": str(product_id),
+                        "item_name": product_title,
+                        "status": "success",
+                        "details": entry.get("details")
+                        or f"Generated: {', '.join(entry.get('processed_fields', []))}",
+                    },
+                )
+        except Exception as e:
+            finished = True
+            self.error_count += 1
+            error_msg = str(e)
+            if self.keep_results:
+                results[index] = {
+                    "product_id": product_id,
+                    "title": product_title,
+                    "status": "error",
+                    "error": error_msg,
+                }
+            self.tracker.add_processed_item(
+                self.job_id,
+                {
+                    "item_id": str(product_id),
+                    "item_name": product_title,
+                    "status": "error",
+                    "details": error_msg,
+                },
+            )
+        finally:
+            self._done += 1
+            if self.done_ids is None or not finished:
+                # a product cancelled mid-run (shutdown) is retried on resume
+                self.tracker.update_job(self.job_id, current_item=self._done)
+            else:
+                self.done_ids.append(str(product_id))
+                self.tracker.update_job(
+                    self.job_id, current_item=self._done, done_ids=self.done_ids
+                )
+            self._advance_checkpoint(index, product)
+
+    async def run(self, products) -> List[Dict[str, Any]]:
+        """Process all products and return the per-product result entries in input order."""
+        self.tracker.update_job(self.job_id, status="running")
+        results: Dict[int, Dict[str, Any]] = {}
+        self._finished = {}
+        self._watermark = -1
+        if hasattr(products, "__aiter__"):
+            source = products.__aiter__()
+            workers = self.concurrency
+        else:
+            source = _iterate(products)
+            workers = min(self.concurrency, len(products)) or 1
+        pull_lock = asyncio.Lock()
+        indexes = itertools.count()
+
+        async def next_item():
+            async with pull_lock:
+                try:
+                    product = await source.__anext__()
+                except StopAsyncIteration:
+                    return None
+                return next(indexes), product
+
+        async def worker():
+            while not self._cancelled():
+                item = await next_item()
+                if item is None:
+                    return
+                await self._run_one(item[0], item[1], results)
+
+        try:
+            await asyncio.gather(*(worker() for _ in range(workers)))
+        finally:
+            closer = getattr(source, "aclose", None)
+            if closer is not None:
+                await closer()
+
+        status = "cancelled" if self._cancelled() else "completed"
+        self.tracker.update_job(
+            self.job_id,
+            status=status,
+            completed=True,
+            status_message=f"{status.capitalize()}: {self.processed_count} successful, {self.error_count} errors",
+        )
+        return [results[i] for i in sorted(results)]
@@ -0,0 +1,160 @@
+"""
+Shared outbound API clients for the metadata service.
+
+One pooled `AsyncOpenAI` client is created per process (normally from the app's
+startup hook) and reused by `main.py`, `lang_nodes.py` and the bulk paths, so LLM
+calls never block the event loop and keep their HTTP connections alive between
+requests. A second shared `httpx.AsyncClient` (HTTP/2 when the `h2` extra is
+installed) serves web enrichment calls such as SerpAPI. Call `close_clients()` on
+shutdown.
+
+LLM_PROVIDER=fake and SEARCH_PROVIDER=fake swap these for the local fakes in
+providers.py (no API keys needed; latency, errors and 429s are injected from the
+FAKE_LLM_* / FAKE_SEARCH_* settings), for load tests and offline development.
+
+Tunables (environment):
+- OPENAI_TIMEOUT / OPENAI_CONNECT_TIMEOUT: request and connect timeouts in seconds
+- OPENAI_MAX_CONNECTIONS / OPENAI_MAX_KEEPALIVE: connection pool sizes
+- OPENAI_KEEPALIVE_EXPIRY: seconds an idle connection is kept open
+- OPENAI_MAX_RETRIES: client-level retries (connection errors, 5xx, 429)
+- HTTP_TIMEOUT / HTTP_MAX_CONNECTIONS: web enrichment client timeout and pool size
+- LLM_PROVIDER (openai|fake) / SEARCH_PROVIDER (serpapi|fake)
+"""
+import os
+from typing import Any, Dict, Optional
+
+import httpx
+
+try:
+    from . import providers
+except ImportError:  # imported as a top-level module
+    import providers
+
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "60"))
+OPENAI_CONNECT_TIMEOUT = float(os.getenv("OPENAI_CONNECT_TIMEOUT", "5"))
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "20"))
+OPENAI_MAX_KEEPALIVE = int(os.getenv("OPENAI_MAX_KEEPALIVE", "10"))
+OPENAI_KEEPALIVE_EXPIRY = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "30"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "1"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "openai").lower()
+SEARCH_PROVIDER = os.getenv("SEARCH_PROVIDER", "serpapi").lower()
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+
+    _http2_available = True
+except Exception:
+    _http2_available = False
+
+_openai_client = None
+_http_client: Optional[httpx.AsyncClient] = None
+_fake_search: Optional[providers.FakeSearch] = None
+
+
+def llm_enabled(api_key: Optional[str]) -> bool:
+    """True when LLM calls can be made: with an API key or the fake provider."""
+    return bool(api_key) or LLM_PROVIDER == "fake"
+
+
+def search_enabled(api_key: Optional[str]) -> bool:
+    return bool(api_key) or SEARCH_PROVIDER == "fake"
+
+
+def init_openai_client(api_key: Optional[str] = None):
+    """Create the shared AsyncOpenAI client (idempotent). Returns None without a key."""
+    global _openai_client
+    if _openai_client is not None:
+        return _openai_client
+    if LLM_PROVIDER == "fake":
+        seed = os.getenv("FAKE_PROVIDER_SEED")
+        _openai_client = providers.FakeLLM(
+            providers.Faults.from_env("FAKE_LLM"), seed=int(seed) if seed else None
+        )
+        return _openai_client
+    api_key = api_key or os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        return None
+    from openai import AsyncOpenAI
+
+    http_client = httpx.AsyncClient(
+        timeout=httpx.Timeout(OPENAI_TIMEOUT, connect=OPENAI_CONNECT_TIMEOUT),
+        limits=httpx.Limits(
+            max_connections=OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=OPENAI_MAX_KEEPALIVE,
+            keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY,
+        ),
+    )
+    _openai_client = AsyncOpenAI(
+        api_key=api_key,
+        http_client=http_client,
+        # kept low: sustained 429s are handled by the ProviderLimiter's shared cooldown
+        max_retries=OPENAI_MAX_RETRIES,
+    )
+    return _openai_client
+
+
+def get_openai_client():
+    """Return the shared AsyncOpenAI client, creating it lazily from the environment."""
+    return _openai_client or init_openai_client()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared keep-alive client for web enrichment calls."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            http2=_http2_available,
+            timeout=httpx.Timeout(HTTP_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_CONNECTIONS,
+                keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY,
+            ),
+        )
+    return _http_client
+
+
+def get_fake_search() -> providers.FakeSearch:
+    global _fake_search
+    if _fake_search is None:
+        _fake_search = providers.FakeSearch(providers.Faults.from_env("FAKE_SEARCH"))
+    return _fake_search
+
+
+async def serpapi_search(api_key: str, query: str, num: int = 3) -> dict:
+    """Run a Google search through SerpAPI; raises httpx.HTTPStatusError on 4xx/5xx."""
+    if SEARCH_PROVIDER == "fake":
+        return await get_fake_search().search(query, num)
+    r = await get_http_client().get(
+        "https://serpapi.com/search",
+        params={"api_key": api_key, "engine": "google", "q": query, "num": num},
+    )
+    r.raise_for_status()
+    return r.json()
+
+
+def fake_provider_stats() -> Dict[str, Any]:
+    """Injected-fault counters of the fake providers in use (empty with real ones)."""
+    stats = {}
+    if isinstance(_openai_client, providers.FakeLLM):
+        stats["llm"] = _openai_client.faults.stats()
+    if _fake_search is not None:
+        stats["search"] = _fake_search.faults.stats()
+    return stats
+
+
+async def close_clients():
+    """Close pooled connections; safe to call more than once."""
+    global _openai_client, _http_client, _fake_search
+    _fake_search = None
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+    if _openai_client is not None:
+        try:
+            await _openai_client.close()
+        except Exception:
+            pass
+        _openai_client = None
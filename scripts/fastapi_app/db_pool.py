@@ -0,0 +1,233 @@
+"""
+asyncpg pool wrapper for the admin service.
+
+`TimedPool` delegates to an asyncpg pool and changes how connections are acquired:
+
+- the wait for a free connection is reported to `on_wait(seconds)` (the
+  db_pool_acquire_wait_seconds histogram), so pool saturation is visible before it
+  becomes latency
+- with `acquire_timeout` set, a caller that cannot get a connection in time gets
+  `PoolExhausted` instead of queueing indefinitely (mapped to HTTP 503)
+- `background()` returns a view of the same pool whose acquisitions also hold one
+  of `background_slots` permits, so whole-table scans and bulk-job reads can never
+  take every connection away from UI requests (they wait rather than fail fast).
+  Those scans run under their own `background_statement_timeout_ms` (0 = none)
+  instead of the pool-wide statement_timeout meant for UI requests. Given a
+  `background_pool` created with that timeout, the view draws from it and pays no
+  round trips; otherwise it SETs/RESETs the timeout per acquisition, and only
+  when it differs from the session default `statement_timeout_ms`
+
+Session settings (search_path, statement_timeout) are passed as `server_settings`
+in the startup packet rather than set with an extra round trip per connection.
+
+`listen()` keeps a dedicated (unpooled) connection subscribed to a NOTIFY channel,
+used for cross-worker cache invalidation.
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, Optional
+
+import asyncpg
+
+
+class PoolExhausted(Exception):
+    """No pooled connection became free within the acquire timeout."""
+
+
+async def create_pool(
+    dsn: str,
+    min_size: int = 2,
+    max_size: int = 10,
+    search_path: Optional[str] = None,
+    statement_timeout_ms: int = 0,
+    max_inactive_connection_lifetime: float = 300.0,
+    max_queries: int = 50000,
+    statement_cache_size: int = 100,
+    application_name: str = "product-metadata-helper",
+) -> asyncpg.pool.Pool:
+    server_settings: Dict[str, str] = {"application_name": application_name}
+    if search_path:
+        server_settings["search_path"] = search_path
+    if statement_timeout_ms:
+        server_settings["statement_timeout"] = str(int(statement_timeout_ms))
+    return await asyncpg.create_pool(
+        dsn=dsn,
+        min_size=min(min_size, max_size),
+        max_size=max_size,
+        max_queries=max_queries,
+        max_inactive_connection_lifetime=max_inactive_connection_lifetime,
+        statement_cache_size=statement_cache_size,
+        server_settings=server_settings,
+    )
+
+
+@asynccontextmanager
+async def statement_timeout(conn, timeout_ms: int):
+    """
+    Run the block under a session statement_timeout (0 = none), then RESET it to
+    the connection's default. A session SET rather than SET LOCAL, so that it also
+    covers statements that cannot run in a transaction (CREATE INDEX CONCURRENTLY).
+    """
+    await conn.execute(f"SET statement_timeout = {int(timeout_ms)}")
+    try:
+        yield conn
+    finally:
+        await conn.execute("RESET statement_timeout")
+
+
+class _Acquire:
+    def __init__(self, owner: "TimedPool", gate: Optional[asyncio.Semaphore]):
+        self.owner = owner
+        self.gate = gate
+        self.conn = None
+        self.timeout = None
+
+    async def __aenter__(self):
+        owner = self.owner
+        started = time.perf_counter()
+        deadline = owner.acquire_timeout or None
+        try:
+            if self.gate is not None:
+                await asyncio.wait_for(self.gate.acquire(), deadline)
+                if deadline:
+                    deadline = max(0.001, deadline - (time.perf_counter() - started))
+            try:
+                self.conn = await owner.pool.acquire(timeout=deadline)
+            except BaseException:
+                if self.gate is not None:
+                    self.gate.release()
+                raise
+        except asyncio.TimeoutError:
+            owner.root.timeouts += 1
+            raise PoolExhausted(
+                f"no database connection free within {owner.acquire_timeout:g}s"
+            ) from None
+        finally:
+            if owner.on_wait is not None:
+                owner.on_wait(time.perf_counter() - started)
+        if owner.statement_timeout_ms is not None:
+            self.timeout = statement_timeout(self.conn, owner.statement_timeout_ms)
+            try:
+                await self.timeout.__aenter__()
+            except BaseException:
+                self.timeout = None
+                await self._release()
+                raise
+        return self.conn
+
+    async def __aexit__(self, exc_type, exc, tb):
+        try:
+            if self.timeout is not None:
+                await self.timeout.__aexit__(None, None, None)
+        finally:
+            await self._release()
+        return False
+
+    async def _release(self):
+        try:
+            await self.owner.pool.release(self.conn)
+        finally:
+            if self.gate is not None:
+                self.gate.release()
+
+
+class TimedPool:
+    def __init__(
+        self,
+        pool: asyncpg.pool.Pool,
+        acquire_timeout: float = 0.0,
+        background_slots: int = 0,
+        on_wait: Optional[Callable[[float], None]] = None,
+        background_statement_timeout_ms: Optional[int] = None,
+        statement_timeout_ms: int = 0,
+        background_pool: Optional[asyncpg.pool.Pool] = None,
+        _gate: Optional[asyncio.Semaphore] = None,
+        _root: Optional["TimedPool"] = None,
+        _statement_timeout_ms: Optional[int] = None,
+    ):
+        self.pool = pool
+        self.root = _root or self
+        self.acquire_timeout = acquire_timeout
+        self.on_wait = on_wait
+        self.timeouts = 0
+        self.background_slots = background_slots
+        self.background_statement_timeout_ms = background_statement_timeout_ms
+        self.session_statement_timeout_ms = statement_timeout_ms
+        self.background_pool = background_pool
+        # set per acquisition on the background view (None = pool default)
+        self.statement_timeout_ms = _statement_timeout_ms
+        self._gate = _gate
+        self._background: Optional["TimedPool"] = None
+
+    def acquire(self) -> _Acquire:
+        return _Acquire(self, self._gate)
+
+    def background(self) -> "TimedPool":
+        """View of this pool limited to `background_slots` concurrent connections."""
+        if not self.background_slots or self._gate is not None:
+            return self
+        if self._background is None:
+            timeout_ms = self.background_statement_timeout_ms
+            if self.background_pool is not None or (
+                timeout_ms == self.session_statement_timeout_ms
+            ):
+                timeout_ms = None  # the connections already run under it
+            # background work queues instead of failing fast
+            self._background = TimedPool(
+                self.background_pool or self.pool,
+                0.0,
+                on_wait=self.on_wait,
+                _gate=asyncio.Semaphore(self.background_slots),
+                _root=self,
+                _statement_timeout_ms=timeout_ms,
+            )
+        return self._background
+
+    async def close(self):
+        if self.background_pool is not None:
+            await self.background_pool.close()
+        await self.pool.close()
+
+    def __getattr__(self, name: str) -> Any:
+        # get_size, get_idle_size, get_max_size, close, ...
+        return getattr(self.pool, name)
+
+
+async def listen(
+    dsn: str,
+    channel: str,
+    on_notify: Callable[[str], None],
+    on_lost: Callable[[], None],
+    search_path: Optional[str] = None,
+    retry_interval: float = 5.0,
+):
+    """
+    Keep a dedicated connection LISTENing on `channel` and call `on_notify(payload)`
+    for each notification. When the connection drops, `on_lost()` is called (nothing
+    heard meanwhile can be trusted) and it reconnects every `retry_interval` seconds.
+    Runs until cancelled.
+    """
+    settings = {"application_name": "product-metadata-helper-listener"}
+    if search_path:
+        settings["search_path"] = search_path
+    while True:
+        try:
+            conn = await asyncpg.connect(dsn=dsn, server_settings=settings)
+        except Exception as e:
+            print(f"⚠️ LISTEN {channel} connection failed: {e}")
+            await asyncio.sleep(retry_interval)
+            continue
+        lost = asyncio.Event()
+        conn.add_termination_listener(lambda _conn: lost.set())
+        try:
+            await conn.add_listener(channel, lambda _c, _pid, _ch, payload: on_notify(payload))
+            await lost.wait()
+            print(f"⚠️ LISTEN {channel} connection lost, reconnecting")
+        except Exception as e:
+            print(f"⚠️ LISTEN {channel} failed: {e}")
+        finally:
+            on_lost()
+            if not conn.is_closed():
+                await conn.close()
+        await asyncio.sleep(retry_interval)
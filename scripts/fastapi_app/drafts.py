@@ -0,0 +1,147 @@
+"""
+Staged autofill drafts awaiting review.
+
+Bulk autofill with commit=false stores each product's typed suggestion here, one
+row per (product, field), instead of only returning it. Reviewers list the drafts
+next to the current values, then approve (applied with batched UPDATEs) or reject
+them by product, job or field, so generation runs once per product and review and
+commit cost only database work. Staging a field again replaces its draft.
+
+Each draft keeps the column's value at staging time ("previous"); approval only
+writes while the column still holds it, so later manual edits are not overwritten.
+"""
+import json
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    from .local_store import LocalStore
+except ImportError:  # imported as a top-level module
+    from local_store import LocalStore
+
+
+class DraftStore(LocalStore):
+    schema = """
+    CREATE TABLE IF NOT EXISTS drafts (
+        product_id TEXT NOT NULL,
+        field TEXT NOT NULL,
+        value TEXT NOT NULL,
+        previous TEXT,
+        job_id TEXT,
+        created_at REAL NOT NULL,
+        PRIMARY KEY (product_id, field)
+    );
+    CREATE INDEX IF NOT EXISTS drafts_job ON drafts(job_id);
+    """
+
+    def stage(
+        self,
+        product_id: str,
+        values: Dict[str, Any],
+        previous: Optional[Dict[str, Any]] = None,
+        job_id: Optional[str] = None,
+    ) -> int:
+        """Stage typed column values for one product; returns the number of fields."""
+        previous = previous or {}
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO drafts "
+                "(product_id, field, value, previous, job_id, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        str(product_id),
+                        field,
+                        json.dumps(value),
+                        json.dumps(previous.get(field), default=str),
+                        job_id,
+                        now,
+                    )
+                    for field, value in values.items()
+                ],
+            )
+        return len(values)
+
+    @staticmethod
+    def _where(
+        product_ids: Optional[List[str]],
+        job_id: Optional[str],
+        fields: Optional[List[str]],
+    ) -> Tuple[str, list]:
+        clauses, args = [], []
+        if product_ids:
+            clauses.append(f"product_id IN ({', '.join('?' * len(product_ids))})")
+            args += [str(p) for p in product_ids]
+        if job_id:
+            clauses.append("job_id = ?")
+            args.append(job_id)
+        if fields:
+            clauses.append(f"field IN ({', '.join('?' * len(fields))})")
+            args += list(fields)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", args
+
+    def select(
+        self,
+        product_ids: Optional[List[str]] = None,
+        job_id: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+        after_product: Optional[str] = None,
+    ) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """
+        {product_id: {field: {"value", "previous", "job_id", "created_at"}}} for the
+        matching drafts, in product id order. `limit` counts products, and
+        `after_product` continues a listing after that product id.
+        """
+        where, args = self._where(product_ids, job_id, fields)
+        if after_product is not None:
+            where += (" AND " if where else " WHERE ") + "product_id > ?"
+            args.append(after_product)
+        if limit is not None:
+            # page by product, not by row
+            where += (" AND " if where else " WHERE ") + (
+                "product_id IN (SELECT DISTINCT product_id FROM drafts"
+                f"{where} ORDER BY product_id LIMIT ?)"
+            )
+            args = args + args + [limit]
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM drafts{where} ORDER BY product_id, field", args
+            ).fetchall()
+        out: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for row in rows:
+            out.setdefault(row["product_id"], {})[row["field"]] = {
+                "value": json.loads(row["value"]),
+                "previous": json.loads(row["previous"]) if row["previous"] else None,
+                "job_id": row["job_id"],
+                "created_at": row["created_at"],
+            }
+        return out
+
+    def remove(self, pairs: Iterable[Tuple[str, str]]) -> int:
+        """Delete the given (product_id, field) drafts."""
+        pairs = [(str(p), f) for p, f in pairs]
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM drafts WHERE product_id = ? AND field = ?", pairs
+            )
+        return len(pairs)
+
+    def remove_matching(
+        self,
+        product_ids: Optional[List[str]] = None,
+        job_id: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+    ) -> int:
+        where, args = self._where(product_ids, job_id, fields)
+        with self._lock:
+            return self._conn.execute(f"DELETE FROM drafts{where}", args).rowcount
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) AS fields, COUNT(DISTINCT product_id) AS products "
+                "FROM drafts"
+            ).fetchone()
+        return {"products": row["products"], "fields": row["fields"]}
@@ -0,0 +1,165 @@
+"""
+Index advisor for the missing-field queries.
+
+`db_find_missing_products` and friends filter on "field is NULL or empty" for a set
+of columns, OR-ed together. Without help Postgres answers that with a sequential
+scan. A partial index whose predicate is exactly the query's WHERE clause lets
+lookups only touch the (usually few) incomplete rows. The indexes are on "id",
+which also serves the keyset ordering used by the admin index.
+
+Proposals are limited to one index per key set the hot queries actually use
+(the bulk autofill defaults and the admin index's all-columns view, see
+main.INDEXED_KEY_SETS), not one per column: every column referenced by an index
+predicate disqualifies updates of that column from HOT, and autofill writes
+exactly these columns, so each extra index costs an index insert on every write.
+
+`missing_predicate` is the single source of the predicate text: main.py builds its
+WHERE clauses with it, so queries and index predicates always match.
+"""
+import hashlib
+import json
+from typing import Any, Dict, List, Optional
+
+TEXT_TYPES = {"text", "character varying", "character"}
+
+
+def quote_ident(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def missing_predicate(column: str, data_type: Optional[str] = None) -> str:
+    """
+    SQL predicate true when `column` is NULL or empty.
+
+    For known column types the predicate is immutable (usable in a partial index);
+    for unknown types it falls back to the generic text comparison.
+    """
+    q = quote_ident(column)
+    if data_type in TEXT_TYPES:
+        return f"coalesce({q},'') = ''"
+    if data_type:
+        # non-text values never render as '', so only NULL counts as missing
+        return f"{q} IS NULL"
+    return f"coalesce({q}::text,'') = ''"
+
+
+def index_name(table: str, columns: List[str]) -> str:
+    if len(columns) == 1:
+        label = columns[0]
+    else:
+        label = hashlib.sha1(",".join(sorted(columns)).encode()).hexdigest()[:10]
+    # Postgres truncates identifiers at 63 bytes
+    return f"{table}_missing_{label}_idx"[:63]
+
+
+async def column_types(conn, table: str) -> Dict[str, str]:
+    rows = await conn.fetch(
+        "SELECT column_name, data_type FROM information_schema.columns "
+        "WHERE table_schema = current_schema() AND table_name = $1",
+        table,
+    )
+    return {r["column_name"]: r["data_type"] for r in rows}
+
+
+async def existing_indexes(conn, table: str) -> Dict[str, str]:
+    """
+    Valid indexes of `table`. An INVALID one (left by an interrupted CREATE INDEX
+    CONCURRENTLY) is not usable by the planner, so it counts as missing.
+    """
+    rows = await conn.fetch(
+        "SELECT c.relname AS indexname, pg_get_indexdef(i.indexrelid) AS indexdef "
+        "FROM pg_index i "
+        "JOIN pg_class c ON c.oid = i.indexrelid "
+        "JOIN pg_class t ON t.oid = i.indrelid "
+        "JOIN pg_namespace n ON n.oid = t.relnamespace "
+        "WHERE n.nspname = current_schema() AND t.relname = $1 AND i.indisvalid",
+        table,
+    )
+    return {r["indexname"]: r["indexdef"] for r in rows}
+
+
+def propose_indexes(
+    table: str,
+    quoted_table: str,
+    types: Dict[str, str],
+    key_sets: List[List[str]],
+    existing: Dict[str, str],
+) -> List[Dict[str, Any]]:
+    """
+    One partial index proposal per key set, its predicate the OR of the columns'
+    missing predicates (as in the queries; the planner matches an OR regardless of
+    order). Columns the table lacks are left out; duplicate sets are proposed once.
+    """
+    proposals = []
+    seen = set()
+    for key_set in key_sets:
+        columns = sorted(c for c in set(key_set) if c in types)
+        if not columns or tuple(columns) in seen:
+            continue
+        seen.add(tuple(columns))
+        name = index_name(table, columns)
+        predicate = " OR ".join(missing_predicate(c, types[c]) for c in columns)
+        proposals.append(
+            {
+                "columns": columns,
+                "index": name,
+                "exists": name in existing,
+                "sql": (
+                    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {quote_ident(name)} "
+                    f"ON {quoted_table} ({quote_ident('id')}) WHERE ({predicate})"
+                ),
+                "down": f"DROP INDEX CONCURRENTLY IF EXISTS {quote_ident(name)}",
+            }
+        )
+    return proposals
+
+
+def migration_sql(proposals: List[Dict[str, Any]]) -> str:
+    """Migration text for the proposals not yet present in the database."""
+    lines = [
+        "-- Partial indexes for missing-field lookups (generated by /debug/index-advisor).",
+        "-- CREATE INDEX CONCURRENTLY cannot run inside a transaction block, and a",
+        "-- build cancelled by statement_timeout leaves an INVALID index behind.",
+        "SET statement_timeout = 0;",
+    ]
+    lines += [p["sql"] + ";" for p in proposals if not p["exists"]]
+    return "\n".join(lines) + "\n"
+
+
+async def explain_analyze(conn, sql: str, *args) -> Dict[str, Any]:
+    """Run EXPLAIN ANALYZE and summarize the plan (scan types, timings)."""
+    raw = await conn.fetchval(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}", *args)
+    plan = (json.loads(raw) if isinstance(raw, str) else raw)[0]
+    node_types = []
+
+    def walk(node):
+        node_types.append(node.get("Node Type"))
+        for child in node.get("Plans", []):
+            walk(child)
+
+    walk(plan["Plan"])
+    return {
+        "execution_ms": plan.get("Execution Time"),
+        "planning_ms": plan.get("Planning Time"),
+        "node_types": node_types,
+        "sequential_scan": "Seq Scan" in node_types,
+    }
+
+
+async def apply_proposals(conn, proposals: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Create missing indexes one by one; a failure is reported and does not stop the
+    rest. Each is dropped first, since IF NOT EXISTS would keep an INVALID leftover
+    of the same name. Run without a statement_timeout (see db_pool.statement_timeout).
+    """
+    applied = []
+    for p in proposals:
+        if p["exists"]:
+            continue
+        try:
+            await conn.execute(p["down"])
+            await conn.execute(p["sql"])
+            applied.append({"index": p["index"], "status": "created"})
+        except Exception as e:
+            applied.append({"index": p["index"], "status": "error", "error": str(e)})
+    return applied
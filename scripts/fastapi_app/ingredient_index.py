@@ -0,0 +1,145 @@
+"""
+INCI ingredient dictionary used to normalize ingredient columns deterministically.
+
+`data/inci_ingredients.json` lists common cosmetic ingredients with their INCI name,
+aliases (trade and common names), Arabic name and, for actives, the name shown in
+`activeIngredients`. `IngredientIndex` hashes every name, alias and Arabic name for
+list tokens and keeps a word trie for finding ingredients inside free text, so
+autofill can:
+
+- canonicalize and deduplicate an ingredient list (`to_inci`)
+- translate it to Arabic token by token (`to_arabic`), leaving only unknown tokens
+  for the model
+- derive `activeIngredients` from the ingredient list (`actives`)
+
+and the chat agent can map user wording onto the same vocabulary (`find`).
+"""
+import json
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_PATH = os.path.join(os.path.dirname(__file__), "data", "inci_ingredients.json")
+
+# List separators (Latin and Arabic); a comma between digits belongs to the name
+# (1,2-Hexanediol)
+_LIST_SPLIT = re.compile(r"\s*(?:[;\n،؛]|,(?!\d))\s*")
+_PERCENT = re.compile(r"(\d+(?:[.,]\d+)?\s*%)")
+_PARENS = re.compile(r"\(([^)]*)\)")
+
+
+def _key(name: str) -> str:
+    return re.sub(r"[\s\-]+", " ", name.lower()).strip(" .*")
+
+
+class IngredientIndex:
+    def __init__(self, entries: List[Dict[str, Any]]):
+        self.entries = entries
+        self._by_name: Dict[str, Dict[str, Any]] = {}
+        self._trie: Dict[str, Any] = {}
+        for entry in entries:
+            for name in [entry["inci"], entry["ar"], *entry.get("aliases", [])]:
+                key = _key(name)
+                self._by_name.setdefault(key, entry)
+                node = self._trie
+                for word in key.split(" "):
+                    node = node.setdefault(word, {})
+                node.setdefault("$", entry)
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_PATH) -> "IngredientIndex":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def lookup(self, name: str) -> Optional[Dict[str, Any]]:
+        """Entry for an ingredient name or alias, also trying "A/B" and "A (B)" forms."""
+        entry = self._by_name.get(_key(name))
+        if entry is not None:
+            return entry
+        candidates = [_PARENS.sub("", name)] + _PARENS.findall(name) + name.split("/")
+        for candidate in candidates:
+            if candidate.strip() and candidate.strip() != name.strip():
+                entry = self._by_name.get(_key(candidate))
+                if entry is not None:
+                    return entry
+        return None
+
+    def parse(
+        self, text: str
+    ) -> List[Tuple[str, Optional[str], Optional[Dict[str, Any]]]]:
+        """Split an ingredient list into (token, percentage, entry) triples, deduplicated."""
+        out = []
+        seen = set()
+        for token in _LIST_SPLIT.split(text or ""):
+            token = token.strip().strip(".")
+            if not token:
+                continue
+            match = _PERCENT.search(token)
+            percent = match.group(1).replace(" ", "") if match else None
+            name = _PERCENT.sub("", token).strip(" -:")
+            entry = self.lookup(name)
+            ident = entry["inci"] if entry else _key(name)
+            if ident in seen:
+                continue
+            seen.add(ident)
+            out.append((name, percent, entry))
+        return out
+
+    def to_inci(self, text: str) -> Tuple[str, List[str]]:
+        """Canonical, deduplicated INCI list and the tokens that were not recognized."""
+        parsed = self.parse(text)
+        names = [entry["inci"] if entry else name for name, _, entry in parsed]
+        unknown = [name for name, _, entry in parsed if entry is None]
+        return ", ".join(names), unknown
+
+    def to_arabic(
+        self, text: str, translations: Optional[Dict[str, str]] = None
+    ) -> Tuple[Optional[str], List[str]]:
+        """
+        Arabic ingredient list, with unknown tokens taken from `translations`.
+        Returns (None, unknown tokens) while any token is still untranslated.
+        """
+        translations = translations or {}
+        parts, unknown = [], []
+        for name, _, entry in self.parse(text):
+            if entry is not None:
+                parts.append(entry["ar"])
+            elif translations.get(name):
+                parts.append(translations[name])
+            else:
+                unknown.append(name)
+        if unknown:
+            return None, unknown
+        return "، ".join(parts), []
+
+    def actives(self, text: str) -> List[str]:
+        """Display names of the active ingredients in a list, keeping concentrations."""
+        out: List[str] = []
+        seen = set()
+        for _, percent, entry in self.parse(text):
+            if entry is None or not entry.get("active") or entry["active"] in seen:
+                continue
+            seen.add(entry["active"])
+            out.append(f"{percent} {entry['active']}" if percent else entry["active"])
+        return out
+
+    def find(self, text: str) -> List[Dict[str, Any]]:
+        """Ingredients mentioned anywhere in free text (longest alias match wins)."""
+        words = _key(re.sub(r"[^\w\s\-/%]", " ", text or "")).split()
+        found: List[Dict[str, Any]] = []
+        i = 0
+        while i < len(words):
+            node, match, end = self._trie, None, i
+            for j in range(i, len(words)):
+                node = node.get(words[j])
+                if node is None:
+                    break
+                if "$" in node:
+                    match, end = node["$"], j + 1
+            if match is not None:
+                if match not in found:
+                    found.append(match)
+                i = end
+            else:
+                i += 1
+        return found
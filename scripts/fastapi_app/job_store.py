@@ -0,0 +1,160 @@
+"""
+Persistence backends for `ProgressState` jobs.
+
+- `MemoryJobStore`: process-local, the default when nothing is configured (tests)
+- `SqliteJobStore`: a local SQLite table shared by every uvicorn worker on the
+  host, so jobs survive restarts and any worker can report any job's progress
+
+Each job row records the worker that owns it and when its lease was last
+renewed (by a save or `renew`). A job whose owner stopped renewing for longer than
+the lease can be claimed by another worker (see `claim`), which is how unfinished
+bulk autofills are resumed after a restart without two workers picking up the same
+job. Saves and renewals only succeed for the current owner, so a worker that lost
+a job to a claim finds out (they return False) instead of overwriting the new
+owner's progress.
+"""
+import json
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+try:
+    from .local_store import LocalStore
+except ImportError:  # imported as a top-level module
+    from local_store import LocalStore
+
+
+def _encode(job: Dict[str, Any]) -> str:
+    def default(value):
+        if isinstance(value, datetime):
+            return {"__datetime__": value.isoformat()}
+        return str(value)
+
+    return json.dumps(job, default=default, ensure_ascii=False)
+
+
+def _decode(text: str) -> Dict[str, Any]:
+    def hook(obj):
+        if "__datetime__" in obj:
+            return datetime.fromisoformat(obj["__datetime__"])
+        return obj
+
+    return json.loads(text, object_hook=hook)
+
+
+class MemoryJobStore:
+    def __init__(self):
+        self._jobs: Dict[str, tuple] = {}
+
+    def save(self, job: Dict[str, Any], owner: str) -> bool:
+        entry = self._jobs.get(job["id"])
+        if entry and entry[1] != owner:
+            return False
+        self._jobs[job["id"]] = (_encode(job), owner, time.time(), bool(job.get("completed")))
+        return True
+
+    def load(self, job_id: str) -> Optional[Dict[str, Any]]:
+        entry = self._jobs.get(job_id)
+        return _decode(entry[0]) if entry else None
+
+    def delete(self, job_id: str):
+        self._jobs.pop(job_id, None)
+
+    def claim(self, job_id: str, owner: str, lease_seconds: float) -> bool:
+        entry = self._jobs.get(job_id)
+        if not entry or entry[3] or time.time() - entry[2] < lease_seconds:
+            return False
+        self._jobs[job_id] = (entry[0], owner, time.time(), entry[3])
+        return True
+
+    def renew(self, job_id: str, owner: str) -> bool:
+        entry = self._jobs.get(job_id)
+        if not entry or entry[1] != owner:
+            return False
+        self._jobs[job_id] = (entry[0], owner, time.time(), entry[3])
+        return True
+
+    def unfinished(self) -> List[Dict[str, Any]]:
+        return [_decode(e[0]) for e in self._jobs.values() if not e[3]]
+
+    def sweep(self, ttl_seconds: float) -> List[str]:
+        cutoff = time.time() - ttl_seconds
+        expired = [jid for jid, e in self._jobs.items() if e[3] and e[2] < cutoff]
+        for jid in expired:
+            del self._jobs[jid]
+        return expired
+
+
+class SqliteJobStore(LocalStore):
+    schema = """
+    CREATE TABLE IF NOT EXISTS jobs (
+        id TEXT PRIMARY KEY,
+        data TEXT NOT NULL,
+        owner TEXT NOT NULL,
+        updated_at REAL NOT NULL,
+        completed INTEGER NOT NULL DEFAULT 0
+    );
+    CREATE INDEX IF NOT EXISTS jobs_completed ON jobs(completed, updated_at);
+    """
+
+    def save(self, job: Dict[str, Any], owner: str) -> bool:
+        """Insert or update the job; False if another worker owns it now."""
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT INTO jobs (id, data, owner, updated_at, completed) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET data = excluded.data, "
+                "updated_at = excluded.updated_at, completed = excluded.completed "
+                "WHERE jobs.owner = excluded.owner",
+                (job["id"], _encode(job), owner, time.time(), int(bool(job.get("completed")))),
+            )
+        return cur.rowcount == 1
+
+    def load(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return _decode(row["data"]) if row else None
+
+    def delete(self, job_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def claim(self, job_id: str, owner: str, lease_seconds: float) -> bool:
+        """Atomically take over an unfinished job whose owner has gone quiet."""
+        now = time.time()
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE jobs SET owner = ?, updated_at = ? "
+                "WHERE id = ? AND completed = 0 AND updated_at < ?",
+                (owner, now, job_id, now - lease_seconds),
+            )
+        return cur.rowcount == 1
+
+    def renew(self, job_id: str, owner: str) -> bool:
+        """Extend the lease of a job this worker still owns."""
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE jobs SET updated_at = ? WHERE id = ? AND owner = ?",
+                (time.time(), job_id, owner),
+            )
+        return cur.rowcount == 1
+
+    def unfinished(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM jobs WHERE completed = 0"
+            ).fetchall()
+        return [_decode(r["data"]) for r in rows]
+
+    def sweep(self, ttl_seconds: float) -> List[str]:
+        cutoff = time.time() - ttl_seconds
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM jobs WHERE completed = 1 AND updated_at < ?", (cutoff,)
+            ).fetchall()
+            self._conn.execute(
+                "DELETE FROM jobs WHERE completed = 1 AND updated_at < ?", (cutoff,)
+            )
+        return [r["id"] for r in rows]
@@ -3,6 +3,8 @@ Lightweight "lang graph" node helper. This module provides helper functions that
 - `suggest_with_llm` uses OpenAI (if OPENAI_API_KEY) or Gemini (if GOOGLE_API_KEY and google-generativeai installed)
 - `search_web` uses SERPAPI (if SERPAPI_API_KEY)
 
+Both also work without keys when LLM_PROVIDER / SEARCH_PROVIDER is `fake` (see providers.py).
+
 It avoids hard runtime dependency on langgraph; if `langgraph` is installed, it registers nodes using the library's API.
 
 Usage: import this module from `main.py` to ensure nodes are available when the app starts.
@@ -11,6 +13,13 @@ import os
 import json
 from typing import Dict, List, Any, Optional
 
+try:
+    from .clients import get_openai_client, llm_enabled, search_enabled, serpapi_search
+    from .suggestion_schema import response_format
+except ImportError:  # imported as a top-level module
+    from clients import get_openai_client, llm_enabled, search_enabled, serpapi_search
+    from suggestion_schema import response_format
+
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 SERPAPI_API_KEY = os.getenv("SERPAPI_API_KEY")
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
@@ -23,11 +32,10 @@ except Exception:
 
 
 async def suggest_with_openai(product_name: Optional[str], existing_meta: Optional[Dict[str, Any]], required_keys: List[str]) -> Dict[str, Any]:
-    if not OPENAI_API_KEY:
+    if not llm_enabled(OPENAI_API_KEY):
         return {k: "unknown" for k in required_keys}
     try:
-        import openai
-        openai.api_key = OPENAI_API_KEY
+        client = get_openai_client()
         message = (
             "You are a helpful assistant that fills missing product metadata.\n"
             f"Product name: {product_name}\n"
@@ -35,13 +43,14 @@ async def suggest_with_openai(product_name: Optional[str], existing_meta: Option
             f"Required keys: {json.dumps(required_keys)}\n"
             "Return only a JSON object with the requested keys and suggested values. If unsure use 'unknown'."
         )
-        resp = openai.ChatCompletion.create(
+        resp = await client.chat.completions.create(
             model="gpt-4o-mini",
             messages=[{"role": "user", "content": message}],
+            response_format=response_format(required_keys),
             max_tokens=300,
             temperature=0.2,
         )
-        text = resp["choices"][0]["message"]["content"].strip()
+        text = resp.choices[0].message.content.strip()
         return json.loads(text)
     except Exception:
         return {k: "unknown" for k in required_keys}
@@ -69,13 +78,10 @@ async def suggest_with_gemini(product_name: Optional[str], existing_meta: Option
 
 
 async def search_web(product_name: Optional[str], required_keys: List[str]) -> Dict[str, Any]:
-    if not SERPAPI_API_KEY or not product_name:
+    if not search_enabled(SERPAPI_API_KEY) or not product_name:
         return {k: "" for k in required_keys}
     try:
-        import httpx
-        params = {"api_key": SERPAPI_API_KEY, "engine": "google", "q": product_name, "num": 3}
-        r = httpx.get("https://serpapi.com/search", params=params, timeout=10.0)
-        data = r.json()
+        data = await serpapi_search(SERPAPI_API_KEY, product_name)
         text_pool = []
         for item in data.get("organic_results", [])[:3]:
             text_pool.append(item.get("title", ""))
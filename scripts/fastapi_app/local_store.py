@@ -0,0 +1,38 @@
+"""
+Small helpers for the service's local SQLite files (suggestion cache, job store, ...).
+
+SQLite keeps these features dependency-free and survives restarts; every store
+uses WAL mode so several uvicorn workers on one host can share a file.
+"""
+import os
+import sqlite3
+import threading
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """Open `path` for use from the event loop thread and worker threads alike."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=5000")
+    return conn
+
+
+class LocalStore:
+    """Base class owning one SQLite connection guarded by a lock."""
+
+    schema = ""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = connect(path)
+        if self.schema:
+            self._conn.executescript(self.schema)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -1,12 +1,21 @@
 import os
 import json
 import asyncio
+import copy
+import socket
+import time
 import uuid
 from datetime import datetime
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Set
 
 from fastapi import FastAPI, HTTPException, Query, Request, Form
-from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
+from fastapi.responses import (
+    HTMLResponse,
+    JSONResponse,
+    RedirectResponse,
+    Response,
+    StreamingResponse,
+)
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel
 
@@ -19,20 +28,126 @@ except Exception:
     Prisma = None  # type: ignore
     _prisma_available = False
 
-import asyncpg
 from urllib.parse import urlsplit, urlunsplit, parse_qs
 from dotenv import load_dotenv
 
+try:
+    from . import accounting, clients, db_pool, index_advisor, metrics, product_db
+    from . import scheduler
+    from . import suggestion_schema
+    from . import translation_memory as tm
+    from .bulk_engine import BulkAutofillEngine, MicroBatcher, ProviderLimiter
+    from .drafts import DraftStore
+    from .job_store import MemoryJobStore, SqliteJobStore
+    from .ingredient_index import DEFAULT_PATH as ingredient_index_path, IngredientIndex
+    from .row_cache import RowCache
+    from .suggestion_cache import SuggestionCache, suggestion_key
+    from .translation_memory import TranslationMemory
+except ImportError:  # running as a top-level module (uvicorn main:app)
+    import accounting
+    import clients
+    import db_pool
+    import index_advisor
+    import metrics
+    import product_db
+    import scheduler
+    import suggestion_schema
+    import translation_memory as tm
+    from bulk_engine import BulkAutofillEngine, MicroBatcher, ProviderLimiter
+    from drafts import DraftStore
+    from job_store import MemoryJobStore, SqliteJobStore
+    from ingredient_index import DEFAULT_PATH as ingredient_index_path, IngredientIndex
+    from row_cache import RowCache
+    from suggestion_cache import SuggestionCache, suggestion_key
+    from translation_memory import TranslationMemory
+
 # Load environment
 load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 SERPAPI_API_KEY = os.getenv("SERPAPI_API_KEY")
 PRODUCTS_TABLE = os.getenv("PRODUCTS_TABLE", "Product")
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+# Bump when SCHEMA_CONTEXT or the suggestion prompts change so cached suggestions are not reused
+PROMPT_VERSION = "3"
 # Safely quote the table name for usage in SQL (handles capitalized names created by Prisma)
 _pq = PRODUCTS_TABLE.replace('"', '""')
 QUOTED_PRODUCTS_TABLE = f'"{_pq}"'
 
+# Bulk autofill concurrency: products worked on at once, plus per-provider limits
+# (max in-flight calls and requests per minute; 0 rpm means no rate limit)
+BULK_CONCURRENCY = int(os.getenv("BULK_CONCURRENCY", "8"))
+OPENAI_MAX_IN_FLIGHT = int(os.getenv("OPENAI_MAX_IN_FLIGHT", "8"))
+OPENAI_RPM = int(os.getenv("OPENAI_RPM", "0"))
+SERPAPI_MAX_IN_FLIGHT = int(os.getenv("SERPAPI_MAX_IN_FLIGHT", "4"))
+SERPAPI_RPM = int(os.getenv("SERPAPI_RPM", "0"))
+DB_MAX_CONCURRENT_WRITES = int(os.getenv("DB_MAX_CONCURRENT_WRITES", "4"))
+# asyncpg pool. Idle connections are recycled after DB_POOL_MAX_INACTIVE_LIFETIME
+# seconds and every connection after DB_POOL_MAX_QUERIES queries. Requests that wait
+# longer than DB_POOL_ACQUIRE_TIMEOUT for a connection get a 503 (0 = wait), and at
+# most DB_POOL_BACKGROUND_SLOTS connections serve whole-table scans and bulk-job
+# reads, so UI requests always find one. When the background statement timeout
+# differs from the pool-wide one, those slots are a separate pool of their own.
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "2"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+DB_POOL_MAX_INACTIVE_LIFETIME = float(os.getenv("DB_POOL_MAX_INACTIVE_LIFETIME", "300"))
+DB_POOL_MAX_QUERIES = int(os.getenv("DB_POOL_MAX_QUERIES", "50000"))
+DB_POOL_ACQUIRE_TIMEOUT = float(os.getenv("DB_POOL_ACQUIRE_TIMEOUT", "5"))
+DB_POOL_BACKGROUND_SLOTS = int(
+    os.getenv("DB_POOL_BACKGROUND_SLOTS", str(max(1, DB_POOL_MAX_SIZE // 2)))
+)
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))
+# Budget for the background view's whole-table scans (0 = none); the pool-wide
+# timeout above is meant for UI requests. Index builds always run without one.
+DB_BACKGROUND_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_BACKGROUND_STATEMENT_TIMEOUT_MS", "0"))
+# Prepared statements kept per connection (product_db.py reuses identical SQL text)
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "256"))
+# Product row cache: entries / seconds (0 entries disables it). With a channel name,
+# writes are NOTIFYed there and every worker LISTENs to evict changed rows.
+PRODUCT_CACHE_SIZE = int(os.getenv("PRODUCT_CACHE_SIZE", "1000"))
+PRODUCT_CACHE_TTL = float(os.getenv("PRODUCT_CACHE_TTL", "60"))
+PRODUCT_CACHE_CHANNEL = os.getenv("PRODUCT_CACHE_CHANNEL", "")
+# Products packed into one batched suggestion request during bulk runs (1 disables batching)
+LLM_BATCH_SIZE = int(os.getenv("LLM_BATCH_SIZE", "5"))
+
+# Bulk runs take products in priority order (see scheduler.py). PRIORITY_WEIGHTS is
+# a JSON object overriding scheduler.DEFAULT_WEIGHTS, e.g. {"featured": 5}.
+PRIORITY_WEIGHTS = json.loads(os.getenv("PRIORITY_WEIGHTS") or "{}")
+PRIORITY_PAGE_SIZE = int(os.getenv("PRIORITY_PAGE_SIZE", "100"))
+# Keyset batch size for whole-catalog runs (db_iter_missing_products)
+CATALOG_BATCH_SIZE = int(os.getenv("CATALOG_BATCH_SIZE", "500"))
+
+# Bulk commits are grouped into batched UPDATEs of up to this many rows
+DB_WRITE_BATCH_SIZE = int(os.getenv("DB_WRITE_BATCH_SIZE", "50"))
+DB_WRITE_FLUSH_INTERVAL = float(os.getenv("DB_WRITE_FLUSH_INTERVAL", "0.25"))
+
+# Durable job store (empty path keeps jobs in memory only). Finished jobs are
+# forgotten after JOB_TTL seconds; an unfinished job whose worker has not saved it
+# for JOB_LEASE_SECONDS is resumed by another (or a restarted) worker. Running
+# jobs renew their lease from the maintenance loop (at most every lease / 4).
+JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", "jobs.sqlite3")
+JOB_HISTORY_LIMIT = int(os.getenv("JOB_HISTORY_LIMIT", "200"))
+JOB_TTL = float(os.getenv("JOB_TTL", "3600"))
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "120"))
+JOB_MAINTENANCE_INTERVAL = float(os.getenv("JOB_MAINTENANCE_INTERVAL", "30"))
+
+# Persistent suggestion cache (empty path disables it)
+SUGGESTION_CACHE_PATH = os.getenv("SUGGESTION_CACHE_PATH", "suggestion_cache.sqlite3")
+SUGGESTION_CACHE_TTL = float(os.getenv("SUGGESTION_CACHE_TTL", str(7 * 24 * 3600)))
+SUGGESTION_CACHE_MAX_ENTRIES = int(os.getenv("SUGGESTION_CACHE_MAX_ENTRIES", "50000"))
+
+# Arabic translation memory (empty path disables it; threshold 0 disables fuzzy reuse)
+TRANSLATION_MEMORY_PATH = os.getenv("TRANSLATION_MEMORY_PATH", "translation_memory.sqlite3")
+TRANSLATION_FUZZY_THRESHOLD = float(os.getenv("TRANSLATION_FUZZY_THRESHOLD", "0.9"))
+# Unseen segments sent per translation request
+TRANSLATION_BATCH_SEGMENTS = int(os.getenv("TRANSLATION_BATCH_SEGMENTS", "100"))
+
+# Staged bulk suggestions awaiting review (see drafts.py; empty path disables staging)
+DRAFTS_PATH = os.getenv("DRAFTS_PATH", "drafts.sqlite3")
+
+# INCI ingredient dictionary (JSON, see ingredient_index.py; empty disables it)
+INGREDIENT_INDEX_PATH = os.getenv("INGREDIENT_INDEX_PATH", ingredient_index_path)
+
 # Known top-level product columns we can edit directly (from your Prisma schema)
 KNOWN_COLUMNS = {
     "title",
@@ -66,6 +181,23 @@ KNOWN_COLUMNS = {
     "isTodayDeal",
 }
 
+# Default essential fields for bulk processing
+BULK_DEFAULT_FIELDS = [
+    "descriptionEn",
+    "descriptionAr",
+    "activeIngredients",
+    "skinType",
+    "concerns",
+    "features",
+    "ingredients",
+    "howToUse",
+    "metaTitle",
+    "metaDescription",
+]
+# Key sets of the hot missing-field queries (bulk autofill defaults, the admin
+# index's all-columns view); /debug/index-advisor proposes one index per set
+INDEXED_KEY_SETS = [BULK_DEFAULT_FIELDS, sorted(KNOWN_COLUMNS)]
+
 
 def _quote_ident(name: str) -> str:
     """Return a safely quoted SQL identifier for Postgres."""
@@ -75,10 +207,90 @@ def _quote_ident(name: str) -> str:
 app = FastAPI(title="Product Metadata Helper")
 templates = Jinja2Templates(directory="templates")
 
-pool: Optional[asyncpg.pool.Pool] = None
+pool: Optional[db_pool.TimedPool] = None
 prisma: Optional["Prisma"] = None
 
 
+# Prometheus metrics served by GET /metrics (see metrics.py). State kept elsewhere
+# (pool, jobs, limiters, accounting totals) is read at scrape time.
+def _pool_connections():
+    if pool is None:
+        return []
+    size, idle = pool.get_size(), pool.get_idle_size()
+    return [
+        ({"state": "acquired"}, size - idle),
+        ({"state": "idle"}, idle),
+        ({"state": "max"}, pool.get_max_size()),
+    ]
+
+
+def _usage_samples(field: str):
+    for key, entry in list(accounting.totals.items()):
+        provider, operation = key.split(":", 1)
+        yield {"provider": provider, "operation": operation}, entry[field]
+
+
+HTTP_REQUEST_SECONDS = metrics.Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template"
+)
+DB_QUERY_SECONDS = metrics.Histogram(
+    "db_query_duration_seconds", "Duration of product queries by helper"
+)
+DB_POOL_WAIT_SECONDS = metrics.Histogram(
+    "db_pool_acquire_wait_seconds",
+    "Time spent waiting for a pooled database connection",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+LLM_CALL_SECONDS = metrics.Histogram(
+    "llm_call_duration_seconds",
+    "Duration of outbound OpenAI and SerpAPI calls (including limiter waits)",
+    buckets=(0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0),
+)
+metrics.Gauge(
+    "db_pool_connections", "asyncpg pool connections by state", collect=_pool_connections
+)
+metrics.Counter(
+    "db_pool_acquire_timeouts_total",
+    "Requests refused because no connection became free in time",
+    collect=lambda: [({}, getattr(pool, "timeouts", 0))] if pool is not None else [],
+)
+metrics.Gauge(
+    "bulk_jobs_in_flight",
+    "Bulk autofill jobs running on this worker",
+    collect=lambda: [
+        ({}, sum(1 for j in list(progress_tracker.jobs.values()) if not j.get("completed")))
+    ],
+)
+metrics.Gauge(
+    "provider_calls_in_flight",
+    "Outbound calls holding a provider limiter slot",
+    collect=lambda: [({"provider": n}, l.in_flight) for n, l in provider_limits.items()],
+)
+metrics.Counter(
+    "provider_throttled_total",
+    "429 responses retried by the provider limiters",
+    collect=lambda: [({"provider": n}, l.throttled) for n, l in provider_limits.items()],
+)
+metrics.Counter(
+    "llm_prompt_tokens_total", "Prompt tokens sent", collect=lambda: _usage_samples("prompt_tokens")
+)
+metrics.Counter(
+    "llm_completion_tokens_total",
+    "Completion tokens received",
+    collect=lambda: _usage_samples("completion_tokens"),
+)
+metrics.Counter(
+    "llm_cost_usd_total", "Estimated provider cost", collect=lambda: _usage_samples("cost_usd")
+)
+app.add_middleware(metrics.RouteLatencyMiddleware, histogram=HTTP_REQUEST_SECONDS)
+# Product column -> information_schema data_type, loaded at startup. Lets the
+# missing-field predicates use index-friendly forms (see index_advisor).
+COLUMN_TYPES: Dict[str, str] = {}
+# Product column -> SQL type as written in DDL (format_type), used for casts in
+# batched writes.
+COLUMN_SQL_TYPES: Dict[str, str] = {}
+
+
 class ProductOut(BaseModel):
     id: str
     title: Optional[str]
@@ -89,12 +301,180 @@ class MetadataIn(BaseModel):
     metadata: Dict[str, Any]
 
 
+class DraftSelection(BaseModel):
+    """Drafts to approve or reject; `all` must be set to act without a filter."""
+
+    product_ids: Optional[List[str]] = None
+    job_id: Optional[str] = None
+    fields: Optional[List[str]] = None
+    all: bool = False
+
+
 # Progress Tracking System
 class ProgressState:
-    def __init__(self):
-        self.jobs: Dict[str, Dict] = {}
+    """
+    Job progress shared by the bulk endpoints, /progress and the SSE stream.
+
+    Jobs live in memory for the worker running them and are written through to a
+    JobStore (throttled to one save per `save_interval` seconds unless the status
+    changes), so other workers can read them and unfinished jobs can be resumed
+    after a restart. Item history is capped at `history_limit` entries.
+
+    Store access never blocks the event loop: changes queue a snapshot that a
+    single flusher task writes from a worker thread (the latest snapshot per job
+    wins), and reads of jobs run elsewhere go through `load_job`. Without a running
+    event loop (scripts) snapshots are written inline.
+
+    Leases are kept alive by `renew_leases` (called from the maintenance loop), not
+    by progress saves. If a save or renewal finds that another worker has claimed
+    the job, the local copy is dropped and the id is added to `lost`, which makes
+    the engine running it stop.
+
+    Every change bumps the job's version and wakes `wait_for_change` callers, which
+    is what drives the SSE stream; `render_cached` lets all watchers of a job share
+    one serialization per version.
+
+    Each job also keeps a "usage" dict of provider calls (tokens, latency, retries,
+    errors, cache hits, estimated cost) filled by `accounting.record` while the job
+    runs inside `usage_scope`.
+    """
 
-    def create_job(self, job_id: str, total_items: int, description: str):
+    def __init__(self, store=None, history_limit: int = 200, save_interval: float = 1.0):
+        self.jobs: Dict[str, Dict] = {}
+        self.store = store or MemoryJobStore()
+        self.history_limit = history_limit
+        self.save_interval = save_interval
+        # identifies this worker as the owner of the jobs it runs
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._saved_at: Dict[str, float] = {}
+        self._versions: Dict[str, int] = {}
+        self._changed: Dict[str, asyncio.Event] = {}
+        self._rendered: Dict[str, tuple] = {}
+        self.lost: Set[str] = set()
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._flusher: Optional[asyncio.Task] = None
+        self._polls: Dict[str, tuple] = {}
+
+    def _notify(self, job_id: str):
+        self._versions[job_id] = self._versions.get(job_id, 0) + 1
+        event = self._changed.pop(job_id, None)
+        if event is not None:
+            event.set()
+
+    def version(self, job_id: str) -> int:
+        return self._versions.get(job_id, 0)
+
+    async def wait_for_change(self, job_id: str, seen_version: int, timeout: float) -> int:
+        """Wait until the job's version differs from seen_version (or timeout)."""
+        if self.version(job_id) == seen_version:
+            event = self._changed.get(job_id)
+            if event is None:
+                event = self._changed[job_id] = asyncio.Event()
+            try:
+                await asyncio.wait_for(event.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.version(job_id)
+
+    def render_cached(self, job_id: str, render):
+        """Return render(job) for the current version, computing it once per version."""
+        version = self.version(job_id)
+        cached = self._rendered.get(job_id)
+        if cached and cached[0] == version:
+            return cached[1]
+        text = render(self.jobs[job_id])
+        self._rendered[job_id] = (version, text)
+        return text
+
+    def items_since(self, job_id: str, version: int) -> List[Dict]:
+        job = self.jobs.get(job_id) or {}
+        return [i for i in job.get("processed_items", []) if i.get("seq", 0) > version]
+
+    @staticmethod
+    def _snapshot(job: Dict[str, Any]) -> Dict[str, Any]:
+        # copies of what keeps changing on the loop while the flusher encodes
+        snapshot = {k: list(v) if isinstance(v, list) else v for k, v in job.items()}
+        snapshot["usage"] = copy.deepcopy(job.get("usage", {}))
+        return snapshot
+
+    def _persist(self, job_id: str, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self._saved_at.get(job_id, 0.0) < self.save_interval:
+            return
+        self._saved_at[job_id] = now
+        self._pending[job_id] = self._snapshot(self.jobs[job_id])
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._apply_saves(self._write(self._take_pending()))
+            return
+        if self._flusher is None or self._flusher.done():
+            self._flusher = loop.create_task(self._flush_pending())
+
+    def _take_pending(self) -> Dict[str, Dict[str, Any]]:
+        pending, self._pending = self._pending, {}
+        return pending
+
+    def _write(self, snapshots: Dict[str, Dict[str, Any]]) -> List[str]:
+        """Save snapshots (blocking); returns the ids another worker owns now."""
+        lost = []
+        for job_id, job in snapshots.items():
+            try:
+                if not self.store.save(job, self.owner):
+                    lost.append(job_id)
+            except Exception as e:
+                print(f"⚠️ Failed to persist job {job_id}: {e}")
+        return lost
+
+    def _apply_saves(self, lost: List[str]):
+        for job_id in lost:
+            if job_id in self.jobs:
+                self._lose(job_id)
+
+    async def _flush_pending(self):
+        while self._pending:
+            self._apply_saves(await asyncio.to_thread(self._write, self._take_pending()))
+
+    async def flush(self):
+        """Wait until every queued snapshot has been written."""
+        while self._flusher is not None and not self._flusher.done():
+            await self._flusher
+        if self._pending:
+            await self._flush_pending()
+
+    def _lose(self, job_id: str):
+        print(f"⚠️ Job {job_id} was claimed by another worker; stopping it here")
+        self.lost.add(job_id)
+        self._pending.pop(job_id, None)
+        self._forget(job_id)
+
+    def _renew(self, job_ids: List[str]) -> List[str]:
+        lost = []
+        for job_id in job_ids:
+            try:
+                if not self.store.renew(job_id, self.owner):
+                    lost.append(job_id)
+            except Exception as e:
+                print(f"⚠️ Failed to renew lease of job {job_id}: {e}")
+        return lost
+
+    async def renew_leases(self) -> int:
+        """Renew the store lease of every unfinished job run here; returns jobs lost."""
+        running = [jid for jid, job in self.jobs.items() if not job.get("completed")]
+        lost = [
+            jid for jid in await asyncio.to_thread(self._renew, running) if jid in self.jobs
+        ]
+        for job_id in lost:
+            self._lose(job_id)
+        return len(lost)
+
+    def create_job(
+        self,
+        job_id: str,
+        total_items: int,
+        description: str,
+        resume: Optional[Dict[str, Any]] = None,
+    ):
         self.jobs[job_id] = {
             "id": job_id,
             "status": "starting",
@@ -109,9 +489,29 @@ class ProgressState:
             "error_count": 0,
             "completed": False,
             "cancelled": False,
+            # parameters needed to restart the job, and how far it got (see engine)
+            "resume": resume,
+            "checkpoint": None,
+            "checkpoint_done": 0,
+            "usage": {},
         }
+        self._persist(job_id, force=True)
+        self._notify(job_id)
         return self.jobs[job_id]
 
+    def adopt(self, job: Dict[str, Any]):
+        """Take over a job loaded from the store (after a successful claim)."""
+        job.setdefault("processed_items", [])
+        job.setdefault("errors", [])
+        job.setdefault("usage", {})
+        self.jobs[job["id"]] = job
+        self._persist(job["id"], force=True)
+        self._notify(job["id"])
+
+    def usage_scope(self, job_id: str):
+        """Context manager attributing provider calls made inside it to the job."""
+        return accounting.scope(self.jobs[job_id].setdefault("usage", {}))
+
     def update_job(self, job_id: str, **kwargs):
         if job_id in self.jobs:
             # Map field names for consistency
@@ -119,28 +519,123 @@ class ProgressState:
                 kwargs["current"] = kwargs.pop("current_item")
             if "status_message" in kwargs:
                 kwargs["current_task"] = kwargs.pop("status_message")
+            if kwargs.get("completed") and not self.jobs[job_id].get("completed"):
+                kwargs.setdefault("finished_at", time.time())
 
             self.jobs[job_id].update(kwargs)
+            self._persist(
+                job_id, force=bool({"status", "completed", "cancelled"} & kwargs.keys())
+            )
+            self._notify(job_id)
+
+    def _trim(self, items: List):
+        if len(items) > self.history_limit:
+            del items[: len(items) - self.history_limit]
 
     def add_processed_item(self, job_id: str, item_info: Dict):
         if job_id in self.jobs:
-            self.jobs[job_id]["processed_items"].append(item_info)
+            job = self.jobs[job_id]
+            self._notify(job_id)
+            # seq = job version that introduced the item, for Last-Event-ID catch-up
+            item_info = {**item_info, "seq": self.version(job_id)}
+            job["processed_items"].append(item_info)
+            self._trim(job["processed_items"])
             if item_info.get("status") == "success":
-                self.jobs[job_id]["success_count"] += 1
+                job["success_count"] += 1
             elif item_info.get("status") == "error":
-                self.jobs[job_id]["error_count"] += 1
-                self.jobs[job_id]["errors"].append(item_info)
+                job["error_count"] += 1
+                job["errors"].append(item_info)
+                self._trim(job["errors"])
+            self._persist(job_id)
 
     def get_job(self, job_id: str):
+        """A job run by this worker (no store access, see load_job)."""
         return self.jobs.get(job_id)
 
-    def delete_job(self, job_id: str):
-        if job_id in self.jobs:
-            del self.jobs[job_id]
+    async def load_job(self, job_id: str):
+        """A job run here, or else as last saved in the store (e.g. by another worker)."""
+        job = self.jobs.get(job_id)
+        if job is None:
+            # possibly running in another worker, or from before a restart
+            try:
+                job = await asyncio.to_thread(self.store.load, job_id)
+            except Exception:
+                job = None
+        return job
 
+    async def poll_job(self, job_id: str, max_age: float = 1.0):
+        """
+        load_job for watchers of a job run elsewhere: callers within `max_age` of
+        each other share one store read, so N subscribers cost one poll per job.
+        """
+        now = time.monotonic()
+        entry = self._polls.get(job_id)
+        if entry is None or now - entry[0] >= max_age:
+            for stale in [k for k, e in self._polls.items() if now - e[0] >= max_age]:
+                del self._polls[stale]
+            read = asyncio.ensure_future(self.load_job(job_id))
+            entry = self._polls[job_id] = (now, read)
+        # a disconnecting subscriber must not cancel the read the others wait on
+        return await asyncio.shield(entry[1])
+
+    def _forget(self, job_id: str):
+        self.jobs.pop(job_id, None)
+        self._saved_at.pop(job_id, None)
+        self._rendered.pop(job_id, None)
+        self._notify(job_id)  # wake watchers so they notice the job is gone
+        self._versions.pop(job_id, None)
+
+    async def delete_job(self, job_id: str):
+        self._forget(job_id)
+        self._pending.pop(job_id, None)
+        try:
+            await asyncio.to_thread(self.store.delete, job_id)
+        except Exception:
+            pass
 
-# Global progress tracker
-progress_tracker = ProgressState()
+    async def sweep(self, ttl_seconds: float) -> int:
+        """Forget finished jobs older than ttl_seconds, here and in the store."""
+        cutoff = time.time() - ttl_seconds
+        expired = [
+            job_id
+            for job_id, job in self.jobs.items()
+            if job.get("completed") and job.get("finished_at", 0) < cutoff
+        ]
+        for job_id in expired:
+            self._forget(job_id)
+        try:
+            expired += await asyncio.to_thread(self.store.sweep, ttl_seconds)
+        except Exception as e:
+            print(f"⚠️ Job store sweep failed: {e}")
+        return len(set(expired))
+
+
+# Global progress tracker (switched to the durable store on startup)
+progress_tracker = ProgressState(history_limit=JOB_HISTORY_LIMIT)
+_job_maintenance_task: Optional[asyncio.Task] = None
+
+# Opened on startup when SUGGESTION_CACHE_PATH / TRANSLATION_MEMORY_PATH /
+# DRAFTS_PATH are set
+suggestion_cache: Optional[SuggestionCache] = None
+translation_memory: Optional[TranslationMemory] = None
+draft_store: Optional[DraftStore] = None
+# Loaded on startup from INGREDIENT_INDEX_PATH
+ingredient_index: Optional[IngredientIndex] = None
+# Product rows read by the UI and autofill (see row_cache.py)
+product_cache = RowCache(PRODUCT_CACHE_SIZE, PRODUCT_CACHE_TTL)
+_product_listener_task: Optional[asyncio.Task] = None
+
+# Shared admission control for outbound calls; every autofill (single or bulk) goes
+# through these so concurrent bulk jobs cannot exceed the provider quotas together.
+provider_limits: Dict[str, ProviderLimiter] = {
+    "openai": ProviderLimiter(
+        "openai", OPENAI_MAX_IN_FLIGHT, OPENAI_RPM, on_throttle=accounting.record_retry
+    ),
+    "serpapi": ProviderLimiter(
+        "serpapi", SERPAPI_MAX_IN_FLIGHT, SERPAPI_RPM, on_throttle=accounting.record_retry
+    ),
+    "db": ProviderLimiter("db", DB_MAX_CONCURRENT_WRITES),
+}
 
 
 @app.on_event("startup")
@@ -150,6 +645,31 @@ async def startup():
     if not DATABASE_URL:
         raise RuntimeError("DATABASE_URL not set in environment")
 
+    # One pooled AsyncOpenAI client and one keep-alive web client for the whole process
+    clients.init_openai_client(OPENAI_API_KEY)
+    clients.get_http_client()
+
+    global _job_maintenance_task
+    if JOB_STORE_PATH and isinstance(progress_tracker.store, MemoryJobStore):
+        progress_tracker.store = SqliteJobStore(JOB_STORE_PATH)
+
+    global suggestion_cache
+    if SUGGESTION_CACHE_PATH and suggestion_cache is None:
+        suggestion_cache = SuggestionCache(
+            SUGGESTION_CACHE_PATH, SUGGESTION_CACHE_TTL, SUGGESTION_CACHE_MAX_ENTRIES
+        )
+    global translation_memory
+    if TRANSLATION_MEMORY_PATH and translation_memory is None:
+        translation_memory = TranslationMemory(
+            TRANSLATION_MEMORY_PATH, fuzzy_threshold=TRANSLATION_FUZZY_THRESHOLD
+        )
+    global draft_store
+    if DRAFTS_PATH and draft_store is None:
+        draft_store = DraftStore(DRAFTS_PATH)
+    global ingredient_index
+    if INGREDIENT_INDEX_PATH and ingredient_index is None:
+        ingredient_index = IngredientIndex.load(INGREDIENT_INDEX_PATH)
+
     print(f"🔗 Connecting to database...")
     print(f"DATABASE_URL: {DATABASE_URL[:50]}...")
 
@@ -170,12 +690,42 @@ async def startup():
         (parts.scheme, parts.netloc, parts.path, new_query, parts.fragment)
     )
 
-    async def _init_conn(conn):
-        if schema:
-            await conn.execute(f"SET search_path TO {schema}")
-
-    # Start asyncpg pool as a fallback
-    pool = await asyncpg.create_pool(dsn=cleaned, init=_init_conn)
+    # search_path and statement_timeout travel in the startup packet (no extra
+    # round trip per connection); see db_pool.py
+    pool_settings = dict(
+        search_path=schema,
+        max_inactive_connection_lifetime=DB_POOL_MAX_INACTIVE_LIFETIME,
+        max_queries=DB_POOL_MAX_QUERIES,
+        statement_cache_size=DB_STATEMENT_CACHE_SIZE,
+    )
+    background_pool = None
+    if DB_POOL_BACKGROUND_SLOTS and (
+        DB_BACKGROUND_STATEMENT_TIMEOUT_MS != DB_STATEMENT_TIMEOUT_MS
+    ):
+        # its own connections, so scans need no SET/RESET statement_timeout
+        background_pool = await db_pool.create_pool(
+            cleaned,
+            min_size=0,
+            max_size=DB_POOL_BACKGROUND_SLOTS,
+            statement_timeout_ms=DB_BACKGROUND_STATEMENT_TIMEOUT_MS,
+            application_name="product-metadata-helper-background",
+            **pool_settings,
+        )
+    pool = db_pool.TimedPool(
+        await db_pool.create_pool(
+            cleaned,
+            min_size=DB_POOL_MIN_SIZE,
+            max_size=DB_POOL_MAX_SIZE,
+            statement_timeout_ms=DB_STATEMENT_TIMEOUT_MS,
+            **pool_settings,
+        ),
+        acquire_timeout=DB_POOL_ACQUIRE_TIMEOUT,
+        background_slots=DB_POOL_BACKGROUND_SLOTS,
+        on_wait=lambda seconds: DB_POOL_WAIT_SECONDS.observe(seconds),
+        background_statement_timeout_ms=DB_BACKGROUND_STATEMENT_TIMEOUT_MS,
+        statement_timeout_ms=DB_STATEMENT_TIMEOUT_MS,
+        background_pool=background_pool,
+    )
 
     # Ensure the PRODUCTS_TABLE value maps to an actual table in the database.
     # Some ORMs (Prisma) create PascalCase table names like `Product` while an
@@ -204,6 +754,16 @@ async def startup():
                     _pq = PRODUCTS_TABLE.replace('"', '""')
                     QUOTED_PRODUCTS_TABLE = f'"{_pq}"'
 
+            global COLUMN_TYPES, COLUMN_SQL_TYPES
+            COLUMN_TYPES = await index_advisor.column_types(conn, PRODUCTS_TABLE)
+            sql_types = await conn.fetch(
+                "SELECT attname, format_type(atttypid, atttypmod) AS sql_type "
+                "FROM pg_attribute WHERE attrelid = $1::regclass "
+                "AND attnum > 0 AND NOT attisdropped",
+                QUOTED_PRODUCTS_TABLE,
+            )
+            COLUMN_SQL_TYPES = {r["attname"]: r["sql_type"] for r in sql_types}
+
             print(f"📊 Using table: {QUOTED_PRODUCTS_TABLE}")
             print(f"🔍 Schema: {schema or 'default'}")
 
@@ -226,6 +786,21 @@ async def startup():
             # if Prisma fails to connect, continue with asyncpg only
             prisma = None
 
+    # Sweeps finished jobs and resumes bulk jobs left unfinished by a dead worker
+    _job_maintenance_task = asyncio.create_task(_job_maintenance_loop())
+
+    global _product_listener_task
+    if PRODUCT_CACHE_CHANNEL and product_cache.enabled:
+        _product_listener_task = asyncio.create_task(
+            db_pool.listen(
+                cleaned,
+                PRODUCT_CACHE_CHANNEL,
+                on_notify=lambda product_id: product_cache.invalidate([product_id]),
+                on_lost=product_cache.clear,
+                search_path=schema,
+            )
+        )
+
     print(
         f"🚀 Startup complete. Using {'Prisma' if prisma else 'asyncpg'} for database access."
     )
@@ -235,6 +810,18 @@ async def startup():
 async def shutdown():
     global pool
     global prisma
+    if _job_maintenance_task:
+        _job_maintenance_task.cancel()
+    await progress_tracker.flush()
+    if _product_listener_task:
+        _product_listener_task.cancel()
+    await clients.close_clients()
+    if suggestion_cache:
+        suggestion_cache.close()
+    if translation_memory:
+        translation_memory.close()
+    if draft_store:
+        draft_store.close()
     if pool:
         await pool.close()
     if prisma:
@@ -244,118 +831,266 @@ async def shutdown():
             pass
 
 
-# --- Database helper wrappers: use Prisma when available, otherwise asyncpg ---
+# --- Database helper wrappers: one data layer (product_db.py), Prisma optional ---
 
-
-def _to_dict_maybe(obj: Any) -> Dict[str, Any]:
-    if obj is None:
-        return {}
-    if hasattr(obj, "dict"):
-        return obj.dict()
-    if isinstance(obj, dict):
-        return obj
-    try:
-        return dict(obj)
-    except Exception:
-        return {k: getattr(obj, k) for k in dir(obj) if not k.startswith("_")}
+# Columns read for a single product (those that exist in the table); the product
+# page, autofill and the edit form need nothing else.
+PRODUCT_COLUMNS = (
+    "id",
+    "name",
+    "metadata",
+    "brandId",
+    "categoryId",
+    "createdAt",
+    "updatedAt",
+    *sorted(KNOWN_COLUMNS),
+)
+_product_sql: Optional[product_db.ProductSQL] = None
 
 
-async def db_find_missing_products(key_list: List[str], limit: int, offset: int = 0):
-    """Return list of {id,title,fields} for products missing any of key_list.
-    Tries Prisma first, falls back to asyncpg raw SQL."""
-    # Prisma path
-    if prisma:
-        select = {k: True for k in key_list}
-        select.update({"id": True, "title": True})
-        or_clauses = []
-        for k in key_list:
-            or_clauses.append({k: None})
-            or_clauses.append({k: ""})
-        where = {"OR": or_clauses} if or_clauses else {}
-        rows = await prisma.product.find_many(
-            where=where, select=select, take=limit, skip=offset
+def _products(background: bool = False):
+    """
+    The data-access adapter: Prisma when connected, otherwise asyncpg. `background`
+    work (whole-table scans, bulk-job pages) uses the pool's limited background view.
+    """
+    global _product_sql
+    if _product_sql is None or not _product_sql.matches(
+        QUOTED_PRODUCTS_TABLE, COLUMN_TYPES, COLUMN_SQL_TYPES, PRIORITY_WEIGHTS
+    ):
+        _product_sql = product_db.ProductSQL(
+            QUOTED_PRODUCTS_TABLE,
+            COLUMN_TYPES,
+            COLUMN_SQL_TYPES,
+            PRODUCT_COLUMNS,
+            PRIORITY_WEIGHTS,
         )
-        out = []
-        for r in rows:
-            rd = _to_dict_maybe(r)
-            fields = {k: rd.get(k) for k in key_list}
-            out.append({"id": rd.get("id"), "title": rd.get("title"), "fields": fields})
-        return out
-
-    # asyncpg fallback
-    async with pool.acquire() as conn:
-        conds = [f"coalesce({_quote_ident(k)}::text,'') = ''" for k in key_list]
-        where = " OR ".join(conds)
-        cols = ", ".join(
-            [_quote_ident("id"), _quote_ident("title")]
-            + [_quote_ident(k) for k in key_list]
+    db = pool.background() if background and hasattr(pool, "background") else pool
+    pg = product_db.PgProducts(db, _product_sql)
+    return product_db.PrismaProducts(prisma, pg) if prisma else pg
+
+
+def _missing_page_sql(
+    key_list: List[str],
+    limit: int,
+    offset: int = 0,
+    after_id: Optional[str] = None,
+    before_id: Optional[str] = None,
+):
+    """SQL and args selecting one page of products missing any of key_list.
+    With before_id the rows come back in descending id order."""
+    return _products().page_sql(key_list, limit, offset, after_id, before_id)
+
+
+@metrics.timed(DB_QUERY_SECONDS, query="db_find_missing_products")
+async def db_find_missing_products(
+    key_list: List[str],
+    limit: int,
+    offset: int = 0,
+    after_id: Optional[str] = None,
+    before_id: Optional[str] = None,
+    background: bool = False,
+):
+    """Return list of {id,title,fields} for products missing any of key_list,
+    ordered by id. Pass after_id/before_id for keyset pagination (offset is kept
+    for callers that still page by position). Bulk-job pages pass `background`."""
+    return await _products(background).find_missing(
+        key_list, limit, offset, after_id, before_id
+    )
+
+
+async def db_iter_missing_products(
+    key_list: List[str],
+    batch_size: Optional[int] = None,
+    after_id: Optional[str] = None,
+):
+    """
+    Yield every product missing any of key_list in id order, one keyset batch at a
+    time, starting after `after_id`. The next batch is fetched while the current one
+    is being consumed, and only two batches are held at once.
+
+    Keyset batches are used rather than a server-side cursor so a long run does not
+    hold a pooled connection and an open transaction for its whole duration.
+    """
+    batch_size = batch_size or CATALOG_BATCH_SIZE
+    pending = asyncio.ensure_future(
+        db_find_missing_products(
+            key_list, batch_size, after_id=after_id, background=True
         )
-        sql = f"SELECT {cols} FROM {QUOTED_PRODUCTS_TABLE} WHERE {where} LIMIT $1 OFFSET $2"
-        rows = await conn.fetch(sql, limit, offset)
-        products = []
-        for r in rows:
-            fields = {k: r.get(k) for k in key_list}
-            products.append({"id": r["id"], "title": r.get("title"), "fields": fields})
-        return products
+    )
+    try:
+        while pending is not None:
+            batch = await pending
+            pending = None
+            if len(batch) == batch_size:
+                pending = asyncio.ensure_future(
+                    db_find_missing_products(
+                        key_list, batch_size, after_id=batch[-1]["id"], background=True
+                    )
+                )
+            for product in batch:
+                yield product
+    finally:
+        if pending is not None:
+            pending.cancel()
 
 
-async def db_count_missing_products(key_list: List[str]) -> int:
-    """Count products missing any of key_list fields."""
-    # Prisma path
-    if prisma:
-        or_clauses = []
-        for k in key_list:
-            or_clauses.append({k: None})
-            or_clauses.append({k: ""})
-        where = {"OR": or_clauses} if or_clauses else {}
-        count = await prisma.product.count(where=where)
-        return count
-
-    # asyncpg fallback
-    async with pool.acquire() as conn:
-        conds = [f"coalesce({_quote_ident(k)}::text,'') = ''" for k in key_list]
-        where = " OR ".join(conds)
-        sql = f"SELECT COUNT(*) FROM {QUOTED_PRODUCTS_TABLE} WHERE {where}"
-        result = await conn.fetchval(sql)
-        return result or 0
+async def db_find_priority_products(
+    key_list: List[str], limit: int, after: Optional[list] = None
+) -> List[Dict[str, Any]]:
+    """Like db_find_missing_products but ordered by scheduler priority (highest
+    first); each row carries its "priority". Always uses the asyncpg pool."""
+    return await _products(background=True).find_priority(key_list, limit, after)
+
+
+def _priority_feeder(
+    key_list: List[str],
+    limit: Optional[int],
+    after: Optional[list] = None,
+    seen: Optional[List[str]] = None,
+) -> "scheduler.PriorityFeeder":
+    async def fetch_page(cursor, size):
+        return await db_find_priority_products(key_list, size, after=cursor)
+
+    return scheduler.PriorityFeeder(
+        fetch_page, page_size=PRIORITY_PAGE_SIZE, limit=limit, after=after, seen=seen
+    )
+
+
+# Short-lived cache of missing-product counts per key set, so paging through the
+# admin index does not rescan the table on every page view.
+MISSING_COUNT_TTL = float(os.getenv("MISSING_COUNT_TTL", "30"))
+_missing_count_cache: Dict[tuple, tuple] = {}
+
+
+def _cached_missing_count(key_list: List[str]) -> Optional[int]:
+    entry = _missing_count_cache.get(tuple(sorted(key_list)))
+    if entry and time.time() - entry[1] < MISSING_COUNT_TTL:
+        return entry[0]
+    return None
+
+
+def _store_missing_count(key_list: List[str], count: int):
+    _missing_count_cache[tuple(sorted(key_list))] = (count, time.time())
+
+
+@metrics.timed(DB_QUERY_SECONDS, query="db_count_missing_products")
+async def db_count_missing_products(key_list: List[str], cached: bool = True) -> int:
+    """Count products missing any of key_list fields (served from a short TTL cache)."""
+    if cached:
+        count = _cached_missing_count(key_list)
+        if count is not None:
+            return count
+    # a whole-table count: background view, so DB_STATEMENT_TIMEOUT_MS does not apply
+    count = await _products(background=True).count_missing(key_list)
+    _store_missing_count(key_list, count)
+    return count
+
+
+async def db_find_missing_page(
+    key_list: List[str],
+    limit: int,
+    after_id: Optional[str] = None,
+    before_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    One keyset page of products missing any of key_list, plus the total count.
+
+    Returns {"products", "total", "next_cursor", "prev_cursor"}. The count comes from
+    the TTL cache when fresh; otherwise the asyncpg adapter computes page and count
+    in a single round trip. Every page costs the same regardless of depth.
+    """
+    total = _cached_missing_count(key_list)
+    products, counted = await _products().find_missing_page(
+        key_list,
+        limit + 1,
+        after_id=after_id,
+        before_id=before_id,
+        with_count=total is None,
+    )
+    if total is None:
+        total = counted
+        _store_missing_count(key_list, total)
+
+    has_more = len(products) > limit
+    if has_more:
+        # the extra row lies beyond the page in the direction of travel
+        products = products[1:] if before_id else products[:limit]
+    next_cursor = prev_cursor = None
+    if products:
+        if has_more or before_id:
+            next_cursor = products[-1]["id"]
+        if after_id or (before_id and has_more):
+            prev_cursor = products[0]["id"]
+    return {
+        "products": products,
+        "total": total,
+        "next_cursor": next_cursor,
+        "prev_cursor": prev_cursor,
+    }
 
 
 async def db_fetch_product(product_id: str):
-    """Return product dict or None."""
-    if prisma:
-        try:
-            row = await prisma.product.find_unique(where={"id": product_id})
-            return _to_dict_maybe(row)
-        except Exception:
+    """Return product dict (PRODUCT_COLUMNS) or None, from the row cache when fresh."""
+    product_id = str(product_id)
+    row = product_cache.get(product_id)
+    if row is not None:
+        return row
+    token = product_cache.begin(product_id)
+    try:
+        row = await _products().fetch(product_id)
+    except Exception:
+        if prisma:
             return None
-    async with pool.acquire() as conn:
-        row = await conn.fetchrow(
-            f"SELECT * FROM {QUOTED_PRODUCTS_TABLE} WHERE id = $1", product_id
-        )
-        return _to_dict_maybe(row) if row else None
+        raise
+    if row:
+        product_cache.put(product_id, row, token)
+    return row
+
+
+async def _products_changed(product_ids: List[str]):
+    """Evict written products here and, with PRODUCT_CACHE_CHANNEL, on other workers."""
+    product_cache.invalidate(product_ids)
+    if PRODUCT_CACHE_CHANNEL and product_ids and pool is not None:
+        try:
+            await product_db.notify_changed(pool, PRODUCT_CACHE_CHANNEL, product_ids)
+        except Exception as e:
+            print(f"⚠️ Product change notification failed: {e}")
 
 
 async def db_update_product(product_id: str, updates: Dict[str, Any]):
     """Apply updates and return the updated row (dict) or None."""
-    if prisma:
-        try:
-            row = await prisma.product.update(where={"id": product_id}, data=updates)
-            return _to_dict_maybe(row)
-        except Exception:
+    product_id = str(product_id)
+    try:
+        row = await _products().update(product_id, updates)
+    except Exception:
+        if prisma:
             return None
-    # asyncpg path
-    async with pool.acquire() as conn:
-        set_parts = []
-        args = []
-        i = 1
-        for col, val in updates.items():
-            set_parts.append(f"{_quote_ident(col)} = ${i}")
-            args.append(val)
-            i += 1
-        args.append(product_id)
-        sql = f"UPDATE {QUOTED_PRODUCTS_TABLE} SET {', '.join(set_parts)} WHERE {_quote_ident('id')} = ${i} RETURNING *"
-        row = await conn.fetchrow(sql, *args)
-        return dict(row) if row else None
+        raise
+    finally:
+        await _products_changed([product_id])
+    if row:
+        product_cache.put(product_id, row)
+    return row
+
+
+async def db_bulk_update_products(
+    rows: List[tuple],
+    expected: Optional[List[Dict[str, Any]]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Apply many (product_id, updates) pairs in one batched statement (see
+    PgProducts.bulk_update). Returns one {"status": "updated"|"not_found"|"error"}
+    per input row; with `expected` values per row, rows changed since are skipped
+    as "conflict".
+    """
+    if not rows:
+        return []
+    try:
+        if expected is not None:
+            return await _products().bulk_update(rows, expected)
+        return await _products().bulk_update(rows)
+    finally:
+        await _products_changed([str(product_id) for product_id, _ in rows])
 
 
 def _keys_list(keys_csv: Optional[str]) -> List[str]:
@@ -364,15 +1099,74 @@ def _keys_list(keys_csv: Optional[str]) -> List[str]:
     return [k.strip() for k in keys_csv.split(",") if k.strip()]
 
 
+@app.exception_handler(db_pool.PoolExhausted)
+async def pool_exhausted(request: Request, exc: db_pool.PoolExhausted):
+    return JSONResponse(
+        status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"}
+    )
+
+
 @app.get("/health")
 async def health():
     return {"status": "ok"}
 
 
+@app.get("/cache/stats")
+async def cache_stats():
+    """
+    Hit/miss counters and sizes of the LLM suggestion cache, translation memory and
+    product row cache.
+    """
+    if suggestion_cache is None:
+        stats: Dict[str, Any] = {"enabled": False}
+    else:
+        stats = {"enabled": True, **(await asyncio.to_thread(suggestion_cache.stats))}
+    if translation_memory is not None:
+        stats["translation_memory"] = await asyncio.to_thread(translation_memory.stats)
+    stats["product_rows"] = product_cache.stats()
+    return stats
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus text exposition of the service metrics."""
+    return Response(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.get("/metrics/usage")
+async def usage_metrics():
+    """
+    Provider call accounting: process-wide totals by call type, a per-job summary
+    for the jobs held by this worker, the provider limiters' state and, with
+    LLM_PROVIDER/SEARCH_PROVIDER=fake, the injected fault counters.
+    """
+    return {
+        "usage": accounting.summarize(accounting.totals),
+        "jobs": {
+            job_id: {
+                "description": job.get("description"),
+                "status": job.get("status"),
+                **accounting.summarize(job.get("usage"))["total"],
+            }
+            for job_id, job in list(progress_tracker.jobs.items())
+        },
+        "providers": {name: lim.stats() for name, lim in provider_limits.items()},
+        "fake_providers": clients.fake_provider_stats(),
+    }
+
+
+@app.delete("/cache")
+async def clear_cache():
+    """Drop all cached LLM suggestions."""
+    if suggestion_cache is not None:
+        await asyncio.to_thread(suggestion_cache.clear)
+    return {"status": "cleared"}
+
+
 @app.get("/progress/{job_id}")
 async def get_progress(job_id: str):
     """Get the current progress of a job"""
-    job = progress_tracker.get_job(job_id)
+    job = await progress_tracker.load_job(job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
 
@@ -391,6 +1185,7 @@ async def get_progress(job_id: str):
 
     return {
         **job,
+        "usage": accounting.summarize(job.get("usage")),
         "progress_percent": round(progress_percent, 1),
         "elapsed_time": f"{int(elapsed_time // 60)}m {int(elapsed_time % 60)}s",
         "eta": eta_formatted,
@@ -402,60 +1197,108 @@ async def get_progress(job_id: str):
     }
 
 
+# SSE pacing: minimum gap between events for one client (bursts are coalesced into
+# the latest state) and the keep-alive period when nothing changes.
+SSE_MIN_INTERVAL = float(os.getenv("SSE_MIN_INTERVAL", "0.25"))
+SSE_KEEPALIVE = float(os.getenv("SSE_KEEPALIVE", "15"))
+
+
+def _progress_payload(job: Dict[str, Any]) -> Dict[str, Any]:
+    """SSE progress event body for a job."""
+    # Calculate additional metrics
+    current_item = job.get("current", 0)
+    total_items = job.get("total", 1)
+
+    progress_percent = (current_item / total_items * 100) if total_items > 0 else 0
+    elapsed_time = (datetime.now() - job["start_time"]).total_seconds()
+
+    # Calculate ETA and rate
+    if current_item > 0 and not job.get("completed", False):
+        time_per_item = elapsed_time / current_item
+        remaining_items = total_items - current_item
+        eta_seconds = time_per_item * remaining_items
+        rate_per_sec = current_item / elapsed_time if elapsed_time > 0 else 0
+    else:
+        eta_seconds = 0
+        rate_per_sec = 0
+
+    return {
+        "job_id": job["id"],
+        "status": job.get("status", "running"),
+        "current_item": current_item,
+        "total_items": total_items,
+        "percentage": round(progress_percent, 1),
+        "success_count": job.get("success_count", 0),
+        "error_count": job.get("error_count", 0),
+        "elapsed_time": elapsed_time,
+        "eta": eta_seconds,
+        "rate": rate_per_sec,
+        "status_message": job.get("current_task", "Processing..."),
+        "completed": job.get("completed", False),
+        "cancelled": job.get("cancelled", False),
+        "recent_items": job.get("processed_items", [])[-5:],  # Last 5 items
+    }
+
+
 @app.get("/progress/{job_id}/stream")
-async def stream_progress(job_id: str):
-    """Stream real-time progress updates using Server-Sent Events"""
+async def stream_progress(request: Request, job_id: str):
+    """
+    Stream real-time progress updates using Server-Sent Events.
 
-    async def event_generator():
-        while True:
-            job = progress_tracker.get_job(job_id)
-            if not job:
-                yield f"data: {json.dumps({'error': 'Job not found'})}\n\n"
-                break
+    Events are pushed when the job changes instead of on a timer. Each carries the
+    job version as its SSE id; a reconnecting client's Last-Event-ID gets a catch-up
+    event listing the items processed since then. Jobs owned by another worker are
+    polled from the job store once per second, one read shared by all subscribers.
+    """
+    try:
+        last_seen = int(request.headers.get("last-event-id", ""))
+    except ValueError:
+        last_seen = None
 
-            # Calculate additional metrics
-            current_item = job.get("current", 0)
-            total_items = job.get("total", 1)
+    def render(job):
+        return json.dumps(_progress_payload(job), default=str)
 
-            progress_percent = (
-                (current_item / total_items * 100) if total_items > 0 else 0
-            )
-            elapsed_time = (datetime.now() - job["start_time"]).total_seconds()
-
-            # Calculate ETA and rate
-            if current_item > 0 and not job.get("completed", False):
-                time_per_item = elapsed_time / current_item
-                remaining_items = total_items - current_item
-                eta_seconds = time_per_item * remaining_items
-                rate_per_sec = current_item / elapsed_time if elapsed_time > 0 else 0
-            else:
-                eta_seconds = 0
-                rate_per_sec = 0
-
-            # Create response data with safe serialization
-            progress_data = {
-                "job_id": job_id,
-                "status": job.get("status", "running"),
-                "current_item": current_item,
-                "total_items": total_items,
-                "percentage": round(progress_percent, 1),
-                "success_count": job.get("success_count", 0),
-                "error_count": job.get("error_count", 0),
-                "elapsed_time": elapsed_time,
-                "eta": eta_seconds,
-                "rate": rate_per_sec,
-                "status_message": job.get("current_task", "Processing..."),
-                "completed": job.get("completed", False),
-                "cancelled": job.get("cancelled", False),
-                "recent_items": job.get("processed_items", [])[-5:],  # Last 5 items
-            }
+    async def event_generator():
+        seen = -1
+        if last_seen is not None and job_id in progress_tracker.jobs:
+            missed = progress_tracker.items_since(job_id, last_seen)
+            if missed:
+                payload = {
+                    **_progress_payload(progress_tracker.jobs[job_id]),
+                    "new_items": missed,
+                }
+                seen = progress_tracker.version(job_id)
+                yield f"id: {seen}\ndata: {json.dumps(payload, default=str)}\n\n"
 
-            yield f"data: {json.dumps(progress_data)}\n\n"
+        while True:
+            if job_id in progress_tracker.jobs:
+                version = await progress_tracker.wait_for_change(
+                    job_id, seen, SSE_KEEPALIVE
+                )
+                job = progress_tracker.jobs.get(job_id)
+                if job is None:
+                    yield f"data: {json.dumps({'error': 'Job not found'})}\n\n"
+                    break
+                if version == seen:
+                    yield ": keep-alive\n\n"
+                    continue
+                seen = version
+                data = progress_tracker.render_cached(job_id, render)
+                yield f"id: {version}\ndata: {data}\n\n"
+            else:
+                job = await progress_tracker.poll_job(job_id)
+                if not job:
+                    yield f"data: {json.dumps({'error': 'Job not found'})}\n\n"
+                    break
+                yield f"data: {render(job)}\n\n"
 
             if job.get("completed", False) or job.get("cancelled", False):
                 break
 
-            await asyncio.sleep(1)  # Update every second
+            if job_id in progress_tracker.jobs:
+                await asyncio.sleep(SSE_MIN_INTERVAL)  # coalesce bursts of updates
+            else:
+                await asyncio.sleep(1)
 
     return StreamingResponse(
         event_generator(),
@@ -526,18 +1369,89 @@ async def check_database_schema():
         return {"error": f"Failed to check schema: {str(e)}"}
 
 
+async def _index_advisor(keys: Optional[str], analyze: bool, apply: bool) -> Dict[str, Any]:
+    if not pool:
+        return {"error": "Database pool not available"}
+    key_list = [k for k in _keys_list(keys) if k in KNOWN_COLUMNS]
+    key_sets = [key_list] if key_list else INDEXED_KEY_SETS
+    # EXPLAIN the first (bulk autofill) query shape
+    sample_sql, sample_args = _missing_page_sql(key_sets[0], 100)
+    try:
+        async with pool.acquire() as conn:
+            existing = await index_advisor.existing_indexes(conn, PRODUCTS_TABLE)
+            proposals = index_advisor.propose_indexes(
+                PRODUCTS_TABLE, QUOTED_PRODUCTS_TABLE, COLUMN_TYPES, key_sets, existing
+            )
+            report: Dict[str, Any] = {
+                "table": PRODUCTS_TABLE,
+                "key_sets": key_sets,
+                "note": (
+                    "One partial index per hot query key set, not per column: each "
+                    "column in an index predicate makes updates of it non-HOT. Pass "
+                    "keys= for the index matching another query."
+                ),
+                "proposals": proposals,
+                "migration": index_advisor.migration_sql(proposals),
+                "sample_query": sample_sql,
+            }
+            if analyze:
+                report["before"] = await index_advisor.explain_analyze(
+                    conn, sample_sql, *sample_args
+                )
+            if apply:
+                # index builds and ANALYZE outlast any request-sized timeout; a build
+                # cancelled half-way would leave an INVALID index behind
+                async with db_pool.statement_timeout(conn, 0):
+                    report["applied"] = await index_advisor.apply_proposals(conn, proposals)
+                    await conn.execute(f"ANALYZE {QUOTED_PRODUCTS_TABLE}")
+                if analyze:
+                    report["after"] = await index_advisor.explain_analyze(
+                        conn, sample_sql, *sample_args
+                    )
+            return report
+    except Exception as e:
+        return {"error": f"Index advisor failed: {str(e)}"}
+
+
+@app.get("/debug/index-advisor")
+async def index_advisor_report(
+    keys: Optional[str] = Query(None, description="comma separated fields to plan for"),
+    analyze: bool = True,
+):
+    """
+    Propose partial indexes for the missing-field queries (one per INDEXED_KEY_SETS
+    entry, or for `keys`), with a migration script. Read-only; analyze=true includes EXPLAIN ANALYZE of a representative page query.
+    """
+    return await _index_advisor(keys, analyze, apply=False)
+
+
+@app.post("/debug/index-advisor/apply")
+async def index_advisor_apply(
+    keys: Optional[str] = Query(None, description="comma separated fields to plan for"),
+    analyze: bool = True,
+):
+    """
+    Create the proposed indexes that do not exist yet (CONCURRENTLY) and ANALYZE
+    the table; analyze=true includes EXPLAIN ANALYZE before and after.
+    """
+    return await _index_advisor(keys, analyze, apply=True)
+
+
 @app.get("/", response_class=HTMLResponse)
 async def ui_index(
     request: Request,
     keys: Optional[str] = Query(None),
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=500),
     page: int = Query(1, ge=1),
+    after: Optional[str] = Query(None, description="cursor: id of the last row seen"),
+    before: Optional[str] = Query(None, description="cursor: id of the first row seen"),
 ):
     key_list = _keys_list(keys) or list(KNOWN_COLUMNS)
     # keep only known columns
     key_list = [k for k in key_list if k in KNOWN_COLUMNS]
     if not key_list:
         return templates.TemplateResponse(
+            request,
             "index.html",
             {
                 "request": request,
@@ -548,26 +1462,27 @@ async def ui_index(
             },
         )
 
-    # Calculate offset for pagination
-    offset = (page - 1) * limit
-    products = await db_find_missing_products(key_list, limit, offset)
-
-    # Get total count for pagination info (more efficient count query)
-    total_products = await db_count_missing_products(key_list)
+    # Keyset pagination: page and total come back together, and the count is cached
+    # briefly, so deep pages cost the same as the first one. `page` is display only.
+    result = await db_find_missing_page(key_list, limit, after_id=after, before_id=before)
+    total_products = result["total"]
     total_pages = (total_products + limit - 1) // limit  # Ceiling division
 
     return templates.TemplateResponse(
+        request,
         "index.html",
         {
             "request": request,
-            "products": products,
+            "products": result["products"],
             "keys": keys,
             "page": page,
             "limit": limit,
             "total_products": total_products,
             "total_pages": total_pages,
-            "has_prev": page > 1,
-            "has_next": page < total_pages,
+            "has_prev": result["prev_cursor"] is not None,
+            "has_next": result["next_cursor"] is not None,
+            "next_cursor": result["next_cursor"],
+            "prev_cursor": result["prev_cursor"],
         },
     )
 
@@ -618,6 +1533,7 @@ async def ui_product(
             suggestions[field_name] = value
 
     return templates.TemplateResponse(
+        request,
         "product.html",
         {
             "request": request,
@@ -743,12 +1659,15 @@ async def ui_autofill(
 async def get_products_missing(
     keys: Optional[str] = Query(None, description="comma separated required fields"),
     limit: int = 100,
+    after: Optional[str] = Query(
+        None, description="cursor: return products with id greater than this"
+    ),
 ):
     key_list = _keys_list(keys) or list(KNOWN_COLUMNS)
     key_list = [k for k in key_list if k in KNOWN_COLUMNS]
     if not key_list:
         return []
-    rows = await db_find_missing_products(key_list, limit)
+    rows = await db_find_missing_products(key_list, limit, after_id=after)
     out = [
         ProductOut(id=r["id"], title=r.get("title"), fields=r.get("fields"))
         for r in rows
@@ -768,24 +1687,30 @@ async def update_metadata(product_id: str, payload: MetadataIn):
     return {"id": row.get("id"), "title": row.get("title")}
 
 
-async def suggest_metadata_via_openai(
-    product_name: Optional[str],
-    existing_meta: Optional[Dict[str, Any]],
-    required_keys: List[str],
-) -> Dict[str, Any]:
+@app.get("/ingredients/normalize")
+async def normalize_ingredients(
+    text: str = Query(..., description="ingredient list or free text"),
+):
     """
-    Uses OpenAI to suggest metadata for skincare/cosmetic products.
-    Provides comprehensive suggestions based on the complete product schema.
+    Map an ingredient list onto the INCI dictionary: canonical INCI list, Arabic
+    list (when every token is known), derived actives, unrecognized tokens, and the
+    dictionary ingredients mentioned anywhere in the text.
     """
-    if not OPENAI_API_KEY:
-        return {k: "" for k in required_keys}
-    try:
-        from openai import OpenAI
+    if ingredient_index is None:
+        raise HTTPException(status_code=503, detail="Ingredient index not loaded")
+    inci, unknown = ingredient_index.to_inci(text)
+    arabic, _ = ingredient_index.to_arabic(text)
+    return {
+        "inci": inci,
+        "arabic": arabic,
+        "actives": ingredient_index.actives(text),
+        "unknown": unknown,
+        "mentioned": [e["inci"] for e in ingredient_index.find(text)],
+    }
 
-        client = OpenAI(api_key=OPENAI_API_KEY)
 
-        # Enhanced prompt with schema context
-        schema_context = """
+# Field guidelines shared by every suggestion prompt (single and batched)
+SCHEMA_CONTEXT = """
         You are an expert in skincare and cosmetic products. Generate realistic, professional metadata for the following product.
         
         Field Guidelines:
@@ -794,7 +1719,7 @@ async def suggest_metadata_via_openai(
         - descriptionEn: Detailed English product description (2-3 sentences)
         - descriptionAr: Arabic translation of the description
         - activeIngredients: Key active ingredients (comma-separated)
-        - skinType: Target skin type (e.g., "Oily", "Dry", "Combination", "Sensitive", "All")
+        - skinType: Target skin types (one or more of the allowed values, e.g. ["Oily", "Combination"])
         - concerns: Skin concerns addressed (e.g., "Acne, Aging, Hyperpigmentation")
         - usage: When/how often to use (e.g., "Morning and Evening", "Daily")
         - features: Key product benefits (comma-separated)
@@ -810,65 +1735,575 @@ async def suggest_metadata_via_openai(
         - isTodayDeal: true if this should be featured in deals
         """
 
-        message = f"""
-        {schema_context}
-        
-        Product name: {product_name}
-        Existing metadata: {json.dumps(existing_meta or {})}
-        Required fields: {json.dumps(required_keys)}
-        
-        Return only a JSON object with the requested keys and suggested values. 
-        Make suggestions realistic and professional for skincare/cosmetic products.
-        For Arabic fields, provide proper Arabic translations.
-        For boolean fields, use true/false.
-        If unsure about a field, use "unknown" for text fields or false for booleans.
-        """
 
-        resp = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": message}],
-            max_tokens=800,  # Increased for more comprehensive responses
-            temperature=0.3,  # Slightly more creative for better suggestions
-        )
-        text = resp.choices[0].message.content.strip()
+def _parse_json_object(text: str) -> Optional[Dict[str, Any]]:
+    """Parse a schema-constrained model answer; None when it is not a JSON object
+    (validation then reports every key as missing and they are asked again)."""
+    try:
+        parsed = json.loads(text)
+    except ValueError:
+        return None
+    return parsed if isinstance(parsed, dict) else None
 
-        # Attempt to parse JSON from the response
-        try:
-            suggested = json.loads(text)
-        except Exception:
-            # Fallback: try to extract first JSON object within the text
-            import re
 
-            m = re.search(r"\{.*\}", text, re.S)
-            if m:
-                suggested = json.loads(m.group(0))
-            else:
-                suggested = {k: "unknown" for k in required_keys}
-        return suggested
-    except Exception as e:
-        return {k: "" for k in required_keys}
+# Times a suggestion request is repeated for the keys that failed validation
+SUGGESTION_MAX_REASKS = int(os.getenv("SUGGESTION_MAX_REASKS", "1"))
+
+# Suggestion field groups, each generated by its own request with its own token
+# budget: long Arabic or INCI output can no longer truncate the JSON of the short
+# fields, and the groups of one product are generated concurrently. Fields not
+# listed here fall into "other".
+FIELD_GROUPS: Dict[str, tuple] = {
+    "copy": (
+        [
+            "title",
+            "descriptionEn",
+            "activeIngredients",
+            "skinType",
+            "concerns",
+            "usage",
+            "features",
+            "howToUse",
+        ],
+        700,
+    ),
+    "arabic": (["titleAr", "descriptionAr", "featuresAr", "howToUseAr"], 1000),
+    "ingredients": (["ingredients", "ingredientsAr"], 1200),
+    "seo": (["metaTitle", "metaDescription", "slug"], 300),
+    "flags": (["isFeatured", "isNew", "isTodayDeal", "isActive"], 100),
+    "other": ([], 300),
+}
+FIELD_GROUP_OF = {f: g for g, (fields, _) in FIELD_GROUPS.items() for f in fields}
 
 
-async def search_online_for_metadata(
-    product_name: Optional[str], required_keys: List[str]
+def _field_groups(keys: List[str]) -> List[tuple]:
+    """Split keys into (group name, keys) pairs, in FIELD_GROUPS order."""
+    grouped: Dict[str, List[str]] = {}
+    for k in keys:
+        grouped.setdefault(FIELD_GROUP_OF.get(k, "other"), []).append(k)
+    return [(g, grouped[g]) for g in FIELD_GROUPS if g in grouped]
+
+
+async def suggest_metadata_via_openai(
+    product_name: Optional[str],
+    existing_meta: Optional[Dict[str, Any]],
+    required_keys: List[str],
 ) -> Dict[str, Any]:
     """
-    Attempts a web search to find metadata. This is a minimal implementation using SerpAPI if SERPAPI_API_KEY is present.
-    Otherwise returns empty suggestions. You can replace with your preferred search provider.
-    """
-    if not SERPAPI_API_KEY or not product_name:
+    Uses OpenAI to suggest metadata for skincare/cosmetic products.
+    Provides comprehensive suggestions based on the complete product schema.
+    The keys are split into FIELD_GROUPS that are requested concurrently and merged.
+    Ingredient-derived and Arabic fields are then filled from the ingredient index
+    and the translation memory where possible (see _derive_fields).
+    """
+    if not clients.llm_enabled(OPENAI_API_KEY):
         return {k: "" for k in required_keys}
+    derived = _derived_keys(required_keys)
+    suggested = await _suggest_groups(
+        product_name, existing_meta, [k for k in required_keys if k not in derived]
+    )
+    _normalize_ingredients(suggested)
+    if derived:
+        (leftover,) = await _derive_fields([(existing_meta, suggested, derived)])
+        if leftover:
+            suggested.update(
+                await _suggest_groups(product_name, existing_meta, leftover)
+            )
+    return suggested
+
+
+async def _suggest_groups(
+    product_name: Optional[str],
+    existing_meta: Optional[Dict[str, Any]],
+    keys: List[str],
+) -> Dict[str, Any]:
+    parts = await asyncio.gather(
+        *(
+            _suggest_field_group(product_name, existing_meta, group_keys, group)
+            for group, group_keys in _field_groups(keys)
+        )
+    )
+    suggested: Dict[str, Any] = {}
+    for part in parts:
+        suggested.update(part)
+    return suggested
+
+
+# Keys derived from the ingredient list through the INCI index
+INGREDIENT_DERIVED = ("activeIngredients", "ingredientsAr")
+
+
+def _derived_keys(keys: List[str]) -> List[str]:
+    """Keys filled from other columns (ingredient index, translation memory) before
+    falling back to generating them; empty when both are disabled."""
+    derived = []
+    for k in keys:
+        if ingredient_index is not None and k in INGREDIENT_DERIVED:
+            derived.append(k)
+        elif translation_memory is not None and k in tm.TRANSLATION_SOURCES:
+            derived.append(k)
+    return derived
+
+
+def _normalize_ingredients(suggested: Dict[str, Any]):
+    """Rewrite a generated ingredient list with canonical, deduplicated INCI names."""
+    value = suggested.get("ingredients")
+    if ingredient_index is not None and isinstance(value, str):
+        if value.strip() not in ("", "unknown"):
+            suggested["ingredients"] = ingredient_index.to_inci(value)[0]
+
+
+def _derivation_sources(row: Dict[str, Any], keys: List[str]) -> Dict[str, Any]:
+    """
+    The row's English source columns for the derived keys among `keys` (e.g.
+    descriptionEn for descriptionAr), so _derive_fields can translate copy already
+    in the product. Only these columns are added to the existing metadata: which
+    keys count as missing, and the rest of the prompt context, are unchanged.
+    """
+    columns = set()
+    for k in keys:
+        if k in INGREDIENT_DERIVED:
+            columns.add("ingredients")
+        elif k in tm.TRANSLATION_SOURCES:
+            columns.add(tm.TRANSLATION_SOURCES[k])
+    return {c: row[c] for c in sorted(columns) if _source_text(row, {}, c) is not None}
+
+
+def _source_text(
+    existing: Optional[Dict[str, Any]], suggested: Dict[str, Any], column: str
+) -> Optional[str]:
+    """English source value for a derived key, or None when there is nothing usable."""
+    source = suggested.get(column) or (existing or {}).get(column)
+    if not isinstance(source, str) or source.strip() in ("", "unknown"):
+        return None
+    return source
+
+
+async def _derive_fields(entries: List[tuple]) -> List[List[str]]:
+    """
+    Fill derived keys for several products. Each entry is (existing, suggested, keys)
+    and results are written into `suggested`. Returns, per entry, the keys that
+    could not be derived and must be generated instead.
+    """
+    by_index = [
+        [k for k in keys if ingredient_index is not None and k in INGREDIENT_DERIVED]
+        for _, _, keys in entries
+    ]
+    by_memory = [
+        [k for k in keys if k not in index_keys]
+        for (_, _, keys), index_keys in zip(entries, by_index)
+    ]
+    tasks = []
+    if any(by_index):
+        tasks.append(
+            _fill_from_ingredient_index(
+                [(e, s, keys) for (e, s, _), keys in zip(entries, by_index)]
+            )
+        )
+    if any(by_memory):
+        tasks.append(
+            _translate_from_memory(
+                [(e, s, keys) for (e, s, _), keys in zip(entries, by_memory)]
+            )
+        )
+    leftovers: List[List[str]] = [[] for _ in entries]
+    for part in await asyncio.gather(*tasks):
+        for n, keys in enumerate(part):
+            leftovers[n].extend(keys)
+    return leftovers
+
+
+async def _fill_from_ingredient_index(entries: List[tuple]) -> List[List[str]]:
+    """
+    Derive activeIngredients and ingredientsAr from each product's ingredient list.
+    Known ingredients map through the INCI index; only unknown tokens are
+    translated (via _translate_segments, batched across all entries).
+    """
+    leftovers: List[List[str]] = [[] for _ in entries]
+    pending = []  # (entry index, source) waiting for unknown-token translations
+    unknown: Dict[str, None] = {}  # ordered set
+    for n, (existing, suggested, keys) in enumerate(entries):
+        source = _source_text(existing, suggested, "ingredients")
+        for key in keys:
+            if source is None:
+                leftovers[n].append(key)
+            elif key == "activeIngredients":
+                actives = ingredient_index.actives(source)
+                if actives:
+                    suggested[key] = ", ".join(actives)
+                else:
+                    leftovers[n].append(key)
+            else:
+                text, missing = ingredient_index.to_arabic(source)
+                if text is not None:
+                    suggested[key] = text
+                else:
+                    pending.append((n, source))
+                    unknown.update(dict.fromkeys(missing))
+    if pending:
+        translations = await _translate_segments(list(unknown))
+        for n, source in pending:
+            text, _ = ingredient_index.to_arabic(source, translations)
+            if text is None:
+                leftovers[n].append("ingredientsAr")
+            else:
+                entries[n][1]["ingredientsAr"] = text
+    return leftovers
+
+
+async def _translate_from_memory(entries: List[tuple]) -> List[List[str]]:
+    """
+    Fill Arabic keys by translating their English source column segment by segment.
+
+    Each entry is (existing, suggested, arabic_keys); the English source is taken
+    from `suggested` first, then `existing`, and the Arabic text is written into
+    `suggested`. Returns, per entry, the keys that could not be filled (no English
+    source or a failed translation).
+    """
+    leftovers: List[List[str]] = [[] for _ in entries]
+    plans = []
+    for n, (existing, suggested, keys) in enumerate(entries):
+        for key in keys:
+            column = tm.TRANSLATION_SOURCES[key]
+            source = _source_text(existing, suggested, column)
+            if source is None:
+                leftovers[n].append(key)
+                continue
+            segments, layout = tm.segment(source, tm.SEGMENT_MODES[column])
+            plans.append((n, key, segments, layout))
+
+    translations = await _translate_segments(
+        [seg for _, _, segments, _ in plans for seg in segments]
+    )
+    for n, key, segments, layout in plans:
+        parts = [translations.get(seg) for seg in segments]
+        if any(p is None for p in parts):
+            leftovers[n].append(key)
+        else:
+            entries[n][1][key] = tm.assemble(parts, layout)
+    return leftovers
+
+
+def _memory_lookups(segments: List[str]) -> tuple:
+    """Exact hits and, for the misses, near-identical references (blocking SQLite)."""
+    found: Dict[str, str] = {}
+    references: Dict[str, tuple] = {}
+    for seg in segments:
+        hit = translation_memory.lookup(seg)
+        if hit is not None:
+            found[seg] = hit
+            continue
+        ref = translation_memory.similar(seg)
+        if ref is not None:
+            references[seg] = ref
+    return found, references
+
+
+async def _translate_segments(segments: List[str]) -> Dict[str, str]:
+    """
+    Arabic for each segment: from the translation memory when known exactly,
+    otherwise from batched model calls (TRANSLATION_BATCH_SEGMENTS per request)
+    whose results are stored for reuse. Near-identical stored segments are sent
+    along as references, never reused as-is. Segments that could not be translated
+    are left out. Memory lookups and stores run in a worker thread.
+    """
+    segments = list(dict.fromkeys(segments))
+    found: Dict[str, str] = {}
+    references: Dict[str, tuple] = {}
+    if translation_memory is not None:
+        found, references = await asyncio.to_thread(_memory_lookups, segments)
+        for seg in segments:
+            accounting.record("cache", "translation", cache_hit=seg in found)
+    unseen = [seg for seg in segments if seg not in found]
+    if unseen:
+        chunks = [
+            unseen[i : i + TRANSLATION_BATCH_SEGMENTS]
+            for i in range(0, len(unseen), TRANSLATION_BATCH_SEGMENTS)
+        ]
+        fresh: Dict[str, str] = {}
+        for chunk, translated in zip(
+            chunks,
+            await asyncio.gather(
+                *(
+                    translate_segments_via_openai(
+                        c, [references[seg] for seg in c if seg in references]
+                    )
+                    for c in chunks
+                )
+            ),
+        ):
+            fresh.update({seg: t for seg, t in zip(chunk, translated) if t})
+        if translation_memory is not None:
+            await asyncio.to_thread(translation_memory.store, fresh)
+        found.update(fresh)
+    return found
+
+
+async def _openai_chat(operation: str, **kwargs):
+    """
+    Chat completion through the shared client and the OpenAI limiter, recording
+    tokens, latency and failures under `operation` (see accounting.py).
+    """
+    client = clients.get_openai_client()
+    started = time.perf_counter()
     try:
-        import httpx
+        resp = await provider_limits["openai"].call(
+            client.chat.completions.create, model=OPENAI_MODEL, **kwargs
+        )
+    except Exception:
+        accounting.record(
+            "openai", operation, time.perf_counter() - started, error=True
+        )
+        raise
+    elapsed = time.perf_counter() - started
+    LLM_CALL_SECONDS.observe(elapsed, provider="openai", operation=operation)
+    usage = getattr(resp, "usage", None)
+    accounting.record(
+        "openai",
+        operation,
+        elapsed,
+        prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+        completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+        model=OPENAI_MODEL,
+    )
+    return resp
+
+
+async def translate_segments_via_openai(
+    segments: List[str], references: Optional[List[tuple]] = None
+) -> List[Optional[str]]:
+    """
+    Translate English copy segments to Arabic in one request; None where unusable.
+    `references` are (English, Arabic) pairs of similar, already translated segments
+    to keep wording consistent.
+    """
+    if not clients.llm_enabled(OPENAI_API_KEY) or not segments:
+        return [None] * len(segments)
+    reference_text = ""
+    if references:
+        reference_text = (
+            "Approved translations of similar segments, for consistent terminology "
+            "only (the meaning may differ, translate each segment itself): "
+            + json.dumps([list(r) for r in references], ensure_ascii=False)
+        )
+    message = f"""
+        Translate each English skincare product text segment below into Arabic for an
+        e-commerce catalog. Keep INCI ingredient names, brand names and numbers accurate.
+
+        Segments (JSON array): {json.dumps(segments, ensure_ascii=False)}
 
-        params = {
-            "api_key": SERPAPI_API_KEY,
-            "engine": "google",
-            "q": product_name,
-            "num": 3,
+        {reference_text}
+
+        Return a JSON object {{"translations": [...]}} with exactly one Arabic string per
+        segment, in the same order.
+        """
+    try:
+        resp = await _openai_chat(
+            "translate",
+            messages=[{"role": "user", "content": message}],
+            response_format=suggestion_schema.translation_response_format(),
+            # Arabic output takes roughly one token per source character at most
+            max_tokens=min(16000, 64 + sum(len(seg) for seg in segments)),
+            temperature=0.2,
+        )
+        data = _parse_json_object(resp.choices[0].message.content.strip()) or {}
+        out = data.get("translations")
+        if isinstance(out, list) and len(out) == len(segments):
+            return [t.strip() if isinstance(t, str) and t.strip() else None for t in out]
+    except Exception as e:
+        print(f"Translation request failed for {len(segments)} segments: {e}")
+    return [None] * len(segments)
+
+
+async def _suggest_field_group(
+    product_name: Optional[str],
+    existing_meta: Optional[Dict[str, Any]],
+    required_keys: List[str],
+    group: str,
+) -> Dict[str, Any]:
+    """
+    One suggestion request for keys of a single field group. The answer follows a
+    strict JSON schema (see suggestion_schema.py) and is validated in one pass;
+    only invalid keys are asked again, up to SUGGESTION_MAX_REASKS times, and any
+    still invalid afterwards come back as "unknown".
+    """
+    suggested: Dict[str, Any] = {}
+    pending = list(required_keys)
+    feedback = ""
+    try:
+        for attempt in range(1 + SUGGESTION_MAX_REASKS):
+            message = f"""
+        {SCHEMA_CONTEXT}
+        
+        Product name: {product_name}
+        Existing metadata: {json.dumps(existing_meta or {}, default=str)}
+        Required fields: {json.dumps(pending)}
+        
+        Return a JSON object with the requested keys and suggested values.
+        Make suggestions realistic and professional for skincare/cosmetic products.
+        For Arabic fields, provide proper Arabic translations.
+        If unsure about a field, use null.
+        {feedback}"""
+
+            # The limiter caps in-flight calls and retries 429s with backoff.
+            resp = await _openai_chat(
+                f"suggest:{group}" if not attempt else f"reask:{group}",
+                messages=[{"role": "user", "content": message}],
+                response_format=suggestion_schema.response_format(pending),
+                max_tokens=FIELD_GROUPS[group][1],
+                temperature=0.3,  # Slightly more creative for better suggestions
+            )
+            data = _parse_json_object(resp.choices[0].message.content.strip())
+            values, errors = suggestion_schema.validate(data, pending)
+            suggested.update(values)
+            if not errors:
+                break
+            pending = list(errors)
+            feedback = "Your previous answer was invalid: " + json.dumps(errors)
+    except Exception as e:
+        print(f"Suggestion request for {group} fields failed: {e}")
+        return {k: suggested.get(k, "") for k in required_keys}
+    return {k: suggested.get(k, "unknown") for k in required_keys}
+
+
+async def suggest_metadata_batch_via_openai(
+    items: List[Dict[str, Any]],
+) -> List[Dict[str, Any]]:
+    """
+    Suggest metadata for several products in one request per field group.
+
+    Each item is {"name", "existing", "keys"}; returns one suggestion dict per item,
+    in order. The field guidelines are sent once per batched request. Keys missing
+    from the batched answers are re-asked with single-product calls.
+    """
+    if not clients.llm_enabled(OPENAI_API_KEY):
+        return [{k: "" for k in item["keys"]} for item in items]
+    if len(items) == 1:
+        item = items[0]
+        return [
+            await suggest_metadata_via_openai(
+                item["name"], item["existing"], item["keys"]
+            )
+        ]
+
+    # group -> [(item index, that item's keys in the group)]
+    by_group: Dict[str, List[tuple]] = {}
+    derived = [_derived_keys(item["keys"]) for item in items]
+    for i, item in enumerate(items):
+        direct = [k for k in item["keys"] if k not in derived[i]]
+        for group, keys in _field_groups(direct):
+            by_group.setdefault(group, []).append((i, keys))
+
+    answers = await asyncio.gather(
+        *(
+            _suggest_batch_group(items, members, group)
+            for group, members in by_group.items()
+        )
+    )
+    results: List[Dict[str, Any]] = [{} for _ in items]
+    for answer in answers:
+        for i, entry in answer.items():
+            results[i].update(entry)
+    for result in results:
+        _normalize_ingredients(result)
+    if any(derived):
+        # derived keys left unfilled here are picked up by the per-product retry
+        await _derive_fields(
+            [
+                (item["existing"], results[i], derived[i])
+                for i, item in enumerate(items)
+            ]
+        )
+
+    retry = [
+        (i, [k for k in item["keys"] if k not in results[i]])
+        for i, item in enumerate(items)
+    ]
+    retry = [(i, keys) for i, keys in retry if keys]
+    if retry:
+        fallbacks = await asyncio.gather(
+            *(
+                suggest_metadata_via_openai(items[i]["name"], items[i]["existing"], keys)
+                for i, keys in retry
+            )
+        )
+        for (i, _), suggestion in zip(retry, fallbacks):
+            results[i].update(suggestion)
+    return [{k: r.get(k, "") for k in item["keys"]} for r, item in zip(results, items)]
+
+
+async def _suggest_batch_group(
+    items: List[Dict[str, Any]], members: List[tuple], group: str
+) -> Dict[int, Dict[str, Any]]:
+    """Batched request for one field group; returns {item index: valid answered keys}."""
+    products = [
+        {
+            "ref": str(i),
+            "name": items[i]["name"],
+            "existing": items[i]["existing"] or {},
+            "required": keys,
         }
-        r = httpx.get("https://serpapi.com/search", params=params, timeout=10.0)
-        data = r.json()
+        for i, keys in members
+    ]
+    message = f"""
+        {SCHEMA_CONTEXT}
+        
+        Products (JSON array; each has a "ref", "name", "existing" metadata and "required" fields):
+        {json.dumps(products, ensure_ascii=False)}
+        
+        Return a JSON object of the form {{"products": {{"<ref>": {{...}}}}}} with one entry
+        per product ref, containing exactly that product's required fields and suggested values.
+        Make suggestions realistic and professional for skincare/cosmetic products.
+        For Arabic fields, provide proper Arabic translations.
+        If unsure about a field, use null.
+        """
+
+    parsed: Dict[str, Any] = {}
+    try:
+        resp = await _openai_chat(
+            f"batch:{group}",
+            messages=[{"role": "user", "content": message}],
+            response_format=suggestion_schema.batch_response_format(
+                {str(i): keys for i, keys in members}
+            ),
+            max_tokens=min(16000, FIELD_GROUPS[group][1] * len(members)),
+            temperature=0.3,
+        )
+        data = _parse_json_object(resp.choices[0].message.content.strip()) or {}
+        parsed = data.get("products") if isinstance(data.get("products"), dict) else {}
+    except Exception as e:
+        print(f"Batched {group} suggestion failed for {len(members)} products: {e}")
+
+    # invalid keys are left out, so the caller re-asks just those per product
+    answered = {}
+    for i, keys in members:
+        answered[i], _ = suggestion_schema.validate(parsed.get(str(i)), keys)
+    return answered
+
+
+async def search_online_for_metadata(
+    product_name: Optional[str], required_keys: List[str]
+) -> Dict[str, Any]:
+    """
+    Attempts a web search to find metadata. This is a minimal implementation using SerpAPI if SERPAPI_API_KEY is present.
+    Otherwise returns empty suggestions. You can replace with your preferred search provider.
+    """
+    if not clients.search_enabled(SERPAPI_API_KEY) or not product_name:
+        return {k: "" for k in required_keys}
+    started = time.perf_counter()
+    try:
+        try:
+            data = await provider_limits["serpapi"].call(
+                clients.serpapi_search, SERPAPI_API_KEY, product_name
+            )
+        except Exception:
+            accounting.record(
+                "serpapi", "search", time.perf_counter() - started, error=True
+            )
+            raise
+        elapsed = time.perf_counter() - started
+        LLM_CALL_SECONDS.observe(elapsed, provider="serpapi", operation="search")
+        accounting.record("serpapi", "search", elapsed)
         # Naive extraction: look into organic_results snippets and try to find values
         text_pool = []
         for item in data.get("organic_results", [])[:3]:
@@ -893,20 +2328,123 @@ async def search_online_for_metadata(
         return {k: "" for k in required_keys}
 
 
+def _build_update_data(suggestion: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert an LLM/web suggestion into typed column updates, dropping unknowns."""
+    update_data = {}
+    for key, value in suggestion.items():
+        if key in KNOWN_COLUMNS and value and value != "unknown":
+            # Convert types appropriately
+            if key in ["price", "compareAtPrice"]:
+                try:
+                    update_data[key] = float(value) if value else None
+                except (ValueError, TypeError):
+                    continue
+            elif key == "stockQuantity":
+                try:
+                    update_data[key] = int(float(value))
+                except (ValueError, TypeError):
+                    continue
+            elif key in ["isActive", "isFeatured", "isNew", "isTodayDeal"]:
+                update_data[key] = (
+                    bool(value)
+                    if isinstance(value, bool)
+                    else str(value).lower() == "true"
+                )
+            else:
+                update_data[key] = str(value)
+    return update_data
+
+
+async def _commit_suggestion(
+    product_id: str, suggestion: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Write a suggestion to the product's columns; returns the commit part of the result."""
+    update_data = _build_update_data(suggestion)
+    if not update_data:
+        return {"message": "No valid fields to update"}
+
+    # Update individual columns directly instead of metadata column
+    try:
+        await _products().update(product_id, update_data, returning=("id",))
+        await _products_changed([str(product_id)])
+    except Exception as e:
+        via = "Prisma" if prisma else "SQL"
+        print(f"{via} commit error for product {product_id}: {str(e)}")
+        print(f"Update data: {update_data}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to commit metadata via {via}: {str(e)}",
+        )
+    return {"updated_fields": list(update_data.keys()), "updated_data": update_data}
+
+
+async def _no_suggestion() -> Dict[str, Any]:
+    return {}
+
+
 @app.post("/products/{product_id}/auto-fill")
 async def autofill(
     product_id: str,
     keys: Optional[str] = Query(None, description="comma separated required keys"),
     strategy: str = "both",
     commit: bool = False,
+    refresh: bool = False,
 ):
     """
     Attempts to auto-fill missing metadata for the given product.
     strategy: one of 'llm', 'web', 'both'
     If commit=true, the suggested metadata will be merged into the product row.
+    If refresh=true, cached LLM suggestions are ignored and regenerated.
     Returns the suggestion and (if committed) the updated metadata.
     """
-    required_keys = _keys_list(keys)
+    return await _autofill_product(
+        product_id, _keys_list(keys), strategy, commit, refresh=refresh
+    )
+
+
+def _is_useful_suggestion(suggestion: Dict[str, Any]) -> bool:
+    """False for the all-empty/'unknown' results returned when the LLM call failed."""
+    return any(v not in (None, "", "unknown") for v in suggestion.values())
+
+
+async def _cached_llm_suggest(
+    llm_suggest,
+    name: Optional[str],
+    existing: Dict[str, Any],
+    keys: List[str],
+    refresh: bool = False,
+) -> Dict[str, Any]:
+    """Serve `llm_suggest` from the suggestion cache, storing fresh useful results."""
+    if suggestion_cache is None:
+        return await llm_suggest(name, existing, keys)
+    key = suggestion_key(name, existing, keys, OPENAI_MODEL, PROMPT_VERSION)
+    # SQLite lookups run off the event loop (LocalStore connections are thread-safe)
+    if not refresh:
+        cached = await asyncio.to_thread(suggestion_cache.get, key)
+        accounting.record("cache", "suggestion", cache_hit=cached is not None)
+        if cached is not None:
+            return cached
+    suggested = await llm_suggest(name, existing, keys)
+    if isinstance(suggested, dict) and _is_useful_suggestion(suggested):
+        await asyncio.to_thread(suggestion_cache.set, key, suggested)
+    return suggested
+
+
+async def _autofill_product(
+    product_id: str,
+    required_keys: List[str],
+    strategy: str = "both",
+    commit: bool = False,
+    llm_suggest=None,
+    refresh: bool = False,
+    writer=None,
+) -> Dict[str, Any]:
+    """
+    Implementation of `autofill`. `llm_suggest(name, existing, keys)` overrides the
+    LLM call and `writer(product_id, suggestion)` the commit, which lets bulk runs
+    route both through MicroBatchers.
+    """
+    llm_suggest = llm_suggest or suggest_metadata_via_openai
     # fetch row using wrapper (Prisma or asyncpg)
     row = await db_fetch_product(product_id)
     if not row:
@@ -927,14 +2465,25 @@ async def autofill(
     if not missing_keys:
         return {"status": "nothing_missing", "metadata": existing_meta}
     suggestion = {k: "" for k in missing_keys}
-    if strategy in ("llm", "both"):
-        llm_sugg = await suggest_metadata_via_openai(name, existing_meta, missing_keys)
-        # Merge suggestions: prefer non-empty
-        for k, v in llm_sugg.items():
-            if v:
-                suggestion[k] = v
-    if strategy in ("web", "both"):
-        web_sugg = await search_online_for_metadata(name, missing_keys)
+    context = {**_derivation_sources(row, missing_keys), **existing_meta}
+    # LLM and web lookups are independent, so run them concurrently
+    llm_sugg, web_sugg = await asyncio.gather(
+        (
+            _cached_llm_suggest(llm_suggest, name, context, missing_keys, refresh=refresh)
+            if strategy in ("llm", "both")
+            else _no_suggestion()
+        ),
+        (
+            search_online_for_metadata(name, missing_keys)
+            if strategy in ("web", "both")
+            else _no_suggestion()
+        ),
+    )
+    # Merge suggestions: prefer non-empty LLM values, then fill gaps from the web
+    for k, v in llm_sugg.items():
+        if v:
+            suggestion[k] = v
+    if web_sugg:
         for k, v in web_sugg.items():
             if v and not suggestion.get(k):
                 suggestion[k] = v
@@ -947,101 +2496,14 @@ async def autofill(
 
     result = {"suggestion": suggestion}
     if commit:
-        # Update individual columns directly instead of metadata column
-        if prisma:
-            try:
-                # Prepare data for individual column updates
-                update_data = {}
-                for key, value in suggestion.items():
-                    if key in KNOWN_COLUMNS and value and value != "unknown":
-                        # Convert types appropriately
-                        if key in ["price", "compareAtPrice", "stockQuantity"]:
-                            try:
-                                update_data[key] = float(value) if value else None
-                            except (ValueError, TypeError):
-                                continue
-                        elif key in ["isActive", "isFeatured", "isNew", "isTodayDeal"]:
-                            update_data[key] = (
-                                bool(value)
-                                if isinstance(value, bool)
-                                else str(value).lower() == "true"
-                            )
-                        else:
-                            update_data[key] = str(value)
-
-                if update_data:
-                    updated = await prisma.product.update(
-                        where={"id": product_id}, data=update_data
-                    )
-                    result["updated_fields"] = list(update_data.keys())
-                    result["updated_data"] = update_data
-                else:
-                    result["message"] = "No valid fields to update"
-
-            except Exception as e:
-                print(f"Prisma commit error for product {product_id}: {str(e)}")
-                print(f"Update data: {update_data}")
-                raise HTTPException(
-                    status_code=500,
-                    detail=f"Failed to commit metadata via Prisma: {str(e)}",
-                )
+        if writer is not None:
+            result.update(await writer(product_id, suggestion))
         else:
-            # asyncpg path: update individual columns
-            try:
-                async with pool.acquire() as conn:
-                    # Prepare update data for individual columns
-                    update_data = {}
-                    for key, value in suggestion.items():
-                        if key in KNOWN_COLUMNS and value and value != "unknown":
-                            # Convert types appropriately
-                            if key in ["price", "compareAtPrice", "stockQuantity"]:
-                                try:
-                                    update_data[key] = float(value) if value else None
-                                except (ValueError, TypeError):
-                                    continue
-                            elif key in [
-                                "isActive",
-                                "isFeatured",
-                                "isNew",
-                                "isTodayDeal",
-                            ]:
-                                update_data[key] = (
-                                    bool(value)
-                                    if isinstance(value, bool)
-                                    else str(value).lower() == "true"
-                                )
-                            else:
-                                update_data[key] = str(value)
-
-                    if update_data:
-                        # Build dynamic SQL for updating individual columns
-                        set_clauses = []
-                        params = []
-                        param_num = 1
-
-                        for col, val in update_data.items():
-                            set_clauses.append(f"{_quote_ident(col)} = ${param_num}")
-                            params.append(val)
-                            param_num += 1
-
-                        # Add product_id parameter
-                        params.append(product_id)
-
-                        sql = f"UPDATE {QUOTED_PRODUCTS_TABLE} SET {', '.join(set_clauses)} WHERE id = ${param_num} RETURNING id"
-                        row = await conn.fetchrow(sql, *params)
-
-                        result["updated_fields"] = list(update_data.keys())
-                        result["updated_data"] = update_data
-                    else:
-                        result["message"] = "No valid fields to update"
-
-            except Exception as e:
-                print(f"SQL commit error for product {product_id}: {str(e)}")
-                print(f"Update data: {update_data}")
-                raise HTTPException(
-                    status_code=500,
-                    detail=f"Failed to commit metadata via SQL: {str(e)}",
+            result.update(
+                await provider_limits["db"].call(
+                    _commit_suggestion, product_id, suggestion
                 )
+            )
     return result
 
 
@@ -1088,6 +2550,87 @@ async def autofill_all_missing(product_id: str, commit: bool = False):
     return result
 
 
+def _missing_keys_of(product: Dict[str, Any]) -> List[str]:
+    """Keys whose value is empty in a row returned by db_find_missing_products."""
+    fields = product.get("fields") or {}
+    return [
+        k
+        for k, v in fields.items()
+        if v is None or (isinstance(v, str) and v.strip() == "")
+    ]
+
+
+def _bulk_item_processor(
+    strategy: str, commit: bool, batch_size: int = 1, job_id: Optional[str] = None
+):
+    """
+    Build the per-product coroutine used by BulkAutofillEngine. With batch_size > 1
+    the LLM calls of concurrently processed products are packed into batched prompts.
+    Without commit, suggestions are staged as drafts (tagged with job_id) for review.
+    """
+    llm_suggest = None
+    if batch_size > 1 and strategy in ("llm", "both"):
+        batcher = MicroBatcher(suggest_metadata_batch_via_openai, max_batch=batch_size)
+
+        async def llm_suggest(name, existing, keys):
+            return await batcher.submit(
+                {"name": name, "existing": existing, "keys": keys}
+            )
+
+    # Commits from concurrent workers are flushed together as batched UPDATEs;
+    # each worker still waits for (and reports) its own row's outcome.
+    write_batcher = MicroBatcher(
+        lambda rows: provider_limits["db"].call(db_bulk_update_products, rows),
+        max_batch=DB_WRITE_BATCH_SIZE,
+        max_wait=DB_WRITE_FLUSH_INTERVAL,
+    )
+
+    async def writer(product_id: str, suggestion: Dict[str, Any]) -> Dict[str, Any]:
+        update_data = _build_update_data(suggestion)
+        if not update_data:
+            return {"message": "No valid fields to update"}
+        outcome = await write_batcher.submit((product_id, update_data))
+        if outcome["status"] == "not_found":
+            raise RuntimeError("Product not found while committing")
+        if outcome["status"] == "error":
+            raise RuntimeError(f"Commit failed: {outcome['error']}")
+        return {"updated_fields": list(update_data.keys()), "updated_data": update_data}
+
+    async def process(product: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        missing_keys = _missing_keys_of(product)
+        if not missing_keys:
+            return None
+        # Generate content for this product
+        result = await _autofill_product(
+            product["id"],
+            missing_keys,
+            strategy=strategy,
+            commit=commit,
+            llm_suggest=llm_suggest,
+            writer=writer,
+        )
+        staged = 0
+        if not commit and draft_store is not None:
+            # SQLite write: off the event loop (LocalStore connections are thread-safe)
+            staged = await asyncio.to_thread(
+                draft_store.stage,
+                product["id"],
+                _build_update_data(result.get("suggestion", {})),
+                previous=product.get("fields"),
+                job_id=job_id,
+            )
+        return {
+            "product_id": product["id"],
+            "title": product.get("title") or "Unknown",
+            "processed_fields": missing_keys,
+            "status": "success",
+            "suggestions": result.get("suggestion", {}),
+            **({"details": f"Staged {staged} fields for review"} if staged else {}),
+        }
+
+    return process
+
+
 @app.post("/products/bulk-autofill")
 async def bulk_autofill_products(
     limit: int = 10,
@@ -1095,17 +2638,29 @@ async def bulk_autofill_products(
     commit: bool = False,
     required_fields: Optional[str] = None,
     background: bool = False,
+    concurrency: Optional[int] = Query(None, ge=1, le=64),
+    batch_size: int = Query(LLM_BATCH_SIZE, ge=1, le=20),
+    order: str = Query("priority", pattern="^(priority|id)$"),
+    whole_catalog: bool = False,
 ):
     """
     Bulk auto-generate content for multiple products.
     Processes products that have missing metadata and generates content for them.
+    By default the most valuable products go first (see scheduler.py); order=id
+    keeps table order. whole_catalog=true ignores `limit` and streams every matching
+    product through one background job.
 
     Args:
         limit: Maximum number of products to process
         strategy: Content generation strategy ('llm' or 'search')
-        commit: Whether to save changes to database
+        commit: Whether to save changes to database; otherwise suggestions are staged
+            as drafts for review (see /drafts)
         required_fields: Comma-separated list of specific fields to process
         background: If True, runs as background job and returns job_id
+        concurrency: Products processed at once (defaults to BULK_CONCURRENCY)
+        batch_size: Products packed into one LLM request (1 disables batching)
+        order: 'priority' (business value and missing fields) or 'id'
+        whole_catalog: Process every product with missing fields (always background)
     """
     # Determine which fields to process
     if required_fields:
@@ -1113,286 +2668,413 @@ async def bulk_autofill_products(
             f.strip() for f in required_fields.split(",") if f.strip() in KNOWN_COLUMNS
         ]
     else:
-        # Default essential fields for bulk processing
-        fields_to_check = [
-            "descriptionEn",
-            "descriptionAr",
-            "activeIngredients",
-            "skinType",
-            "concerns",
-            "features",
-            "ingredients",
-            "howToUse",
-            "metaTitle",
-            "metaDescription",
-        ]
+        fields_to_check = list(BULK_DEFAULT_FIELDS)
 
     # Get products with missing fields
-    products_to_process = await db_find_missing_products(fields_to_check, limit)
+    if whole_catalog:
+        # id-keyset stream: every product is visited once even as committed rows stop
+        # matching, which a cursor on the (changing) priority score cannot guarantee
+        order = "id"
+        background = True
+        total = await db_count_missing_products(fields_to_check, cached=False)
+        products_to_process = db_iter_missing_products(fields_to_check)
+    elif order == "priority":
+        # the feeder streams pages in priority order; only the total is counted up front
+        total = min(
+            limit, await db_count_missing_products(fields_to_check, cached=False)
+        )
+        products_to_process = _priority_feeder(fields_to_check, total)
+    else:
+        products_to_process = await db_find_missing_products(fields_to_check, limit)
+        total = len(products_to_process)
 
-    if not products_to_process:
+    if not total:
         return {
             "message": "No products found with missing fields",
             "fields_checked": fields_to_check,
         }
 
-    # If background processing requested, create job and return immediately
-    if background:
-        job_id = str(uuid.uuid4())
-        progress_tracker.create_job(
-            job_id=job_id,
-            total_items=len(products_to_process),
-            description=f"Bulk Autofill ({len(products_to_process)} products) - {strategy} strategy",
-        )
+    job_id = str(uuid.uuid4())
+    # keep enough products in flight for LLM batches to fill up
+    concurrency = max(concurrency or BULK_CONCURRENCY, batch_size)
+    progress_tracker.create_job(
+        job_id=job_id,
+        total_items=total,
+        description=f"Bulk Autofill ({total} products) - {strategy} strategy",
+        # only background jobs outlive the request, so only they can be resumed
+        resume=(
+            {
+                "kind": "bulk_autofill",
+                "fields": fields_to_check,
+                "strategy": strategy,
+                "commit": commit,
+                "batch_size": batch_size,
+                "concurrency": concurrency,
+                "order": order,
+                "whole_catalog": whole_catalog,
+            }
+            if background
+            else None
+        ),
+    )
+    engine = BulkAutofillEngine(
+        progress_tracker,
+        job_id,
+        _bulk_item_processor(strategy, commit, batch_size, job_id),
+        concurrency=concurrency,
+        checkpoint_of=(
+            scheduler.PriorityFeeder.cursor_of
+            if order == "priority"
+            else lambda p: p.get("id")
+        ),
+        # background results are only reported through the progress tracker
+        keep_results=not background,
+        # finished ids, so a resumed priority job skips products whose score dropped
+        done_ids=[] if order == "priority" else None,
+    )
 
-        # Start background task
+    # If background processing requested, start the job and return immediately
+    if background:
         asyncio.create_task(
-            _process_bulk_autofill_background(
-                job_id, products_to_process, fields_to_check, strategy, commit
-            )
+            _process_bulk_autofill_background(engine, products_to_process)
         )
 
         return {
             "message": "Background job started",
             "job_id": job_id,
-            "total_products": len(products_to_process),
+            "total_products": total,
             "fields_checked": fields_to_check,
+            "concurrency": engine.concurrency,
+            "order": order,
+            "whole_catalog": whole_catalog,
+            "staged": not commit and draft_store is not None,
         }
 
-    # Synchronous processing with simple progress tracking
-    job_id = str(uuid.uuid4())
-    progress_tracker.create_job(
-        job_id=job_id,
-        total_items=len(products_to_process),
-        description=f"Bulk Autofill ({len(products_to_process)} products) - {strategy} strategy",
-    )
+    try:
+        with progress_tracker.usage_scope(job_id):
+            results = await engine.run(products_to_process)
+    except Exception as e:
+        # Mark job as failed
+        progress_tracker.update_job(
+            job_id,
+            status="failed",
+            completed=True,
+            status_message=f"Job failed: {str(e)}",
+        )
+        raise
 
+    return {
+        "message": f"Bulk processing completed",
+        "job_id": job_id,
+        "total_products": total,
+        "processed_successfully": engine.processed_count,
+        "errors": engine.error_count,
+        "committed": commit,
+        "staged": not commit and draft_store is not None,
+        "strategy_used": strategy,
+        "fields_checked": fields_to_check,
+        "concurrency": engine.concurrency,
+        "batch_size": batch_size,
+        "order": order,
+        "results": results,
+    }
+
+
+async def _process_bulk_autofill_background(
+    engine: BulkAutofillEngine, products_to_process
+):
+    """Background task for processing bulk autofill operations."""
+    job_id = engine.job_id
     try:
-        results = []
-        processed_count = 0
-        error_count = 0
+        with progress_tracker.usage_scope(job_id):
+            await engine.run(products_to_process)
+    except Exception as e:
+        # Mark job as failed
+        progress_tracker.update_job(
+            job_id,
+            status="failed",
+            completed=True,
+            status_message=f"Background job failed: {str(e)}",
+        )
+    # finished jobs are removed by _job_maintenance_loop after JOB_TTL
 
-        for i, product in enumerate(products_to_process):
-            try:
-                product_id = product["id"]
-                product_title = product.get("title", "Unknown")
-                missing_keys = product.get("fields", [])
-
-                # Update progress
-                progress_tracker.update_job(
-                    job_id,
-                    current_item=i + 1,
-                    status_message=f"Processing: {product_title[:50]}...",
-                )
 
-                if missing_keys:
-                    # Generate content for this product
-                    result = await autofill(
-                        product_id,
-                        keys=",".join(missing_keys),
-                        strategy=strategy,
-                        commit=commit,
-                    )
+def _require_drafts() -> DraftStore:
+    if draft_store is None:
+        raise HTTPException(status_code=503, detail="Draft staging is disabled")
+    return draft_store
 
-                    results.append(
-                        {
-                            "product_id": product_id,
-                            "title": product_title,
-                            "processed_fields": missing_keys,
-                            "status": "success",
-                            "suggestions": result.get("suggestion", {}),
-                        }
-                    )
-                    processed_count += 1
-
-                    # Add to processed items
-                    progress_tracker.add_processed_item(
-                        job_id,
-                        {
-                            "item_id": str(product_id),
-                            "item_name": product_title,
-                            "status": "success",
-                            "details": f"Generated: {', '.join(missing_keys)}",
-                        },
-                    )
 
-            except Exception as e:
-                error_count += 1
-                error_msg = str(e)
-
-                results.append(
-                    {
-                        "product_id": product.get("id", "unknown"),
-                        "title": product.get("title", "Unknown"),
-                        "status": "error",
-                        "error": error_msg,
+def _draft_filter(selection: DraftSelection) -> Dict[str, Any]:
+    selected = {
+        "product_ids": selection.product_ids,
+        "job_id": selection.job_id,
+        "fields": selection.fields,
+    }
+    if not selection.all and not any(selected.values()):
+        raise HTTPException(
+            status_code=400,
+            detail="Select drafts by product_ids, job_id or fields, or set all=true",
+        )
+    return selected
+
+
+@app.get("/drafts")
+async def list_drafts(
+    job_id: Optional[str] = None,
+    product_id: Optional[str] = None,
+    fields: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    after: Optional[str] = None,
+):
+    """
+    Staged drafts as a diff per product: for each field the current column value,
+    the value when the draft was generated, and the staged value. Pages by product
+    id (`after` = last product id of the previous page).
+    """
+    store = _require_drafts()
+    staged = await asyncio.to_thread(
+        store.select,
+        product_ids=[product_id] if product_id else None,
+        job_id=job_id,
+        fields=_keys_list(fields) or None,
+        limit=limit,
+        after_product=after,
+    )
+    rows = await asyncio.gather(*(db_fetch_product(pid) for pid in staged))
+    products = []
+    for (pid, drafts), row in zip(staged.items(), rows):
+        row = row or {}
+        products.append(
+            {
+                "id": pid,
+                "title": row.get("title"),
+                "exists": bool(row),
+                "changes": {
+                    field: {
+                        "current": row.get(field),
+                        "previous": d["previous"],
+                        "staged": d["value"],
+                        "job_id": d["job_id"],
                     }
-                )
+                    for field, d in drafts.items()
+                },
+            }
+        )
+    return {
+        "products": products,
+        "next_cursor": products[-1]["id"] if len(products) == limit else None,
+        **(await asyncio.to_thread(store.stats)),
+    }
 
-                # Add error to processed items
-                progress_tracker.add_processed_item(
-                    job_id,
-                    {
-                        "item_id": str(product.get("id", "unknown")),
-                        "item_name": product.get("title", "Unknown"),
-                        "status": "error",
-                        "details": error_msg,
-                    },
-                )
 
-                # Continue processing other products even if one fails
-                continue
+@app.post("/drafts/approve")
+async def approve_drafts(selection: DraftSelection):
+    """
+    Write the selected drafts to their products in batched UPDATEs of
+    DB_WRITE_BATCH_SIZE rows. Applied drafts (and drafts of products that no longer
+    exist) are removed; drafts whose write failed stay staged.
 
-        # Mark job as completed
-        progress_tracker.update_job(
-            job_id,
-            status="completed",
-            status_message=f"Completed: {processed_count} successful, {error_count} errors",
+    A product is only written while its drafted columns still hold the values they
+    had when the drafts were staged; one edited since (e.g. by hand) is reported
+    under "conflicts" and its drafts stay staged for review.
+    """
+    store = _require_drafts()
+    staged = await asyncio.to_thread(store.select, **_draft_filter(selection))
+    rows = [
+        (pid, {field: d["value"] for field, d in drafts.items()})
+        for pid, drafts in staged.items()
+    ]
+    expected = [
+        {field: d["previous"] for field, d in drafts.items()} for drafts in staged.values()
+    ]
+    applied, applied_fields, not_found, conflicts, errors = 0, 0, [], [], {}
+    for start in range(0, len(rows), DB_WRITE_BATCH_SIZE):
+        chunk = rows[start : start + DB_WRITE_BATCH_SIZE]
+        outcomes = await provider_limits["db"].call(
+            db_bulk_update_products, chunk, expected[start : start + DB_WRITE_BATCH_SIZE]
         )
+        done = []
+        for (pid, updates), outcome in zip(chunk, outcomes):
+            if outcome["status"] == "error":
+                errors[pid] = outcome.get("error")
+                continue
+            if outcome["status"] == "conflict":
+                conflicts.append(pid)
+                continue
+            if outcome["status"] == "updated":
+                applied += 1
+                applied_fields += len(updates)
+            else:
+                not_found.append(pid)
+            done += [(pid, field) for field in updates]
+        await asyncio.to_thread(store.remove, done)
+    return {
+        "approved_products": applied,
+        "approved_fields": applied_fields,
+        "not_found": not_found,
+        "conflicts": conflicts,
+        "errors": errors,
+    }
 
-        return {
-            "message": f"Bulk processing completed",
-            "job_id": job_id,
-            "total_products": len(products_to_process),
-            "processed_successfully": processed_count,
-            "errors": error_count,
-            "committed": commit,
-            "strategy_used": strategy,
-            "fields_checked": fields_to_check,
-            "results": results,
-        }
 
-    except Exception as e:
-        # Mark job as failed
-        progress_tracker.update_job(
-            job_id, status="failed", status_message=f"Job failed: {str(e)}"
+@app.post("/drafts/reject")
+async def reject_drafts(selection: DraftSelection):
+    """Discard the selected drafts without writing them."""
+    store = _require_drafts()
+    rejected = await asyncio.to_thread(store.remove_matching, **_draft_filter(selection))
+    return {"rejected_fields": rejected}
+
+
+async def _resume_job(job: Dict[str, Any]):
+    """Continue a claimed bulk autofill job after its last checkpoint."""
+    resume = job.get("resume") or {}
+    if resume.get("kind") != "bulk_autofill":
+        job.update(
+            status="interrupted",
+            completed=True,
+            finished_at=time.time(),
+            current_task="Interrupted by a worker restart",
         )
-        raise
+        progress_tracker.adopt(job)
+        return
+
+    by_priority = resume.get("order") == "priority"
+    # products finished past the checkpoint are skipped via done_ids, so they count
+    done_ids = list(job.get("done_ids") or []) if by_priority else None
+    done = max(job.get("checkpoint_done", 0), len(done_ids or ()))
+    remaining = max(0, job["total"] - done)
+    if by_priority:
+        products = _priority_feeder(
+            resume["fields"], remaining, job.get("checkpoint"), seen=done_ids
+        )
+    elif resume.get("whole_catalog"):
+        products = db_iter_missing_products(
+            resume["fields"], after_id=job.get("checkpoint")
+        )
+    elif remaining:
+        products = await db_find_missing_products(
+            resume["fields"], remaining, after_id=job.get("checkpoint"), background=True
+        )
+    else:
+        products = []
+    job.update(
+        status="running",
+        current=done,
+        current_task=f"Resumed after checkpoint ({done}/{job['total']})",
+    )
+    progress_tracker.adopt(job)
+    print(f"🔁 Resuming job {job['id']} with {remaining} products left")
+    engine = BulkAutofillEngine(
+        progress_tracker,
+        job["id"],
+        _bulk_item_processor(
+            resume["strategy"], resume["commit"], resume.get("batch_size", 1), job["id"]
+        ),
+        concurrency=resume.get("concurrency", BULK_CONCURRENCY),
+        done_offset=done,
+        checkpoint_of=(
+            scheduler.PriorityFeeder.cursor_of if by_priority else lambda p: p.get("id")
+        ),
+        keep_results=False,
+        done_ids=done_ids,
+    )
+    await _process_bulk_autofill_background(engine, products)
 
 
-async def _process_bulk_autofill_background(
-    job_id: str,
-    products_to_process: list,
-    fields_to_check: list,
-    strategy: str,
-    commit: bool,
-):
-    """Background task for processing bulk autofill operations."""
-    try:
-        processed_count = 0
-        error_count = 0
+async def _job_maintenance_loop():
+    """
+    Periodically renew the leases of jobs running here, sweep expired jobs and
+    resume abandoned unfinished ones. Runs at least four times per lease so a busy
+    but slow job is never mistaken for an abandoned one.
+    """
+    interval = min(JOB_MAINTENANCE_INTERVAL, JOB_LEASE_SECONDS / 4)
+    while True:
+        try:
+            await progress_tracker.renew_leases()
+            await progress_tracker.sweep(JOB_TTL)
+            store = progress_tracker.store
+            for job in await asyncio.to_thread(store.unfinished):
+                if job["id"] in progress_tracker.jobs:
+                    continue
+                if await asyncio.to_thread(
+                    store.claim, job["id"], progress_tracker.owner, JOB_LEASE_SECONDS
+                ):
+                    asyncio.create_task(_resume_job(job))
+        except Exception as e:
+            print(f"⚠️ Job maintenance failed: {e}")
+        await asyncio.sleep(interval)
 
-        for i, product in enumerate(products_to_process):
-            try:
-                product_id = product["id"]
-                product_title = product.get("title", "Unknown")
-                missing_keys = product.get("fields", [])
-
-                # Update progress
-                progress_tracker.update_job(
-                    job_id,
-                    current_item=i + 1,
-                    status_message=f"Processing: {product_title[:50]}...",
-                )
 
-                if missing_keys:
-                    # Generate content for this product
-                    result = await autofill(
-                        product_id,
-                        keys=",".join(missing_keys),
-                        strategy=strategy,
-                        commit=commit,
-                    )
+async def db_missing_field_counts(fields: List[str]) -> Dict[str, Any]:
+    """
+    Count rows and, per field, rows where the field is NULL or empty, in one scan.
+    Always uses the asyncpg pool (also available when Prisma is active).
+    """
+    return await _products(background=True).missing_counts(fields)
 
-                    processed_count += 1
-
-                    # Add to processed items
-                    progress_tracker.add_processed_item(
-                        job_id,
-                        {
-                            "item_id": str(product_id),
-                            "item_name": product_title,
-                            "status": "success",
-                            "details": f"Generated: {', '.join(missing_keys)}",
-                        },
-                    )
 
-            except Exception as e:
-                error_count += 1
-                error_msg = str(e)
-
-                # Add error to processed items
-                progress_tracker.add_processed_item(
-                    job_id,
-                    {
-                        "item_id": str(product.get("id", "unknown")),
-                        "item_name": product.get("title", "Unknown"),
-                        "status": "error",
-                        "details": error_msg,
-                    },
-                )
+# Cached result of db_missing_field_counts over KNOWN_COLUMNS. Served while fresh;
+# when older than MISSING_STATS_TTL it is refreshed in the background and the
+# previous numbers are returned meanwhile. Writes do not invalidate it: during a
+# bulk job that would re-run the whole-table aggregate on every poll, so the TTL
+# alone bounds how stale the numbers get (cached=false forces a fresh count).
+MISSING_STATS_TTL = float(os.getenv("MISSING_STATS_TTL", "60"))
+_missing_stats_cache: Dict[str, Any] = {"value": None, "computed_at": 0.0}
+_missing_stats_refresh: Optional[asyncio.Task] = None
 
-                # Continue processing other products even if one fails
-                continue
 
-        # Mark job as completed
-        progress_tracker.update_job(
-            job_id,
-            status="completed",
-            status_message=f"Completed: {processed_count} successful, {error_count} errors",
-        )
+async def _refresh_missing_stats() -> Dict[str, Any]:
+    value = await db_missing_field_counts(sorted(KNOWN_COLUMNS))
+    _missing_stats_cache.update(value=value, computed_at=time.time())
+    return value
 
-    except Exception as e:
-        # Mark job as failed
-        progress_tracker.update_job(
-            job_id, status="failed", status_message=f"Background job failed: {str(e)}"
-        )
-    finally:
-        # Clean up job after 1 hour
-        await asyncio.sleep(3600)
-        progress_tracker.delete_job(job_id)
+
+async def _get_missing_field_counts(cached: bool) -> Dict[str, Any]:
+    global _missing_stats_refresh
+    value = _missing_stats_cache["value"]
+    if not cached or value is None:
+        return await _refresh_missing_stats()
+    stale = time.time() - _missing_stats_cache["computed_at"] > MISSING_STATS_TTL
+    if stale and (_missing_stats_refresh is None or _missing_stats_refresh.done()):
+        _missing_stats_refresh = asyncio.create_task(_refresh_missing_stats())
+    return value
 
 
 @app.get("/products/missing-stats")
-async def get_missing_stats():
+async def get_missing_stats(cached: bool = True):
     """
     Get statistics about missing fields across all products.
     Useful for understanding what content needs to be generated.
+
+    Counts are exact over the whole table (one aggregate query). With cached=true
+    (default) a recent result may be served while a refresh runs in the background.
     """
-    # Get sample of products to analyze
-    products = await db_find_missing_products(list(KNOWN_COLUMNS), limit=1000)
+    counts = await _get_missing_field_counts(cached)
+    total_products = counts["total"]
 
     field_stats = {}
-    total_products = len(products)
-
-    # Initialize counters
-    for field in KNOWN_COLUMNS:
-        field_stats[field] = {"missing_count": 0, "completion_rate": 0}
-
-    # Count missing fields
-    for product in products:
-        missing_fields = product.get("fields", [])
-        for field in missing_fields:
-            if field in field_stats:
-                field_stats[field]["missing_count"] += 1
-
-    # Calculate completion rates
-    for field in field_stats:
-        missing_count = field_stats[field]["missing_count"]
-        field_stats[field]["completion_rate"] = round(
-            (
-                ((total_products - missing_count) / total_products * 100)
-                if total_products > 0
-                else 0
+    for field, missing_count in counts["missing"].items():
+        field_stats[field] = {
+            "missing_count": missing_count,
+            "completion_rate": round(
+                (
+                    ((total_products - missing_count) / total_products * 100)
+                    if total_products > 0
+                    else 0
+                ),
+                1,
             ),
-            1,
-        )
+        }
 
     # Sort by completion rate (lowest first - highest priority)
     sorted_fields = sorted(field_stats.items(), key=lambda x: x[1]["completion_rate"])
 
     return {
         "total_products_analyzed": total_products,
+        "computed_at": datetime.fromtimestamp(
+            _missing_stats_cache["computed_at"]
+        ).isoformat(),
         "field_statistics": dict(sorted_fields),
         "most_needed_fields": [
             field
@@ -0,0 +1,197 @@
+"""
+Minimal Prometheus instrumentation for the admin service.
+
+Counters, gauges and histograms render in the Prometheus text exposition format
+(version 0.0.4) without a client library. Updating a metric is a dict lookup and an
+addition under the event loop (no locks), so instrumenting hot paths costs next to
+nothing. Values that already live elsewhere (pool sizes, running jobs, accounting
+totals) are read at scrape time through `collect` callbacks instead of being
+mirrored on every change.
+
+- `REGISTRY.render()`: exposition text for every registered metric
+- `timed(histogram, **labels)`: decorator observing an async function's duration
+- `RouteLatencyMiddleware`: ASGI middleware observing request duration per route
+  template, method and status
+"""
+import bisect
+import functools
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format(name: str, labels: Labels, value: float) -> str:
+    if labels:
+        escaped = ",".join(
+            '{}="{}"'.format(
+                k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+            )
+            for k, v in labels
+        )
+        name = f"{name}{{{escaped}}}"
+    if value == float("inf"):
+        return f"{name} +Inf"
+    return f"{name} {value!r}" if isinstance(value, float) else f"{name} {value}"
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: List["Metric"] = []
+
+    def register(self, metric: "Metric") -> "Metric":
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.lines())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class Metric:
+    type = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        collect: Optional[Callable[[], Iterable[Tuple[Dict[str, Any], float]]]] = None,
+        registry: Optional[Registry] = REGISTRY,
+    ):
+        self.name = name
+        self.help = help
+        self.collect = collect
+        self.values: Dict[Labels, float] = {}
+        if registry is not None:
+            registry.register(self)
+
+    def lines(self) -> List[str]:
+        if self.collect is not None:
+            try:
+                samples = [(_labels(l), v) for l, v in self.collect()]
+            except Exception as e:  # a broken collector must not break the scrape
+                print(f"⚠️ Metric {self.name} collection failed: {e}")
+                samples = []
+        else:
+            samples = list(self.values.items())
+        return [_format(self.name, labels, value) for labels, value in samples]
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = _labels(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def set(self, value: float, **labels):
+        self.values[_labels(labels)] = value
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, buckets=DEFAULT_BUCKETS, **kwargs):
+        super().__init__(name, help, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (+Inf last), sum, count]
+        self.series: Dict[Labels, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = _labels(labels)
+        series = self.series.get(key)
+        if series is None:
+            series = self.series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def lines(self) -> List[str]:
+        out = []
+        for labels, (counts, total, count) in list(self.series.items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                out.append(
+                    _format(f"{self.name}_bucket", labels + (("le", le),), cumulative)
+                )
+            out.append(_format(f"{self.name}_sum", labels, total))
+            out.append(_format(f"{self.name}_count", labels, count))
+        return out
+
+
+def timed(histogram: Histogram, **labels):
+    """Observe the wall time of every call of the decorated coroutine function."""
+
+    def decorate(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started, **labels)
+
+        return wrapper
+
+    return decorate
+
+
+class RouteLatencyMiddleware:
+    """
+    Observe HTTP request durations into `histogram`, labelled with the matched route
+    template (not the raw path, to keep label cardinality bounded), method and
+    status. Server-sent event streams are skipped: their duration is the lifetime of
+    the connection, not a latency.
+    """
+
+    def __init__(self, app, histogram: Histogram):
+        self.app = app
+        self.histogram = histogram
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = {"code": 500, "stream": False}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                for key, value in message.get("headers", ()):
+                    if key == b"content-type" and value.startswith(b"text/event-stream"):
+                        status["stream"] = True
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if not status["stream"]:
+                route = scope.get("route")
+                self.histogram.observe(
+                    time.perf_counter() - started,
+                    route=getattr(route, "path", "unmatched"),
+                    method=scope.get("method", ""),
+                    status=status["code"],
+                )
@@ -0,0 +1,546 @@
+"""
+Data access for the products table.
+
+One interface, two adapters:
+
+- `PgProducts`: asyncpg. Statements come from `ProductSQL`, which builds each SQL
+  text once per key set / column set and returns the identical string afterwards.
+  asyncpg keeps a per-connection cache of prepared statements keyed by SQL text, so
+  repeated calls skip both the string building and the server-side parse/plan.
+  Reads select only the columns the caller needs.
+- `PrismaProducts`: optional Prisma client behind the same methods. Queries Prisma
+  cannot express (priority pages, per-field missing counts, page + count in one
+  round trip) go to the asyncpg adapter it wraps.
+
+Both return plain dicts; missing-product rows are {"id", "title", "fields"}.
+"""
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    from . import index_advisor, scheduler
+except ImportError:  # imported as a top-level module
+    import index_advisor
+    import scheduler
+
+quote_ident = index_advisor.quote_ident
+
+
+def to_dict(obj: Any) -> Dict[str, Any]:
+    if obj is None:
+        return {}
+    if hasattr(obj, "dict"):
+        return obj.dict()
+    if isinstance(obj, dict):
+        return obj
+    try:
+        return dict(obj)
+    except Exception:
+        return {k: getattr(obj, k) for k in dir(obj) if not k.startswith("_")}
+
+
+def missing_row(r: Any, key_list: Sequence[str]) -> Dict[str, Any]:
+    return {
+        "id": r.get("id"),
+        "title": r.get("title"),
+        "fields": {k: r.get(k) for k in key_list},
+    }
+
+
+def _sql_text(value: Any) -> Optional[str]:
+    """Render a value for a text[] parameter that is cast back to the column type."""
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+class ProductSQL:
+    """
+    SQL text for the products table, memoized per (statement, key/column set).
+
+    `column_types` (information_schema data types) picks index-friendly missing
+    predicates and restricts `product_columns` to columns that exist; when it is
+    empty (detection failed) full rows are read. `column_sql_types` provides the
+    casts for batched writes.
+    """
+
+    def __init__(
+        self,
+        quoted_table: str,
+        column_types: Dict[str, str],
+        column_sql_types: Dict[str, str],
+        product_columns: Iterable[str],
+        priority_weights: Optional[Dict[str, float]] = None,
+    ):
+        self.table = quoted_table
+        self.column_types = column_types
+        self.column_sql_types = column_sql_types
+        self.priority_weights = priority_weights or {}
+        columns = list(dict.fromkeys(["id", "title", *product_columns]))
+        self.product_columns: Optional[Tuple[str, ...]] = (
+            tuple(c for c in columns if c in column_types) if column_types else None
+        )
+        self._cache: Dict[tuple, str] = {}
+        self._source = (
+            quoted_table, id(column_types), id(column_sql_types), id(priority_weights)
+        )
+
+    def matches(self, quoted_table, column_types, column_sql_types, weights) -> bool:
+        """True while built from these exact objects (startup detection replaces them)."""
+        return self._source == (quoted_table, id(column_types), id(column_sql_types), id(weights))
+
+    def _memo(self, key: tuple, build: Callable[[], str]) -> str:
+        sql = self._cache.get(key)
+        if sql is None:
+            sql = self._cache[key] = build()
+        return sql
+
+    def _select_list(self, columns: Optional[Sequence[str]]) -> str:
+        if columns is None:
+            return "*"
+        return ", ".join(quote_ident(c) for c in dict.fromkeys(columns))
+
+    def missing_where(self, key_list: Sequence[str]) -> str:
+        return self._memo(
+            ("where", tuple(key_list)),
+            lambda: "("
+            + " OR ".join(
+                index_advisor.missing_predicate(k, self.column_types.get(k))
+                for k in key_list
+            )
+            + ")",
+        )
+
+    def missing_page(self, key_list: Sequence[str], mode: str) -> str:
+        """
+        One page of products missing any of key_list. `mode` is "first", "offset"
+        ($2 = offset), "after" or "before" ($2 = id; rows come back descending).
+        $1 is the limit.
+        """
+
+        def build():
+            cols = self._select_list(["id", "title", *key_list])
+            where = self.missing_where(key_list)
+            order, tail = "ASC", ""
+            if mode == "after":
+                where += f" AND {quote_ident('id')} > $2"
+            elif mode == "before":
+                where += f" AND {quote_ident('id')} < $2"
+                order = "DESC"
+            elif mode == "offset":
+                tail = " OFFSET $2"
+            return (
+                f"SELECT {cols} FROM {self.table} WHERE {where} "
+                f"ORDER BY {quote_ident('id')} {order} LIMIT $1{tail}"
+            )
+
+        return self._memo(("page", tuple(key_list), mode), build)
+
+    def missing_page_with_count(self, key_list: Sequence[str], mode: str) -> str:
+        return self._memo(
+            ("page+count", tuple(key_list), mode),
+            lambda: (
+                f'SELECT c."__total", p.* FROM (SELECT count(*) AS "__total" '
+                f"FROM {self.table} WHERE {self.missing_where(key_list)}) c "
+                f"LEFT JOIN LATERAL ({self.missing_page(key_list, mode)}) p ON true"
+            ),
+        )
+
+    def count_missing(self, key_list: Sequence[str]) -> str:
+        return self._memo(
+            ("count", tuple(key_list)),
+            lambda: f"SELECT COUNT(*) FROM {self.table} WHERE {self.missing_where(key_list)}",
+        )
+
+    def missing_counts(self, fields: Sequence[str]) -> str:
+        def build():
+            filters = ", ".join(
+                f"count(*) FILTER (WHERE "
+                f"{index_advisor.missing_predicate(f, self.column_types.get(f))}) AS m{i}"
+                for i, f in enumerate(fields)
+            )
+            return f"SELECT count(*) AS total, {filters} FROM {self.table}"
+
+        return self._memo(("counts", tuple(fields)), build)
+
+    def priority_page(self, key_list: Sequence[str], after: bool) -> str:
+        """Next $1 products by descending priority then id, after ($2, $3) if `after`."""
+
+        def build():
+            cols = self._select_list(["id", "title", *key_list])
+            score = scheduler.priority_sql(
+                list(key_list), self.column_types, self.priority_weights
+            )
+            sql = (
+                f'SELECT * FROM (SELECT {cols}, ({score})::float8 AS "__priority" '
+                f"FROM {self.table} WHERE {self.missing_where(key_list)}) p"
+            )
+            if after:
+                sql += f' WHERE ("__priority", {quote_ident("id")}) < ($2::float8, $3)'
+            return sql + f' ORDER BY "__priority" DESC, {quote_ident("id")} DESC LIMIT $1'
+
+        return self._memo(("priority", tuple(key_list), after), build)
+
+    def fetch(self) -> str:
+        return self._memo(
+            ("fetch",),
+            lambda: f"SELECT {self._select_list(self.product_columns)} "
+            f"FROM {self.table} WHERE {quote_ident('id')} = $1",
+        )
+
+    def update(self, columns: Sequence[str], returning: Optional[Sequence[str]]) -> str:
+        """UPDATE of `columns` ($1..$n) for id $n+1, returning `returning` (None = product columns)."""
+
+        def build():
+            sets = ", ".join(f"{quote_ident(c)} = ${i}" for i, c in enumerate(columns, 1))
+            ret = self._select_list(
+                returning if returning is not None else self.product_columns
+            )
+            return (
+                f"UPDATE {self.table} SET {sets} "
+                f"WHERE {quote_ident('id')} = ${len(columns) + 1} RETURNING {ret}"
+            )
+
+        key = ("update", tuple(columns), tuple(returning) if returning is not None else None)
+        return self._memo(key, build)
+
+    def bulk_update(self, columns: Sequence[str], conditional: bool = False) -> str:
+        """
+        UPDATE joining the table to unnest()-ed parameter arrays: $1 holds ids and
+        $2.. one text array per column, cast back to the column's type. NULL entries
+        keep the current value, so rows in one batch may update different column sets.
+
+        `conditional` adds one more text array per column with the value each row is
+        expected to still hold: a row is only updated when every column it sets IS
+        NOT DISTINCT FROM its expected value. The statement then returns one
+        (id, updated, found) row per input row, so conflicts and missing rows can be
+        told apart.
+        """
+
+        def build():
+            id_type = self.column_sql_types.get("id", "text")
+            aliases = [f"c{i}" for i in range(len(columns))]
+            sets = ", ".join(
+                f"{quote_ident(col)} = coalesce(u.{alias}::"
+                f"{self.column_sql_types.get(col, 'text')}, t.{quote_ident(col)})"
+                for col, alias in zip(columns, aliases)
+            )
+            n = len(columns) * (2 if conditional else 1)
+            arrays = ", ".join(f"${i + 2}::text[]" for i in range(n))
+            if not conditional:
+                return (
+                    f"UPDATE {self.table} AS t SET {sets} "
+                    f"FROM unnest($1::text[], {arrays}) AS u(id, {', '.join(aliases)}) "
+                    f"WHERE t.{quote_ident('id')} = u.id::{id_type} "
+                    f"RETURNING t.{quote_ident('id')}::text AS id"
+                )
+            expected = [f"p{i}" for i in range(len(columns))]
+            unchanged = " AND ".join(
+                f"(u.{alias} IS NULL OR t.{quote_ident(col)} IS NOT DISTINCT FROM "
+                f"u.{prev}::{self.column_sql_types.get(col, 'text')})"
+                for col, alias, prev in zip(columns, aliases, expected)
+            )
+            return (
+                f"WITH u AS (SELECT * FROM unnest($1::text[], {arrays}) "
+                f"AS u(id, {', '.join(aliases + expected)})), "
+                f"upd AS (UPDATE {self.table} AS t SET {sets} FROM u "
+                f"WHERE t.{quote_ident('id')} = u.id::{id_type} AND {unchanged} "
+                f"RETURNING t.{quote_ident('id')}::text AS id) "
+                f"SELECT u.id, upd.id IS NOT NULL AS updated, EXISTS (SELECT 1 FROM "
+                f"{self.table} AS x WHERE x.{quote_ident('id')} = u.id::{id_type}) AS found "
+                f"FROM u LEFT JOIN upd ON upd.id = u.id"
+            )
+
+        return self._memo(("bulk_update", tuple(columns), conditional), build)
+
+
+def _page_args(
+    limit: int, offset: int, after_id: Optional[str], before_id: Optional[str]
+) -> Tuple[str, List[Any]]:
+    if after_id is not None:
+        return "after", [limit, after_id]
+    if before_id is not None:
+        return "before", [limit, before_id]
+    if offset:
+        return "offset", [limit, offset]
+    return "first", [limit]
+
+
+class PgProducts:
+    """asyncpg adapter; `sql` supplies the memoized statements."""
+
+    def __init__(self, pool, sql: ProductSQL):
+        self.pool = pool
+        self.sql = sql
+
+    def page_sql(
+        self,
+        key_list: Sequence[str],
+        limit: int,
+        offset: int = 0,
+        after_id: Optional[str] = None,
+        before_id: Optional[str] = None,
+    ) -> Tuple[str, List[Any]]:
+        mode, args = _page_args(limit, offset, after_id, before_id)
+        return self.sql.missing_page(key_list, mode), args
+
+    async def find_missing(
+        self,
+        key_list: Sequence[str],
+        limit: int,
+        offset: int = 0,
+        after_id: Optional[str] = None,
+        before_id: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        sql, args = self.page_sql(key_list, limit, offset, after_id, before_id)
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(sql, *args)
+        products = [missing_row(r, key_list) for r in rows]
+        if before_id:
+            products.reverse()
+        return products
+
+    async def find_missing_page(
+        self,
+        key_list: Sequence[str],
+        limit: int,
+        after_id: Optional[str] = None,
+        before_id: Optional[str] = None,
+        with_count: bool = True,
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """Rows of one page (ascending) and, with `with_count`, the total in the same round trip."""
+        mode, args = _page_args(limit, 0, after_id, before_id)
+        total = None
+        async with self.pool.acquire() as conn:
+            if with_count:
+                rows = await conn.fetch(self.sql.missing_page_with_count(key_list, mode), *args)
+                total = rows[0]["__total"] if rows else 0
+                rows = [r for r in rows if r.get("id") is not None]
+            else:
+                rows = await conn.fetch(self.sql.missing_page(key_list, mode), *args)
+        products = [missing_row(r, key_list) for r in rows]
+        if before_id:
+            products.reverse()
+        return products, total
+
+    async def count_missing(self, key_list: Sequence[str]) -> int:
+        async with self.pool.acquire() as conn:
+            return await conn.fetchval(self.sql.count_missing(key_list)) or 0
+
+    async def missing_counts(self, fields: Sequence[str]) -> Dict[str, Any]:
+        async with self.pool.acquire() as conn:
+            row = await conn.fetchrow(self.sql.missing_counts(fields))
+        return {
+            "total": row["total"],
+            "missing": {f: row[f"m{i}"] for i, f in enumerate(fields)},
+        }
+
+    async def find_priority(
+        self, key_list: Sequence[str], limit: int, after: Optional[list] = None
+    ) -> List[Dict[str, Any]]:
+        args: List[Any] = [limit] + (list(after[:2]) if after else [])
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(self.sql.priority_page(key_list, bool(after)), *args)
+        return [{**missing_row(r, key_list), "priority": r.get("__priority")} for r in rows]
+
+    async def fetch(self, product_id: str) -> Optional[Dict[str, Any]]:
+        async with self.pool.acquire() as conn:
+            row = await conn.fetchrow(self.sql.fetch(), product_id)
+        return to_dict(row) if row else None
+
+    async def update(
+        self,
+        product_id: str,
+        updates: Dict[str, Any],
+        returning: Optional[Sequence[str]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Apply updates; returns the updated row (`returning` columns) or None if not found."""
+        columns = list(updates)
+        async with self.pool.acquire() as conn:
+            row = await conn.fetchrow(
+                self.sql.update(columns, returning),
+                *[updates[c] for c in columns],
+                product_id,
+            )
+        return to_dict(row) if row else None
+
+    async def bulk_update(
+        self, rows: List[tuple], expected: Optional[List[Dict[str, Any]]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Apply many (product_id, updates) pairs with one UPDATE ... FROM unnest(...) in
+        one transaction. If the batch statement fails, the batch is retried row by row
+        (one savepoint each) so good rows are still written and the failing ones are
+        identified. Returns one {"status": "updated"|"not_found"|"error"} per row.
+
+        With `expected` (one {column: value} per row, covering the columns the row
+        sets) a row whose current values differ is left alone and reported as
+        {"status": "conflict"} (see ProductSQL.bulk_update).
+        """
+        columns = sorted({col for _, updates in rows for col in updates})
+        conditional = expected is not None
+
+        def arrays(batch, expect):
+            args = [[str(product_id) for product_id, _ in batch]]
+            args += [[_sql_text(updates.get(col)) for _, updates in batch] for col in columns]
+            if conditional:
+                args += [[_sql_text(e.get(col)) for e in expect] for col in columns]
+            return args
+
+        def statuses(records, ids):
+            if not conditional:
+                found = {r["id"] for r in records}
+                return [{"status": "updated" if pid in found else "not_found"} for pid in ids]
+            by_id = {r["id"]: r for r in records}
+            return [
+                {
+                    "status": "updated" if by_id[pid]["updated"]
+                    else "conflict" if by_id[pid]["found"]
+                    else "not_found"
+                }
+                for pid in ids
+            ]
+
+        ids = [str(product_id) for product_id, _ in rows]
+        async with self.pool.acquire() as conn:
+            try:
+                async with conn.transaction():
+                    updated = await conn.fetch(
+                        self.sql.bulk_update(columns, conditional), *arrays(rows, expected)
+                    )
+                return statuses(updated, ids)
+            except Exception as batch_error:
+                print(
+                    f"Batched update of {len(rows)} rows failed, retrying per row: {batch_error}"
+                )
+
+            results = []
+            async with conn.transaction():
+                for i, (product_id, updates) in enumerate(rows):
+                    try:
+                        async with conn.transaction():  # savepoint per row
+                            updated = await conn.fetch(
+                                self.sql.bulk_update(columns, conditional),
+                                *arrays([(product_id, updates)], expected and [expected[i]]),
+                            )
+                        results += statuses(updated, [str(product_id)])
+                    except Exception as e:
+                        results.append({"status": "error", "error": str(e)})
+            return results
+
+
+async def notify_changed(pool, channel: str, ids: Sequence[str]):
+    """NOTIFY `channel` once per product id (cross-worker cache invalidation)."""
+    async with pool.acquire() as conn:
+        await conn.execute(
+            "SELECT pg_notify($1, id) FROM unnest($2::text[]) AS id",
+            channel,
+            [str(i) for i in ids],
+        )
+
+
+class PrismaProducts:
+    """Prisma adapter; SQL-only queries are delegated to the wrapped `PgProducts`."""
+
+    def __init__(self, prisma, pg: PgProducts):
+        self.prisma = prisma
+        self.pg = pg
+
+    @staticmethod
+    def _missing_where(key_list: Sequence[str]) -> Dict[str, Any]:
+        or_clauses = []
+        for k in key_list:
+            or_clauses.append({k: None})
+            or_clauses.append({k: ""})
+        return {"OR": or_clauses} if or_clauses else {}
+
+    @property
+    def sql(self) -> ProductSQL:
+        return self.pg.sql
+
+    def page_sql(self, *args, **kwargs):
+        return self.pg.page_sql(*args, **kwargs)
+
+    async def find_missing(
+        self,
+        key_list: Sequence[str],
+        limit: int,
+        offset: int = 0,
+        after_id: Optional[str] = None,
+        before_id: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        select = {k: True for k in key_list}
+        select.update({"id": True, "title": True})
+        cursor_id = after_id or before_id
+        rows = await self.prisma.product.find_many(
+            where=self._missing_where(key_list),
+            select=select,
+            order={"id": "asc"},
+            cursor={"id": cursor_id} if cursor_id else None,
+            take=-limit if before_id else limit,
+            skip=1 if cursor_id else offset,
+        )
+        return [missing_row(to_dict(r), key_list) for r in rows]
+
+    async def find_missing_page(
+        self,
+        key_list: Sequence[str],
+        limit: int,
+        after_id: Optional[str] = None,
+        before_id: Optional[str] = None,
+        with_count: bool = True,
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        products = await self.find_missing(
+            key_list, limit, after_id=after_id, before_id=before_id
+        )
+        total = await self.count_missing(key_list) if with_count else None
+        return products, total
+
+    async def count_missing(self, key_list: Sequence[str]) -> int:
+        return await self.prisma.product.count(where=self._missing_where(key_list))
+
+    async def missing_counts(self, fields: Sequence[str]) -> Dict[str, Any]:
+        return await self.pg.missing_counts(fields)
+
+    async def find_priority(self, key_list, limit, after=None):
+        return await self.pg.find_priority(key_list, limit, after)
+
+    async def fetch(self, product_id: str) -> Optional[Dict[str, Any]]:
+        row = await self.prisma.product.find_unique(where={"id": product_id})
+        return to_dict(row) if row else None
+
+    async def update(
+        self,
+        product_id: str,
+        updates: Dict[str, Any],
+        returning: Optional[Sequence[str]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        row = await self.prisma.product.update(where={"id": product_id}, data=updates)
+        return to_dict(row) if row else None
+
+    async def bulk_update(
+        self, rows: List[tuple], expected: Optional[List[Dict[str, Any]]] = None
+    ) -> List[Dict[str, Any]]:
+        results = []
+        for i, (product_id, updates) in enumerate(rows):
+            try:
+                if expected is None:
+                    row = await self.prisma.product.update(
+                        where={"id": product_id}, data=updates
+                    )
+                    results.append({"status": "updated" if row else "not_found"})
+                    continue
+                # conditional write: only while the columns still hold expected[i]
+                count = await self.prisma.product.update_many(
+                    where={"id": product_id, **expected[i]}, data=updates
+                )
+                if count:
+                    results.append({"status": "updated"})
+                elif await self.prisma.product.find_unique(where={"id": product_id}):
+                    results.append({"status": "conflict"})
+                else:
+                    results.append({"status": "not_found"})
+            except Exception as e:
+                results.append({"status": "error", "error": str(e)})
+        return results
@@ -0,0 +1,214 @@
+"""
+Local stand-ins for the LLM and search providers, with fault injection.
+
+The service reaches its providers through two interfaces (see clients.py):
+
+- LLM: an object with the `AsyncOpenAI` surface the app uses,
+  `await llm.chat.completions.create(**kwargs)` returning a response with
+  `choices[0].message.content` and `usage`
+- search: `await clients.serpapi_search(api_key, query, num)` returning a
+  SerpAPI-shaped {"organic_results": [{"title", "snippet", "link"}, ...]}
+
+With LLM_PROVIDER=fake / SEARCH_PROVIDER=fake these are served by `FakeLLM` and
+`FakeSearch` instead, so autofill, bulk autofill and lang_nodes run without API
+keys. `FakeLLM` fills the request's JSON-schema `response_format` with valid sample
+values, so answers pass `suggestion_schema.validate` and can be committed.
+
+Both fakes apply `Faults` before answering: latency with jitter, a rate of 5xx
+errors and a rate of 429s carrying a Retry-After header. The 429s are recognised
+by `ProviderLimiter` exactly like the real APIs', so bulk-job concurrency, backoff
+and throughput can be load-tested offline.
+"""
+import asyncio
+import json
+import os
+import random
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+try:
+    from .suggestion_schema import MAX_LENGTHS
+except ImportError:  # imported as a top-level module
+    from suggestion_schema import MAX_LENGTHS
+
+
+class ProviderError(Exception):
+    """An injected provider failure; `status_code` 429 is retried by ProviderLimiter."""
+
+    def __init__(self, status_code: int, retry_after: Optional[float] = None):
+        super().__init__(f"fake provider returned HTTP {status_code}")
+        self.status_code = status_code
+        headers = {} if retry_after is None else {"retry-after": f"{retry_after:g}"}
+        self.response = SimpleNamespace(status_code=status_code, headers=headers)
+
+
+class Faults:
+    """Latency, error and throttling injected into every fake provider call."""
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        retry_after: float = 1.0,
+        seed: Optional[int] = None,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self._random = random.Random(seed)
+        self.calls = 0
+        self.errors = 0
+        self.throttled = 0
+
+    @classmethod
+    def from_env(cls, prefix: str) -> "Faults":
+        """Read {prefix}_LATENCY, _JITTER, _ERROR_RATE, _THROTTLE_RATE and _RETRY_AFTER."""
+
+        def number(name: str, default: float) -> float:
+            return float(os.getenv(f"{prefix}_{name}", str(default)))
+
+        seed = os.getenv("FAKE_PROVIDER_SEED")
+        return cls(
+            latency=number("LATENCY", 0.0),
+            jitter=number("JITTER", 0.0),
+            error_rate=number("ERROR_RATE", 0.0),
+            throttle_rate=number("THROTTLE_RATE", 0.0),
+            retry_after=number("RETRY_AFTER", 1.0),
+            seed=int(seed) if seed else None,
+        )
+
+    async def apply(self):
+        self.calls += 1
+        delay = self.latency + self._random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        roll = self._random.random()
+        if roll < self.throttle_rate:
+            self.throttled += 1
+            raise ProviderError(429, self.retry_after)
+        if roll < self.throttle_rate + self.error_rate:
+            self.errors += 1
+            raise ProviderError(503)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "latency": self.latency,
+            "jitter": self.jitter,
+            "error_rate": self.error_rate,
+            "throttle_rate": self.throttle_rate,
+            "calls": self.calls,
+            "errors": self.errors,
+            "throttled": self.throttled,
+        }
+
+
+def _sample(schema: Dict[str, Any], name: str, rng: random.Random, count: int) -> Any:
+    """A value valid for `schema` (the subset suggestion_schema produces)."""
+    types = schema.get("type", "string")
+    kind = next((t for t in types if t != "null"), "null") if isinstance(types, list) else types
+    if kind == "object":
+        return {
+            key: _sample(sub, key, rng, count)
+            for key, sub in schema.get("properties", {}).items()
+        }
+    if kind == "array":
+        items = schema.get("items", {})
+        if "enum" in items:
+            return rng.sample(items["enum"], k=min(2, len(items["enum"])))
+        return [_sample(items, name, rng, count) for _ in range(count)]
+    if kind == "boolean":
+        return rng.random() < 0.5
+    if kind == "integer":
+        return rng.randint(0, 200)
+    if kind == "number":
+        return round(rng.uniform(5, 80), 2)
+    if kind == "null":
+        return None
+    # Arabic columns and translations get Arabic text
+    arabic = name.endswith("Ar") or name == "translations"
+    text = f"نص تجريبي لحقل {name}" if arabic else f"Sample {name} text"
+    return text[: MAX_LENGTHS.get(name, len(text))]
+
+
+def _segment_count(messages: List[Dict[str, Any]]) -> int:
+    """Number of segments in a translation prompt ("Segments (JSON array): [...]")."""
+    for message in messages:
+        content = message.get("content") or ""
+        marker = content.find("Segments (JSON array):")
+        if marker >= 0:
+            start = content.index("[", marker)
+            try:
+                return len(json.JSONDecoder().raw_decode(content[start:])[0])
+            except ValueError:
+                break
+    return 1
+
+
+class _Completions:
+    def __init__(self, owner: "FakeLLM"):
+        self.owner = owner
+
+    async def create(self, model: str = "fake", messages=(), response_format=None, **kwargs):
+        owner = self.owner
+        await owner.faults.apply()
+        if response_format and response_format.get("type") == "json_schema":
+            spec = response_format["json_schema"]
+            answer = _sample(
+                spec["schema"], spec.get("name", ""), owner._random, _segment_count(messages)
+            )
+            content = json.dumps(answer, ensure_ascii=False)
+        else:
+            content = "{}"
+        prompt_chars = sum(len(m.get("content") or "") for m in messages)
+        return SimpleNamespace(
+            model=model,
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            # ~4 characters per token, enough for cost accounting to be exercised
+            usage=SimpleNamespace(
+                prompt_tokens=prompt_chars // 4 + 1,
+                completion_tokens=len(content) // 4 + 1,
+            ),
+        )
+
+
+class FakeLLM:
+    """OpenAI-compatible client answering locally (see module docstring)."""
+
+    def __init__(self, faults: Optional[Faults] = None, seed: Optional[int] = None):
+        self.faults = faults or Faults()
+        self._random = random.Random(seed)
+        self.chat = SimpleNamespace(completions=_Completions(self))
+
+    async def close(self):
+        pass
+
+
+class FakeSearch:
+    """SerpAPI-shaped search results with "field: value" snippets."""
+
+    SNIPPETS = [
+        "usage: Apply morning and evening to clean skin.",
+        "concerns: Dryness, dullness and fine lines.",
+        "skinType: All skin types.",
+        "features: Fragrance free, dermatologist tested.",
+    ]
+
+    def __init__(self, faults: Optional[Faults] = None):
+        self.faults = faults or Faults()
+
+    async def search(self, query: str, num: int = 3) -> Dict[str, Any]:
+        await self.faults.apply()
+        return {
+            "organic_results": [
+                {
+                    "title": f"{query} | Product details",
+                    "snippet": self.SNIPPETS[i % len(self.SNIPPETS)],
+                    "link": f"https://example.com/{i}",
+                }
+                for i in range(num)
+            ]
+        }
@@ -0,0 +1,103 @@
+"""
+In-process read-through cache of product rows.
+
+One edit/preview/commit cycle in the admin UI reads the same product several times
+(product page, autofill, autofill-all, the page again after saving). `RowCache`
+keeps recently read rows in an LRU with a TTL so those repeats skip the database.
+
+Invalidation:
+
+- writes made by this worker replace the cached row with the row the UPDATE
+  returned, or evict it (batched writes)
+- a row is only stored if nothing invalidated it while it was being read (`begin`
+  returns a token checked by `put`), and never over a row with a newer
+  `updatedAt`, so a slow read cannot resurrect stale data
+- with several workers, writes are announced on a Postgres NOTIFY channel and every
+  worker evicts the ids it hears about (`db_pool.listen`); the TTL bounds staleness
+  if notifications are missed
+"""
+import copy
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional
+
+
+class RowCache:
+    def __init__(self, max_entries: int = 1000, ttl: float = 60.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._rows: "OrderedDict[str, tuple]" = OrderedDict()
+        # invalidation counter, and per id (counter value, time) of its last one
+        self._epoch = 0
+        self._invalidated: Dict[str, tuple] = {}
+        self._cleared = -1
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def get(self, row_id: str) -> Optional[Dict[str, Any]]:
+        entry = self._rows.get(row_id)
+        if entry is None or time.monotonic() - entry[1] > self.ttl:
+            if entry is not None:
+                del self._rows[row_id]
+            self.misses += 1
+            return None
+        self._rows.move_to_end(row_id)
+        self.hits += 1
+        return copy.copy(entry[0])
+
+    def begin(self, row_id: str) -> int:
+        """Token to pass to `put` for a read starting now."""
+        return self._epoch
+
+    def put(self, row_id: str, row: Dict[str, Any], token: Optional[int] = None):
+        if not self.enabled:
+            return
+        if token is not None and (
+            self._cleared >= token or self._invalidated.get(row_id, (-1,))[0] >= token
+        ):
+            return  # invalidated while the row was being read
+        current = self._rows.get(row_id)
+        if current is not None:
+            new, old = row.get("updatedAt"), current[0].get("updatedAt")
+            if new is not None and old is not None and new < old:
+                return
+        self._rows[row_id] = (copy.copy(row), time.monotonic())
+        self._rows.move_to_end(row_id)
+        while len(self._rows) > self.max_entries:
+            self._rows.popitem(last=False)
+
+    def invalidate(self, row_ids: Iterable[str]):
+        now = time.monotonic()
+        for row_id in row_ids:
+            row_id = str(row_id)
+            self._invalidated[row_id] = (self._epoch, now)
+            self._rows.pop(row_id, None)
+            self.invalidations += 1
+        self._epoch += 1
+        if len(self._invalidated) > 4 * max(1, self.max_entries):
+            # marks only matter to reads in flight, which take far less than the TTL
+            self._invalidated = {
+                k: v for k, v in self._invalidated.items() if now - v[1] < self.ttl
+            }
+
+    def clear(self):
+        """Drop every row, including reads in flight (e.g. after missed notifications)."""
+        self.invalidations += len(self._rows)
+        self._rows.clear()
+        self._cleared = self._epoch
+        self._epoch += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._rows),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
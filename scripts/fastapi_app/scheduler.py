@@ -0,0 +1,152 @@
+"""
+Priority ordering for bulk autofill runs.
+
+Products are ranked by a score computed in SQL from business-value signals (active,
+featured, in stock, missing SEO fields, views and sales) plus the number of
+requested fields they are missing, so a limited LLM budget goes to the products
+that matter first instead of arbitrary table order.
+
+- `priority_sql`: the score expression for the products table
+- `PriorityFeeder`: async iterator over products in descending score, refilled page
+  by page from the database (the next page is fetched while the current one is
+  being processed)
+
+Signals whose column does not exist in the table are skipped.
+"""
+import asyncio
+import heapq
+import itertools
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+try:
+    from .index_advisor import missing_predicate, quote_ident
+except ImportError:  # imported as a top-level module
+    from index_advisor import missing_predicate, quote_ident
+
+DEFAULT_WEIGHTS = {
+    "active": 4.0,
+    "featured": 3.0,
+    "in_stock": 2.0,
+    "missing_seo": 2.0,
+    "views": 0.5,  # per log(1 + viewCount)
+    "sales": 1.0,  # per log(1 + salesCount)
+    "missing_field": 1.0,  # per requested field that is missing
+}
+
+SEO_COLUMNS = ("metaTitle", "metaDescription")
+
+
+def priority_sql(
+    key_list: List[str], types: Dict[str, str], weights: Dict[str, float]
+) -> str:
+    """SQL expression scoring one product row; higher is processed first."""
+    w = {**DEFAULT_WEIGHTS, **weights}
+    terms = []
+
+    def term(weight_key: str, expr: str):
+        if w[weight_key]:
+            terms.append(f"{float(w[weight_key])!r} * ({expr})")
+
+    if "isActive" in types:
+        term("active", f"({quote_ident('isActive')} IS TRUE)::int")
+    if "isFeatured" in types:
+        term("featured", f"({quote_ident('isFeatured')} IS TRUE)::int")
+    if "stockQuantity" in types:
+        term("in_stock", f"(coalesce({quote_ident('stockQuantity')}, 0) > 0)::int")
+    seo = [c for c in SEO_COLUMNS if c in types]
+    if seo:
+        missing_seo = " OR ".join(missing_predicate(c, types[c]) for c in seo)
+        term("missing_seo", f"({missing_seo})::int")
+    if "viewCount" in types:
+        term("views", f"ln(1 + greatest(coalesce({quote_ident('viewCount')}, 0), 0))")
+    if "salesCount" in types:
+        term("sales", f"ln(1 + greatest(coalesce({quote_ident('salesCount')}, 0), 0))")
+    if key_list:
+        missing = " + ".join(
+            f"({missing_predicate(k, types.get(k))})::int" for k in key_list
+        )
+        term("missing_field", missing)
+    return " + ".join(terms) or "0"
+
+
+class PriorityFeeder:
+    """
+    Yield products in descending priority, at most `limit` of them.
+
+    `fetch_page(after, page_size)` returns the next products ordered by
+    (priority, id) descending, each carrying a "priority" value, starting after the
+    `after` cursor ([priority, id] or None). A page shorter than `page_size` marks
+    the end. When the buffered queue drops to half a page the next page is fetched
+    in the background.
+
+    Committing a product can lower its score (fewer missing fields) while it still
+    matches, so it reappears below the cursor; ids already queued are skipped so a
+    job never processes a product twice. A resumed job passes the ids it finished
+    before the restart as `seen`.
+    """
+
+    def __init__(
+        self,
+        fetch_page: Callable[[Optional[list], int], Awaitable[List[Dict[str, Any]]]],
+        page_size: int = 100,
+        limit: Optional[int] = None,
+        after: Optional[list] = None,
+        seen: Optional[Iterable[str]] = None,
+    ):
+        self.fetch_page = fetch_page
+        self.page_size = max(1, page_size)
+        self.limit = limit
+        self.cursor = after
+        self.yielded = 0
+        self._heap: list = []
+        self._seen: set = set(seen or ())
+        self._seq = itertools.count()
+        self._exhausted = False
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def cursor_of(product: Dict[str, Any]) -> list:
+        return [product.get("priority"), product.get("id")]
+
+    async def _fill(self):
+        try:
+            size = self.page_size
+            if self.limit is not None:
+                size = min(size, self.limit - self.yielded - len(self._heap))
+            page = await self.fetch_page(self.cursor, size) if size > 0 else []
+            for product in page:
+                if product.get("id") in self._seen:
+                    continue
+                self._seen.add(product.get("id"))
+                heapq.heappush(
+                    self._heap, (-(product.get("priority") or 0), next(self._seq), product)
+                )
+            if page:
+                self.cursor = self.cursor_of(page[-1])
+            if len(page) < size or size <= 0:
+                self._exhausted = True
+        finally:
+            self._task = None
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Dict[str, Any]:
+        if self.limit is not None and self.yielded >= self.limit:
+            raise StopAsyncIteration
+        if (
+            not self._exhausted
+            and self._task is None
+            and len(self._heap) <= self.page_size // 2
+        ):
+            self._task = asyncio.ensure_future(self._fill())
+        while not self._heap:
+            if self._task is None:
+                raise StopAsyncIteration
+            await self._task
+        self.yielded += 1
+        return heapq.heappop(self._heap)[2]
+
+    async def aclose(self):
+        if self._task is not None:
+            self._task.cancel()
@@ -0,0 +1,145 @@
+"""
+Content-addressed cache for LLM metadata suggestions.
+
+Entries are keyed by a hash of (product name, normalized existing fields, requested
+keys, model, prompt version), so re-running autofill on an unchanged product — e.g.
+preview then commit in the admin UI — reuses the earlier generation instead of
+calling the model again. Entries expire after `ttl_seconds`; once the table holds
+more than `max_entries` rows the least recently used ones are evicted.
+"""
+import hashlib
+import json
+import time
+from typing import Any, Dict, List, Optional
+
+try:
+    from .local_store import LocalStore
+except ImportError:  # imported as a top-level module
+    from local_store import LocalStore
+
+
+def _normalize(value: Any) -> Any:
+    """Trim strings and drop empty values so cosmetic differences share a key."""
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, dict):
+        return {
+            k: _normalize(v)
+            for k, v in value.items()
+            if v not in (None, "", [], {})
+        }
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def suggestion_key(
+    product_name: Optional[str],
+    existing: Optional[Dict[str, Any]],
+    keys: List[str],
+    model: str,
+    prompt_version: str,
+) -> str:
+    payload = json.dumps(
+        {
+            "name": (product_name or "").strip().lower(),
+            "existing": _normalize(existing or {}),
+            "keys": sorted(set(keys)),
+            "model": model,
+            "prompt": prompt_version,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SuggestionCache(LocalStore):
+    schema = """
+    CREATE TABLE IF NOT EXISTS suggestions (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        accessed_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS suggestions_accessed ON suggestions(accessed_at);
+    """
+
+    def __init__(self, path: str, ttl_seconds: float, max_entries: int):
+        super().__init__(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._writes = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM suggestions WHERE key = ?", (key,)
+            ).fetchone()
+            if row and self.ttl_seconds and now - row["created_at"] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM suggestions WHERE key = ?", (key,))
+                row = None
+            if not row:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE suggestions SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+        self.hits += 1
+        return json.loads(row["value"])
+
+    def set(self, key: str, value: Dict[str, Any]):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO suggestions (key, value, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False, default=str), now, now),
+            )
+            self._writes += 1
+            # Amortize eviction: check the size every 100 writes
+            if self._writes % 100 == 0:
+                self._evict_locked(now)
+
+    def _evict_locked(self, now: float):
+        if self.ttl_seconds:
+            cur = self._conn.execute(
+                "DELETE FROM suggestions WHERE created_at < ?", (now - self.ttl_seconds,)
+            )
+            self.evictions += cur.rowcount
+        count = self._conn.execute("SELECT COUNT(*) FROM suggestions").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            cur = self._conn.execute(
+                "DELETE FROM suggestions WHERE key IN ("
+                "SELECT key FROM suggestions ORDER BY accessed_at LIMIT ?)",
+                (excess,),
+            )
+            self.evictions += cur.rowcount
+
+    def evict(self):
+        with self._lock:
+            self._evict_locked(time.time())
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM suggestions")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM suggestions").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,152 @@
+"""
+Typed schema for LLM metadata suggestions.
+
+Field types follow the product columns in `main.KNOWN_COLUMNS`: booleans for the
+flags, numbers for prices, an enum list for skinType, and length limits for the
+SEO fields. The same definitions produce:
+
+- `response_format(keys)` / `batch_response_format(members)`: OpenAI strict
+  JSON-schema response formats, so the model cannot return prose or stray keys
+- `validate(data, keys)`: a single pass returning the normalized valid values and
+  an error message per invalid key, so callers re-ask only for those keys
+- `translation_response_format()`: the batched segment translation answer
+
+Strict mode does not enforce string lengths, so limits are stated in the field
+descriptions and checked by `validate`. A null value means "unsure" and is
+normalized to "unknown", which callers already treat as no suggestion.
+"""
+from typing import Any, Dict, List, Tuple
+
+SKIN_TYPES = ["All", "Normal", "Oily", "Dry", "Combination", "Sensitive", "Mature"]
+BOOLEAN_FIELDS = {"isActive", "isFeatured", "isNew", "isTodayDeal"}
+NUMBER_FIELDS = {"price", "compareAtPrice"}
+INTEGER_FIELDS = {"stockQuantity"}
+MAX_LENGTHS = {"metaTitle": 60, "metaDescription": 160, "title": 120, "titleAr": 120}
+
+
+def field_schema(column: str) -> Dict[str, Any]:
+    """JSON schema of one suggested column value (null = unsure)."""
+    if column in BOOLEAN_FIELDS:
+        return {"type": ["boolean", "null"]}
+    if column in NUMBER_FIELDS:
+        return {"type": ["number", "null"]}
+    if column in INTEGER_FIELDS:
+        return {"type": ["integer", "null"]}
+    if column == "skinType":
+        return {
+            "type": ["array", "null"],
+            "items": {"type": "string", "enum": SKIN_TYPES},
+        }
+    schema: Dict[str, Any] = {"type": ["string", "null"]}
+    if column in MAX_LENGTHS:
+        schema["description"] = f"At most {MAX_LENGTHS[column]} characters."
+    return schema
+
+
+def object_schema(keys: List[str]) -> Dict[str, Any]:
+    return {
+        "type": "object",
+        "properties": {k: field_schema(k) for k in keys},
+        "required": list(keys),
+        "additionalProperties": False,
+    }
+
+
+def response_format(keys: List[str]) -> Dict[str, Any]:
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "product_metadata",
+            "strict": True,
+            "schema": object_schema(keys),
+        },
+    }
+
+
+def batch_response_format(members: Dict[str, List[str]]) -> Dict[str, Any]:
+    """Response format for {"products": {ref: {...}}} with each ref's own keys."""
+    products = {
+        "type": "object",
+        "properties": {ref: object_schema(keys) for ref, keys in members.items()},
+        "required": list(members),
+        "additionalProperties": False,
+    }
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "product_metadata_batch",
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": {"products": products},
+                "required": ["products"],
+                "additionalProperties": False,
+            },
+        },
+    }
+
+
+def translation_response_format() -> Dict[str, Any]:
+    """Response format for {"translations": [str, ...]} (translation memory misses)."""
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "translations",
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "translations": {"type": "array", "items": {"type": "string"}}
+                },
+                "required": ["translations"],
+                "additionalProperties": False,
+            },
+        },
+    }
+
+
+def _check(column: str, value: Any) -> Tuple[Any, str]:
+    """Normalized value and an error message ("" when valid)."""
+    if value is None:
+        return "unknown", ""
+    if column in BOOLEAN_FIELDS:
+        if isinstance(value, bool):
+            return value, ""
+        return None, "must be true or false"
+    if column in NUMBER_FIELDS or column in INTEGER_FIELDS:
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return None, "must be a number"
+        if column in INTEGER_FIELDS and value != int(value):
+            return None, "must be a whole number"
+        return (int(value) if column in INTEGER_FIELDS else value), ""
+    if column == "skinType":
+        values = value if isinstance(value, list) else [value]
+        invalid = [v for v in values if v not in SKIN_TYPES]
+        if invalid or not values:
+            return None, f"must be a list of {', '.join(SKIN_TYPES)}"
+        return ", ".join(values), ""
+    if not isinstance(value, str):
+        return None, "must be a string"
+    value = value.strip()
+    limit = MAX_LENGTHS.get(column)
+    if limit and len(value) > limit:
+        return None, f"must be at most {limit} characters (got {len(value)})"
+    return value, ""
+
+
+def validate(data: Any, keys: List[str]) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    """Split a model answer into (valid normalized values, {key: error})."""
+    if not isinstance(data, dict):
+        return {}, {k: "missing from the answer" for k in keys}
+    values: Dict[str, Any] = {}
+    errors: Dict[str, str] = {}
+    for k in keys:
+        if k not in data:
+            errors[k] = "missing from the answer"
+            continue
+        value, error = _check(k, data[k])
+        if error:
+            errors[k] = error
+        else:
+            values[k] = value
+    return values, errors
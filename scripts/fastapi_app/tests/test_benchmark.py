@@ -0,0 +1,45 @@
+import pytest
+
+from fastapi_app import benchmark
+
+
+def test_missing_indexes_match_seed_rule():
+    for column in ("descriptionEn", "howToUse", "compareAtPrice"):
+        expected = [i for i in range(1, 1001) if benchmark._is_missing(column, i)]
+        assert benchmark._missing_indexes(column, 1000) == expected
+
+
+@pytest.mark.asyncio
+async def test_memory_products_pages_like_the_sql_adapter():
+    store = benchmark.MemoryProducts(1000)
+    keys = ["howToUse", "metaTitle"]
+    missing = [
+        benchmark.product_id(i)
+        for i in range(1, 1001)
+        if any(benchmark._is_missing(k, i) for k in keys)
+    ]
+
+    first = await store.find_missing(keys, 10)
+    assert [p["id"] for p in first] == missing[:10]
+    after = await store.find_missing(keys, 10, after_id=first[-1]["id"])
+    assert [p["id"] for p in after] == missing[10:20]
+    assert await store.find_missing(keys, 10, offset=10) == after
+    before = await store.find_missing(keys, 5, before_id=after[0]["id"])
+    assert [p["id"] for p in before] == missing[5:10]
+    assert await store.count_missing(keys) == len(missing)
+
+    # committed rows stop matching, as in Postgres
+    ids = [p["id"] for p in first]
+    results = await store.bulk_update(
+        [(pid, {"howToUse": "Apply", "metaTitle": "T"}) for pid in ids] + [("p9999999", {})]
+    )
+    assert results[-1] == {"status": "not_found"}
+    assert await store.count_missing(keys) == len(missing) - 10
+    assert (await store.fetch(ids[0]))["howToUse"] == "Apply"
+
+
+def test_compare_flags_slower_medians(capsys):
+    base = {"results": {"1000": {"a": {"median_ms": 10.0}, "b": {"median_ms": 10.0}}}}
+    new = {"results": {"1000": {"a": {"median_ms": 11.0}, "b": {"median_ms": 20.0}}}}
+    regressions = benchmark.compare(base, new, threshold=1.25)
+    assert len(regressions) == 1 and " b " in regressions[0]
@@ -0,0 +1,189 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from fastapi_app import main
+from fastapi_app.bulk_engine import BulkAutofillEngine, MicroBatcher, ProviderLimiter
+
+
+class Throttled(Exception):
+    status_code = 429
+
+
+@pytest.mark.asyncio
+async def test_engine_bounds_concurrency_and_tracks_progress():
+    tracker = main.ProgressState()
+    tracker.create_job("job", total_items=6, description="test")
+    in_flight = 0
+    peak = 0
+
+    async def process(product):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if product["id"] == "3":
+            raise RuntimeError("boom")
+        return {"product_id": product["id"], "processed_fields": ["title"]}
+
+    engine = BulkAutofillEngine(tracker, "job", process, concurrency=2)
+    results = await engine.run([{"id": str(i), "title": f"P{i}"} for i in range(6)])
+
+    assert peak == 2
+    assert [r["product_id"] for r in results] == ["0", "1", "2", "3", "4", "5"]
+    assert results[3]["status"] == "error"
+    job = tracker.get_job("job")
+    assert job["current"] == 6
+    assert job["success_count"] == 5 and job["error_count"] == 1
+    assert job["completed"] is True
+
+
+@pytest.mark.asyncio
+async def test_provider_limiter_retries_429():
+    limiter = ProviderLimiter("test", max_in_flight=1, base_backoff=0.01)
+    calls = 0
+
+    async def flaky():
+        nonlocal calls
+        calls += 1
+        if calls < 3:
+            raise Throttled()
+        return "ok"
+
+    assert await limiter.call(flaky) == "ok"
+    assert calls == 3
+    assert limiter.throttled == 2
+
+
+def test_missing_keys_of_uses_empty_values():
+    product = {"id": "1", "fields": {"title": "X", "howToUse": "", "usage": None}}
+    assert main._missing_keys_of(product) == ["howToUse", "usage"]
+
+
+@pytest.mark.asyncio
+async def test_micro_batcher_groups_concurrent_calls():
+    batches = []
+
+    async def flush(items):
+        batches.append(list(items))
+        return [i * 10 for i in items]
+
+    batcher = MicroBatcher(flush, max_batch=3, max_wait=0.01)
+    results = await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+
+    assert results == [0, 10, 20, 30, 40]
+    assert [len(b) for b in batches] == [3, 2]
+
+
+@pytest.mark.asyncio
+async def test_batch_suggestion_falls_back_per_product(monkeypatch):
+    monkeypatch.setattr(main, "OPENAI_API_KEY", "test")
+
+    async def failing_call(*args, **kwargs):
+        raise RuntimeError("bad batch")
+
+    async def single(name, existing, keys):
+        return {k: f"{name}-{k}" for k in keys}
+
+    monkeypatch.setattr(main.provider_limits["openai"], "call", failing_call)
+    monkeypatch.setattr(main, "suggest_metadata_via_openai", single)
+
+    items = [
+        {"name": "A", "existing": {}, "keys": ["usage"]},
+        {"name": "B", "existing": {}, "keys": ["title", "usage"]},
+    ]
+    results = await main.suggest_metadata_batch_via_openai(items)
+    assert results == [{"usage": "A-usage"}, {"title": "B-title", "usage": "B-usage"}]
+
+
+@pytest.mark.asyncio
+async def test_autofill_runs_llm_and_web_concurrently(monkeypatch):
+    started = []
+
+    async def fetch(product_id):
+        return {"id": product_id, "title": "Serum"}
+
+    async def llm(name, existing, keys):
+        started.append("llm")
+        await asyncio.sleep(0.01)
+        assert "web" in started
+        return {"usage": "Daily", "skinType": ""}
+
+    async def web(name, keys):
+        started.append("web")
+        await asyncio.sleep(0.01)
+        return {"usage": "Nightly", "skinType": "All"}
+
+    monkeypatch.setattr(main, "db_fetch_product", fetch)
+    monkeypatch.setattr(main, "search_online_for_metadata", web)
+
+    result = await main._autofill_product(
+        "1", ["usage", "skinType"], strategy="both", llm_suggest=llm
+    )
+    assert result["suggestion"] == {"usage": "Daily", "skinType": "All"}
+
+
+def _resp(content):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+@pytest.mark.asyncio
+async def test_suggestion_is_split_into_concurrent_field_groups(monkeypatch):
+    monkeypatch.setattr(main, "OPENAI_API_KEY", "test")
+    budgets = {}
+
+    async def call(fn, **kwargs):
+        prompt = kwargs["messages"][0]["content"]
+        keys = json.loads(prompt.split("Required fields: ")[1].split("\n")[0])
+        budgets[tuple(keys)] = kwargs["max_tokens"]
+        return _resp(json.dumps({k: k != "isNew" and f"v-{k}" for k in keys}))
+
+    monkeypatch.setattr(main.provider_limits["openai"], "call", call)
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=None)))
+    monkeypatch.setattr(main.clients, "get_openai_client", lambda: client)
+
+    keys = ["descriptionEn", "descriptionAr", "metaTitle", "isNew"]
+    result = await main.suggest_metadata_via_openai("Serum", {}, keys)
+    assert result == {k: k != "isNew" and f"v-{k}" for k in keys}
+    assert budgets == {
+        ("descriptionEn",): main.FIELD_GROUPS["copy"][1],
+        ("descriptionAr",): main.FIELD_GROUPS["arabic"][1],
+        ("metaTitle",): main.FIELD_GROUPS["seo"][1],
+        ("isNew",): main.FIELD_GROUPS["flags"][1],
+    }
+
+
+@pytest.mark.asyncio
+async def test_llm_calls_are_accounted_to_the_running_job(monkeypatch):
+    monkeypatch.setattr(main, "OPENAI_API_KEY", "test")
+    monkeypatch.setattr(main, "OPENAI_MODEL", "gpt-4o-mini")
+    monkeypatch.setattr(main, "progress_tracker", main.ProgressState())
+    attempts = []
+
+    async def create(**kwargs):
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise Throttled()
+        resp = _resp(json.dumps({"metaTitle": "Serum"}))
+        resp.usage = SimpleNamespace(prompt_tokens=1000, completion_tokens=100)
+        return resp
+
+    limiter = ProviderLimiter(
+        "openai", 2, base_backoff=0.001, on_throttle=main.accounting.record_retry
+    )
+    monkeypatch.setitem(main.provider_limits, "openai", limiter)
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(main.clients, "get_openai_client", lambda: client)
+
+    main.progress_tracker.create_job("j", 1, "test")
+    with main.progress_tracker.usage_scope("j"):
+        await main.suggest_metadata_via_openai("Serum", {}, ["metaTitle"])
+    usage = main.accounting.summarize(main.progress_tracker.get_job("j")["usage"])
+
+    call = usage["by_call"]["openai:suggest:seo"]
+    assert (call["calls"], call["prompt_tokens"], call["completion_tokens"]) == (1, 1000, 100)
+    assert usage["by_call"]["openai:retry"]["retries"] == 1
+    assert usage["total"]["cost_usd"] == pytest.approx((1000 * 0.15 + 100 * 0.60) / 1e6)
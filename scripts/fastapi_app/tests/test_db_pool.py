@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+
+from fastapi_app import db_pool
+
+
+class FakeConn:
+    def __init__(self):
+        self.executed = []
+
+    async def execute(self, sql):
+        self.executed.append(sql)
+
+
+class FakeAsyncpgPool:
+    """Hands out up to `size` connections; acquire(timeout=...) like asyncpg."""
+
+    def __init__(self, size):
+        self.free = asyncio.Semaphore(size)
+
+    async def acquire(self, timeout=None):
+        await asyncio.wait_for(self.free.acquire(), timeout)
+        return FakeConn()
+
+    async def release(self, conn):
+        self.free.release()
+
+
+@pytest.mark.asyncio
+async def test_acquire_fails_fast_and_reports_wait():
+    waits = []
+    pool = db_pool.TimedPool(FakeAsyncpgPool(1), acquire_timeout=0.05, on_wait=waits.append)
+    async with pool.acquire():
+        with pytest.raises(db_pool.PoolExhausted):
+            async with pool.acquire():
+                pass
+    async with pool.acquire():
+        pass
+    assert pool.timeouts == 1
+    assert len(waits) == 3 and waits[1] >= 0.04
+
+
+@pytest.mark.asyncio
+async def test_background_view_leaves_connections_for_ui():
+    pool = db_pool.TimedPool(FakeAsyncpgPool(2), acquire_timeout=0.05, background_slots=1)
+    background = pool.background()
+    held = asyncio.Event()
+    release = asyncio.Event()
+
+    async def scan():
+        async with background.acquire():
+            held.set()
+            await release.wait()
+
+    first = asyncio.ensure_future(scan())
+    await held.wait()
+    second = asyncio.ensure_future(scan())  # queues behind the single background slot
+    await asyncio.sleep(0.01)
+    async with pool.acquire():  # the UI still gets the second connection
+        assert not second.done()
+    release.set()
+    await asyncio.gather(first, second)
+
+
+@pytest.mark.asyncio
+async def test_background_view_runs_under_its_own_statement_timeout():
+    pool = db_pool.TimedPool(
+        FakeAsyncpgPool(2),
+        background_slots=1,
+        background_statement_timeout_ms=0,
+        statement_timeout_ms=30000,
+    )
+    async with pool.acquire() as conn:
+        pass
+    assert conn.executed == []  # UI connections keep the pool-wide timeout
+    async with pool.background().acquire() as conn:
+        assert conn.executed == ["SET statement_timeout = 0"]
+    assert conn.executed[-1] == "RESET statement_timeout"
+
+
+@pytest.mark.asyncio
+async def test_background_view_skips_round_trips_its_connections_do_not_need():
+    same = db_pool.TimedPool(
+        FakeAsyncpgPool(2),
+        background_slots=1,
+        background_statement_timeout_ms=30000,
+        statement_timeout_ms=30000,
+    )
+    async with same.background().acquire() as conn:
+        pass
+    assert conn.executed == []
+
+    background_pool = FakeAsyncpgPool(1)
+    own = db_pool.TimedPool(
+        FakeAsyncpgPool(2),
+        background_slots=1,
+        background_statement_timeout_ms=0,
+        statement_timeout_ms=30000,
+        background_pool=background_pool,
+    )
+    async with own.background().acquire() as conn:
+        # drawn from the pool created with the background timeout
+        assert background_pool.free.locked()
+    assert conn.executed == []
@@ -29,8 +29,8 @@ class FakeConn:
         self._rows = rows or []
         self._row = row
 
-    async def fetch(self, sql, limit):
-        # ignore sql; return pre-set list
+    async def fetch(self, sql, *args):
+        # ignore sql and params; return pre-set list
         return self._rows
 
     async def fetchrow(self, sql, *args):
@@ -101,3 +101,194 @@ async def test_db_fetch_and_update_asyncpg(monkeypatch):
 
     updated = await main.db_update_product("10", {"howToUse": "Updated"})
     assert updated["howToUse"] == "Updated"
+
+
+@pytest.mark.asyncio
+async def test_missing_stats_counts_whole_table(monkeypatch):
+    fields = sorted(main.KNOWN_COLUMNS)
+    counts = {f"m{i}": 0 for i in range(len(fields))}
+    counts[f"m{fields.index('howToUse')}"] = 30
+    conn = FakeConn(row=FakeRecord({"total": 40, **counts}))
+    monkeypatch.setattr(main, "pool", FakePool(conn))
+
+    stats = await main.get_missing_stats(cached=False)
+    assert stats["total_products_analyzed"] == 40
+    assert stats["field_statistics"]["howToUse"] == {
+        "missing_count": 30,
+        "completion_rate": 25.0,
+    }
+    assert stats["most_needed_fields"] == ["howToUse"]
+
+
+@pytest.mark.asyncio
+async def test_missing_stats_are_not_recomputed_after_every_write(monkeypatch):
+    scans = []
+
+    async def counts(fields):
+        scans.append(fields)
+        return {"total": 1, "missing": {}}
+
+    monkeypatch.setattr(main, "db_missing_field_counts", counts)
+    monkeypatch.setattr(main, "_missing_stats_cache", {"value": None, "computed_at": 0.0})
+    monkeypatch.setattr(main, "_missing_stats_refresh", None)
+    monkeypatch.setattr(main, "pool", FakePool(FakeConn(row=FakeRecord({"id": "1"}))))
+    monkeypatch.setattr(main, "prisma", None)
+
+    await main._get_missing_field_counts(cached=True)
+    for _ in range(3):
+        await main.db_update_product("1", {"howToUse": "Updated"})
+        await main._get_missing_field_counts(cached=True)
+    await asyncio.sleep(0)
+    assert len(scans) == 1  # fresh within MISSING_STATS_TTL despite the writes
+
+
+@pytest.mark.asyncio
+async def test_missing_page_returns_total_and_cursors(monkeypatch):
+    rows = [
+        FakeRecord({"__total": 7, "id": "a", "title": "A", "howToUse": ""}),
+        FakeRecord({"__total": 7, "id": "b", "title": "B", "howToUse": None}),
+        FakeRecord({"__total": 7, "id": "c", "title": "C", "howToUse": ""}),
+    ]
+    monkeypatch.setattr(main, "pool", FakePool(FakeConn(rows=rows)))
+    monkeypatch.setattr(main, "prisma", None)
+    monkeypatch.setattr(main, "_missing_count_cache", {})
+
+    page = await main.db_find_missing_page(["howToUse"], limit=2, after_id="0")
+    assert [p["id"] for p in page["products"]] == ["a", "b"]
+    assert page["total"] == 7
+    assert page["next_cursor"] == "b"
+    assert page["prev_cursor"] == "a"
+    # the count is now cached for the key set
+    assert main._cached_missing_count(["howToUse"]) == 7
+
+
+def test_missing_page_sql_uses_keyset_not_offset():
+    sql, args = main._missing_page_sql(["howToUse"], 10, after_id="abc")
+    assert '"id" > $2' in sql and "OFFSET" not in sql
+    assert args == [10, "abc"]
+    sql, args = main._missing_page_sql(["howToUse"], 10, before_id="abc")
+    assert '"id" < $2' in sql and "DESC" in sql
+
+
+class FakeTxnConn:
+    """Records statements; fails the batched UPDATE when it contains a 'bad' id."""
+
+    def __init__(self):
+        self.statements = []
+
+    def transaction(self):
+        class Txn:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, exc_type, exc, tb):
+                return False
+
+        return Txn()
+
+    async def fetch(self, sql, ids, *columns):
+        self.statements.append(sql)
+        if "bad" in ids:
+            raise ValueError("invalid input syntax")
+        return [FakeRecord({"id": i}) for i in ids if i != "gone"]
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_batches_and_isolates_bad_rows(monkeypatch):
+    conn = FakeTxnConn()
+    monkeypatch.setattr(main, "pool", FakePool(conn))
+    monkeypatch.setattr(main, "prisma", None)
+
+    ok = await main.db_bulk_update_products(
+        [("1", {"title": "A"}), ("2", {"usage": "Daily"}), ("gone", {"title": "C"})]
+    )
+    assert ok == [{"status": "updated"}, {"status": "updated"}, {"status": "not_found"}]
+    assert len(conn.statements) == 1
+    assert "unnest($1::text[], $2::text[], $3::text[])" in conn.statements[0]
+
+    conn.statements.clear()
+    mixed = await main.db_bulk_update_products(
+        [("1", {"title": "A"}), ("bad", {"title": "B"})]
+    )
+    assert mixed[0] == {"status": "updated"}
+    assert mixed[1]["status"] == "error"
+    assert len(conn.statements) == 3  # failed batch, then one per row
+
+
+@pytest.mark.asyncio
+async def test_iter_missing_products_streams_keyset_batches(monkeypatch):
+    ids = [f"p{i:02d}" for i in range(7)]
+    calls = []
+
+    async def find(key_list, limit, after_id=None, background=False):
+        assert background
+        calls.append(after_id)
+        start = ids.index(after_id) + 1 if after_id else 0
+        return [{"id": i, "title": i, "fields": {}} for i in ids[start : start + limit]]
+
+    monkeypatch.setattr(main, "db_find_missing_products", find)
+    seen = []
+    async for product in main.db_iter_missing_products(["howToUse"], batch_size=3):
+        seen.append(product["id"])
+        if len(seen) == 1:
+            # the next batch is already requested while the first is consumed
+            await asyncio.sleep(0)
+            assert calls == [None, "p02"]
+    assert seen == ids
+    assert calls == [None, "p02", "p05"]
+
+
+@pytest.mark.asyncio
+async def test_iter_missing_products_reads_through_the_background_view(monkeypatch):
+    class UIPool(FakePool):
+        def acquire(self):
+            raise AssertionError("whole-catalog scans must not use the UI view")
+
+        def background(self):
+            return background_pool
+
+    background_pool = FakePool(FakeConn(rows=[FakeRecord({"id": "1", "howToUse": ""})]))
+    monkeypatch.setattr(main, "pool", UIPool(None))
+    monkeypatch.setattr(main, "prisma", None)
+    monkeypatch.setattr(main, "COLUMN_TYPES", {"id": "text", "howToUse": "text"})
+
+    found = [p["id"] async for p in main.db_iter_missing_products(["howToUse"], 10)]
+    assert found == ["1"]
+
+
+def test_product_sql_is_built_once_and_selects_needed_columns(monkeypatch):
+    monkeypatch.setattr(main, "COLUMN_TYPES", {"id": "text", "title": "text", "howToUse": "text"})
+    monkeypatch.setattr(main, "pool", None)
+    monkeypatch.setattr(main, "prisma", None)
+    sql = main._products().sql
+    assert main._products().sql is sql
+
+    page = sql.missing_page(["howToUse"], "after")
+    assert sql.missing_page(["howToUse"], "after") is page
+    assert page.startswith('SELECT "id", "title", "howToUse" FROM')
+    # only existing product columns, never SELECT *
+    assert sql.fetch().startswith('SELECT "id", "title", "howToUse" FROM')
+    assert sql.update(["howToUse"], ("id",)).endswith('WHERE "id" = $2 RETURNING "id"')
+
+
+@pytest.mark.asyncio
+async def test_conditional_bulk_update_reports_conflicts(monkeypatch):
+    class ConditionalConn(FakeTxnConn):
+        async def fetch(self, sql, ids, *arrays):
+            self.statements.append(sql)
+            return [
+                FakeRecord({"id": i, "updated": i == "1", "found": i != "gone"}) for i in ids
+            ]
+
+    conn = ConditionalConn()
+    monkeypatch.setattr(main, "pool", FakePool(conn))
+    monkeypatch.setattr(main, "prisma", None)
+
+    outcomes = await main.db_bulk_update_products(
+        [("1", {"title": "A"}), ("2", {"title": "B"}), ("gone", {"title": "C"})],
+        expected=[{"title": None}, {"title": ""}, {"title": None}],
+    )
+    assert [o["status"] for o in outcomes] == ["updated", "conflict", "not_found"]
+    sql = conn.statements[0]
+    assert '"title" IS NOT DISTINCT FROM u.p0::text' in sql
+    assert "unnest($1::text[], $2::text[], $3::text[])" in sql
@@ -0,0 +1,106 @@
+import asyncio
+import threading
+
+import pytest
+
+from fastapi_app import benchmark, main
+from fastapi_app.drafts import DraftStore
+
+
+def test_draft_store_pages_by_product_and_replaces_fields(tmp_path):
+    store = DraftStore(str(tmp_path / "drafts.sqlite3"))
+    store.stage("a", {"title": "A", "isNew": True}, previous={"title": ""}, job_id="j1")
+    store.stage("b", {"price": 9.5}, job_id="j1")
+    store.stage("c", {"title": "C"}, job_id="j2")
+    store.stage("a", {"title": "A2"}, job_id="j2")
+
+    page = store.select(limit=2)
+    assert list(page) == ["a", "b"]
+    title = page["a"]["title"]
+    assert (title["value"], title["previous"], title["job_id"]) == ("A2", None, "j2")
+    assert page["a"]["isNew"]["value"] is True
+    assert list(store.select(limit=2, after_product="b")) == ["c"]
+    assert list(store.select(job_id="j1")) == ["a", "b"]
+
+    assert store.remove_matching(job_id="j2") == 2
+    assert store.stats() == {"products": 2, "fields": 2}
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_approve_applies_drafts_in_batches_and_keeps_failures(tmp_path, monkeypatch):
+    store = DraftStore(str(tmp_path / "drafts.sqlite3"))
+    for pid in ("1", "2", "3", "bad"):
+        store.stage(pid, {"title": f"T{pid}", "usage": "Daily"}, job_id="j")
+    monkeypatch.setattr(main, "draft_store", store)
+    monkeypatch.setattr(main, "DB_WRITE_BATCH_SIZE", 2)
+    batches = []
+
+    async def bulk_update(rows, expected=None):
+        batches.append([pid for pid, _ in rows])
+        return [
+            {"status": "error", "error": "boom"} if pid == "bad"
+            else {"status": "not_found"} if pid == "3"
+            else {"status": "updated"}
+            for pid, _ in rows
+        ]
+
+    monkeypatch.setattr(main, "db_bulk_update_products", bulk_update)
+    with pytest.raises(main.HTTPException):
+        await main.approve_drafts(main.DraftSelection())
+
+    result = await main.approve_drafts(main.DraftSelection(job_id="j"))
+    assert batches == [["1", "2"], ["3", "bad"]]
+    assert result == {
+        "approved_products": 2,
+        "approved_fields": 4,
+        "not_found": ["3"],
+        "conflicts": [],
+        "errors": {"bad": "boom"},
+    }
+    assert list(store.select()) == ["bad"]
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_approve_skips_products_edited_since_staging(tmp_path, monkeypatch):
+    store = DraftStore(str(tmp_path / "drafts.sqlite3"))
+    products = benchmark.MemoryProducts(10)
+    for pid in ("p0000001", "p0000002"):
+        current = await products.fetch(pid)
+        store.stage(pid, {"howToUse": "Drafted"}, previous={"howToUse": current["howToUse"]})
+    # a reviewer edits one product by hand after the drafts were staged
+    await products.update("p0000002", {"howToUse": "Edited by hand"})
+    monkeypatch.setattr(main, "draft_store", store)
+    monkeypatch.setattr(main, "_products", lambda background=False: products)
+    monkeypatch.setattr(main, "_products_changed", lambda ids: asyncio.sleep(0))
+
+    result = await main.approve_drafts(main.DraftSelection(all=True))
+    assert result["approved_products"] == 1 and result["conflicts"] == ["p0000002"]
+    assert (await products.fetch("p0000001"))["howToUse"] == "Drafted"
+    assert (await products.fetch("p0000002"))["howToUse"] == "Edited by hand"
+    assert list(store.select()) == ["p0000002"]  # stays staged for review
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_draft_store_is_used_off_the_event_loop(tmp_path, monkeypatch):
+    threads = []
+
+    class RecordingStore(DraftStore):
+        def select(self, *args, **kwargs):
+            threads.append(threading.get_ident())
+            return super().select(*args, **kwargs)
+
+        def remove_matching(self, *args, **kwargs):
+            threads.append(threading.get_ident())
+            return super().remove_matching(*args, **kwargs)
+
+    store = RecordingStore(str(tmp_path / "drafts.sqlite3"))
+    store.stage("a", {"title": "A"}, job_id="j")
+    monkeypatch.setattr(main, "draft_store", store)
+
+    assert (await main.reject_drafts(main.DraftSelection(job_id="j"))) == {"rejected_fields": 1}
+    await main.approve_drafts(main.DraftSelection(all=True))
+    assert threads and threading.get_ident() not in threads
+    store.close()
@@ -0,0 +1,69 @@
+import pytest
+
+from fastapi_app import index_advisor
+from fastapi_app.product_db import ProductSQL
+
+
+def test_missing_predicate_is_type_aware():
+    assert index_advisor.missing_predicate("title", "text") == "coalesce(\"title\",'') = ''"
+    assert index_advisor.missing_predicate("price", "double precision") == '"price" IS NULL'
+    assert index_advisor.missing_predicate("x") == "coalesce(\"x\"::text,'') = ''"
+
+
+def test_proposals_match_query_predicates_and_skip_existing():
+    types = {"title": "text", "price": "double precision"}
+    existing = {"Product_missing_title_idx": "CREATE INDEX ..."}
+    proposals = index_advisor.propose_indexes(
+        "Product", '"Product"', types, [["title", "price", "unknownCol"], ["title"]], existing
+    )
+    assert [p["columns"] for p in proposals] == [["price", "title"], ["title"]]
+    both = proposals[0]
+    where = ProductSQL('"Product"', types, {}, ["price", "title"]).missing_where(["price", "title"])
+    assert both["sql"].endswith(f'ON "Product" ("id") WHERE {where}')
+    migration = index_advisor.migration_sql(proposals)
+    assert both["index"] in migration
+    assert "Product_missing_title_idx" not in migration
+    assert "SET statement_timeout = 0;" in migration
+
+
+def test_hot_query_key_sets_get_one_index_each():
+    from fastapi_app import main
+
+    types = {c: "text" for c in main.KNOWN_COLUMNS}
+    proposals = index_advisor.propose_indexes(
+        "Product", '"Product"', types, main.INDEXED_KEY_SETS, {}
+    )
+    assert len(proposals) == 2
+    assert proposals[0]["columns"] == sorted(main.BULK_DEFAULT_FIELDS)
+
+
+@pytest.mark.asyncio
+async def test_apply_replaces_invalid_leftovers():
+    executed = []
+
+    class Conn:
+        async def execute(self, sql):
+            executed.append(sql)
+
+    proposals = index_advisor.propose_indexes(
+        "Product", '"Product"', {"title": "text", "price": "double precision"},
+        [["title"], ["price"]], {"Product_missing_title_idx": "CREATE INDEX ..."},
+    )
+    applied = await index_advisor.apply_proposals(Conn(), proposals)
+    assert applied == [{"index": "Product_missing_price_idx", "status": "created"}]
+    assert executed[0].startswith('DROP INDEX CONCURRENTLY IF EXISTS "Product_missing_price_idx"')
+    assert executed[1].startswith("CREATE INDEX CONCURRENTLY")
+
+
+def test_indexes_are_only_created_through_post():
+    from fastapi_app import main
+
+    methods = {
+        route.path: route.methods
+        for route in main.app.routes
+        if route.path.startswith("/debug/index-advisor")
+    }
+    assert methods == {
+        "/debug/index-advisor": {"GET"},
+        "/debug/index-advisor/apply": {"POST"},
+    }
@@ -0,0 +1,45 @@
+import pytest
+
+from fastapi_app import main
+from fastapi_app.ingredient_index import IngredientIndex
+
+LIST = "Aqua (Water), Glycerine, 10% Nicotinamide, 1,2-Hexanediol, Ceramide NP, Ceramide AP, Glycerin"
+
+
+def test_lists_are_canonicalized_deduplicated_and_translated():
+    index = IngredientIndex.load()
+    inci, unknown = index.to_inci(LIST + ", Moon Dust")
+    assert inci == (
+        "Aqua, Glycerin, Niacinamide, 1,2-Hexanediol, Ceramide NP, Ceramide AP, Moon Dust"
+    )
+    assert unknown == ["Moon Dust"]
+    assert index.actives(LIST) == ["10% Niacinamide", "Ceramides"]
+    assert index.to_arabic("Water, Niacinamide") == ("ماء، نياسيناميد", [])
+    assert index.to_arabic("Water, Moon Dust") == (None, ["Moon Dust"])
+    assert index.lookup("نياسيناميد")["inci"] == "Niacinamide"
+    found = index.find("a vitamin C serum with hyaluronic acid")
+    assert [e["inci"] for e in found] == ["Ascorbic Acid", "Hyaluronic Acid"]
+
+
+@pytest.mark.asyncio
+async def test_llm_is_only_asked_for_unknown_ingredients(monkeypatch):
+    monkeypatch.setattr(main, "ingredient_index", IngredientIndex.load())
+    monkeypatch.setattr(main, "translation_memory", None)
+    requested = []
+
+    async def translate(segments, references=None):
+        requested.append(segments)
+        return ["غبار القمر" for _ in segments]
+
+    monkeypatch.setattr(main, "translate_segments_via_openai", translate)
+
+    suggested = {"ingredients": "water, glycerine, Moon Dust"}
+    main._normalize_ingredients(suggested)
+    assert suggested["ingredients"] == "Aqua, Glycerin, Moon Dust"
+
+    (leftover,) = await main._derive_fields(
+        [({}, suggested, ["activeIngredients", "ingredientsAr"])]
+    )
+    assert requested == [["Moon Dust"]]
+    assert suggested["ingredientsAr"] == "ماء، جلسرين، غبار القمر"
+    assert leftover == ["activeIngredients"]  # no known actives: generate instead
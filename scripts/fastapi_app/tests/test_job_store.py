@@ -0,0 +1,246 @@
+import asyncio
+import threading
+
+import pytest
+
+from fastapi_app import main
+from fastapi_app.bulk_engine import BulkAutofillEngine
+from fastapi_app.job_store import SqliteJobStore
+
+
+@pytest.mark.asyncio
+async def test_sqlite_store_roundtrip_claim_and_sweep(tmp_path):
+    store = SqliteJobStore(str(tmp_path / "jobs.sqlite3"))
+    worker_a = main.ProgressState(store=store)
+    job = worker_a.create_job("j1", total_items=3, description="bulk", resume={"kind": "x"})
+    await worker_a.flush()
+
+    # another worker sees the job through the shared store
+    worker_b = main.ProgressState(store=SqliteJobStore(str(tmp_path / "jobs.sqlite3")))
+    assert worker_b.get_job("j1") is None  # not run here
+    seen = await worker_b.load_job("j1")
+    assert seen["start_time"] == job["start_time"]
+    assert seen["resume"] == {"kind": "x"}
+
+    # the owner saved it just now, so the lease has not expired
+    assert not worker_b.store.claim("j1", worker_b.owner, lease_seconds=60)
+    assert worker_b.store.claim("j1", worker_b.owner, lease_seconds=-1)
+    worker_b.adopt(await worker_b.load_job("j1"))
+    assert await worker_a.renew_leases() == 1  # drops its stale copy
+
+    worker_b.update_job("j1", status="completed", completed=True)
+    await worker_b.flush()
+    assert store.unfinished() == []
+    assert await worker_b.sweep(ttl_seconds=-1) == 1
+    assert await worker_a.load_job("j1") is None
+
+
+@pytest.mark.asyncio
+async def test_job_store_is_only_used_off_the_event_loop(tmp_path):
+    threads = []
+
+    class RecordingStore(SqliteJobStore):
+        def save(self, job, owner):
+            threads.append(threading.get_ident())
+            return super().save(job, owner)
+
+    tracker = main.ProgressState(store=RecordingStore(str(tmp_path / "jobs.sqlite3")))
+    tracker.create_job("j", total_items=10, description="bulk")
+    for i in range(5):
+        tracker.update_job("j", status=f"step {i}")  # forced saves, coalesced
+    await tracker.flush()
+
+    assert threads and threading.get_ident() not in threads
+    assert len(threads) < 6
+    assert tracker.store.load("j")["status"] == "step 4"
+
+
+@pytest.mark.asyncio
+async def test_lease_is_renewed_and_a_claimed_job_stops_its_old_engine(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    worker_a = main.ProgressState(store=SqliteJobStore(path), save_interval=3600)
+    worker_b = main.ProgressState(store=SqliteJobStore(path))
+    worker_a.create_job("j", total_items=100, description="bulk")
+    await worker_a.flush()
+
+    # renewals keep the lease alive although throttled progress saves are skipped
+    worker_a.store._conn.execute("UPDATE jobs SET updated_at = updated_at - 60")
+    assert await worker_a.renew_leases() == 0
+    assert not worker_b.store.claim("j", worker_b.owner, lease_seconds=30)
+
+    gate = asyncio.Event()
+    processed = []
+
+    async def process(product):
+        processed.append(product["id"])
+        if len(processed) == 2:
+            await gate.wait()
+        return {"product_id": product["id"], "processed_fields": []}
+
+    engine = BulkAutofillEngine(worker_a, "j", process, concurrency=1)
+    run = asyncio.create_task(engine.run([{"id": str(i)} for i in range(100)]))
+    while len(processed) < 2:
+        await asyncio.sleep(0)
+    await worker_a.flush()
+
+    # worker_a goes quiet past the lease and worker_b takes over
+    assert worker_b.store.claim("j", worker_b.owner, lease_seconds=-1)
+    worker_b.adopt(await worker_b.load_job("j"))
+    await worker_b.flush()
+    assert await worker_a.renew_leases() == 1
+    gate.set()
+    await run
+    await worker_a.flush()
+
+    assert len(processed) == 2 and "j" in worker_a.lost
+    # worker_a's late "cancelled"/completed update did not overwrite worker_b's row
+    job = worker_b.store.load("j")
+    assert not job["completed"] and job["status"] != "cancelled"
+    assert not worker_a.store.save({"id": "j", "completed": True}, worker_a.owner)
+
+
+def test_processed_items_history_is_bounded():
+    tracker = main.ProgressState(history_limit=3)
+    tracker.create_job("j", total_items=10, description="bulk")
+    for i in range(10):
+        tracker.add_processed_item("j", {"item_id": str(i), "status": "error"})
+    job = tracker.get_job("j")
+    assert [i["item_id"] for i in job["processed_items"]] == ["7", "8", "9"]
+    assert len(job["errors"]) == 3
+    assert job["error_count"] == 10
+
+
+@pytest.mark.asyncio
+async def test_engine_checkpoint_tracks_contiguous_prefix():
+    tracker = main.ProgressState()
+    tracker.create_job("j", total_items=4, description="bulk")
+    delays = {"a": 0.03, "b": 0.0, "c": 0.0, "d": 0.0}
+
+    async def process(product):
+        await asyncio.sleep(delays[product["id"]])
+        return {"product_id": product["id"], "processed_fields": []}
+
+    engine = BulkAutofillEngine(tracker, "j", process, concurrency=2, done_offset=10)
+    checkpoints = []
+    original = tracker.update_job
+
+    def spy(job_id, **kwargs):
+        if "checkpoint" in kwargs:
+            checkpoints.append(kwargs["checkpoint"])
+        original(job_id, **kwargs)
+
+    tracker.update_job = spy
+    await engine.run([{"id": i, "title": i} for i in "abcd"])
+
+    # b..d finish before a, so the checkpoint only moves once a is done
+    assert checkpoints == ["d"]
+    job = tracker.get_job("j")
+    assert job["checkpoint_done"] == 14 and job["current"] == 14
+
+
+@pytest.mark.asyncio
+async def test_watchers_wake_on_change_and_share_one_render():
+    tracker = main.ProgressState()
+    tracker.create_job("j", total_items=2, description="bulk")
+    seen = tracker.version("j")
+
+    waiter = asyncio.create_task(tracker.wait_for_change("j", seen, timeout=5))
+    await asyncio.sleep(0)
+    tracker.add_processed_item("j", {"item_id": "1", "status": "success"})
+    assert await asyncio.wait_for(waiter, 1) > seen
+    assert [i["item_id"] for i in tracker.items_since("j", seen)] == ["1"]
+
+    renders = []
+    render = lambda job: renders.append(1) or str(job["current"])
+    assert tracker.render_cached("j", render) == tracker.render_cached("j", render)
+    assert len(renders) == 1
+    tracker.update_job("j", current_item=1)
+    assert tracker.render_cached("j", render) == "1"
+    assert len(renders) == 2
+
+
+@pytest.mark.asyncio
+async def test_resumed_priority_job_skips_products_finished_before_the_restart(
+    monkeypatch,
+):
+    # "0" and "1" were committed before the restart, so their scores dropped
+    # below the checkpoint while they still match
+    rows = {"0": 6.5, "1": 4.0, "2": 7.0, "3": 6.0}
+
+    async def find_priority(key_list, limit, after=None):
+        ranked = sorted(((p, i) for i, p in rows.items()), reverse=True)
+        if after is not None:
+            ranked = [r for r in ranked if r < tuple(after)]
+        return [{"id": i, "priority": p} for p, i in ranked[:limit]]
+
+    processed = []
+
+    def item_processor(strategy, commit, batch_size, job_id):
+        async def process(product):
+            processed.append(product["id"])
+            return {"product_id": product["id"], "processed_fields": []}
+
+        return process
+
+    tracker = main.ProgressState()
+    monkeypatch.setattr(main, "progress_tracker", tracker)
+    monkeypatch.setattr(main, "db_find_priority_products", find_priority)
+    monkeypatch.setattr(main, "_bulk_item_processor", item_processor)
+    job = tracker.create_job("j", total_items=4, description="bulk")
+    job.update(
+        resume={"kind": "bulk_autofill", "order": "priority", "fields": ["howToUse"],
+                "strategy": "rules", "commit": True},
+        checkpoint=[8.0, "1"],
+        checkpoint_done=2,
+        done_ids=["0", "1"],
+    )
+    await main._resume_job(dict(job))
+
+    assert processed == ["2", "3"]
+    job = tracker.get_job("j")
+    assert job["current"] == 4 and sorted(job["done_ids"]) == ["0", "1", "2", "3"]
+
+
+@pytest.mark.asyncio
+async def test_watchers_of_a_remote_job_share_one_store_read(tmp_path):
+    loads = []
+
+    class CountingStore(SqliteJobStore):
+        def load(self, job_id):
+            loads.append(threading.get_ident())
+            return super().load(job_id)
+
+    path = str(tmp_path / "jobs.sqlite3")
+    owner = main.ProgressState(store=SqliteJobStore(path))
+    owner.create_job("j", total_items=3, description="bulk")
+    await owner.flush()
+
+    watcher = main.ProgressState(store=CountingStore(path))
+    jobs = await asyncio.gather(*(watcher.poll_job("j") for _ in range(5)))
+    assert all(job["id"] == "j" for job in jobs)
+    assert len(loads) == 1 and loads[0] != threading.get_ident()
+
+    assert (await watcher.poll_job("j", max_age=0))["id"] == "j"
+    assert len(loads) == 2
+
+
+@pytest.mark.asyncio
+async def test_products_cancelled_mid_run_are_not_recorded_as_done():
+    tracker = main.ProgressState()
+    tracker.create_job("j", total_items=2, description="bulk")
+    started = asyncio.Event()
+
+    async def process(product):
+        if product["id"] == "b":
+            started.set()
+            await asyncio.sleep(60)
+        return {"product_id": product["id"], "processed_fields": []}
+
+    done_ids = []
+    engine = BulkAutofillEngine(tracker, "j", process, concurrency=1, done_ids=done_ids)
+    run = asyncio.create_task(engine.run([{"id": "a"}, {"id": "b"}]))
+    await started.wait()
+    run.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await run
+    assert done_ids == ["a"]
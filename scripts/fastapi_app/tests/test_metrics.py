@@ -0,0 +1,37 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from fastapi_app import main, metrics
+
+
+@pytest.mark.asyncio
+async def test_histogram_and_timed_render_cumulative_buckets():
+    registry = metrics.Registry()
+    hist = metrics.Histogram("q_seconds", "query time", buckets=(0.1, 1.0), registry=registry)
+    hist.observe(0.05, query="a")
+    hist.observe(0.5, query="a")
+
+    @metrics.timed(hist, query="b")
+    async def fast():
+        return 1
+
+    assert await fast() == 1
+    text = registry.render()
+    assert "# TYPE q_seconds histogram" in text
+    assert 'q_seconds_bucket{query="a",le="0.1"} 1' in text
+    assert 'q_seconds_bucket{query="a",le="1.0"} 2' in text
+    assert 'q_seconds_bucket{query="a",le="+Inf"} 2' in text
+    assert 'q_seconds_count{query="a"} 2' in text
+    assert 'q_seconds_count{query="b"} 1' in text
+
+
+def test_metrics_endpoint_reports_route_latency():
+    client = TestClient(main.app)
+    assert client.get("/health").status_code == 200
+    resp = client.get("/metrics")
+    assert resp.headers["content-type"].startswith("text/plain")
+    assert (
+        'http_request_duration_seconds_count{method="GET",route="/health",status="200"}'
+        in resp.text
+    )
+    assert "# TYPE bulk_jobs_in_flight gauge" in resp.text
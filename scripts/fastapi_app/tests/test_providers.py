@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+from fastapi_app import clients, lang_nodes, main, providers, suggestion_schema
+from fastapi_app.bulk_engine import ProviderLimiter
+
+
+@pytest.mark.asyncio
+async def test_fake_llm_answers_are_schema_valid():
+    llm = providers.FakeLLM(seed=1)
+    keys = ["descriptionAr", "metaTitle", "skinType", "price", "isNew", "stockQuantity"]
+    resp = await llm.chat.completions.create(
+        messages=[{"role": "user", "content": "..."}],
+        response_format=suggestion_schema.response_format(keys),
+    )
+    valid, errors = suggestion_schema.validate(json.loads(resp.choices[0].message.content), keys)
+    assert errors == {} and set(valid) == set(keys)
+    assert resp.usage.prompt_tokens > 0
+
+    prompt = f"Segments (JSON array): {json.dumps(['a', 'b', 'c'])}\n\nReturn ..."
+    resp = await llm.chat.completions.create(
+        messages=[{"role": "user", "content": prompt}],
+        response_format=suggestion_schema.translation_response_format(),
+    )
+    assert len(json.loads(resp.choices[0].message.content)["translations"]) == 3
+
+
+@pytest.mark.asyncio
+async def test_injected_429s_are_backed_off_and_errors_raised():
+    faults = providers.Faults(throttle_rate=1.0, retry_after=0.01, seed=1)
+    limiter = ProviderLimiter("openai", 2, max_retries=2, base_backoff=0.001)
+    search = providers.FakeSearch(faults)
+    with pytest.raises(providers.ProviderError) as exc:
+        await limiter.call(search.search, "Serum")
+    assert exc.value.status_code == 429
+    assert (faults.calls, faults.throttled, limiter.throttled) == (3, 3, 2)
+
+    failing = providers.FakeSearch(providers.Faults(error_rate=1.0))
+    with pytest.raises(providers.ProviderError) as exc:
+        await failing.search("Serum")
+    assert exc.value.status_code == 503
+
+
+@pytest.mark.asyncio
+async def test_autofill_paths_run_on_fake_providers_without_keys(monkeypatch):
+    monkeypatch.setattr(clients, "LLM_PROVIDER", "fake")
+    monkeypatch.setattr(clients, "SEARCH_PROVIDER", "fake")
+    monkeypatch.setattr(clients, "_openai_client", None)
+    monkeypatch.setattr(clients, "_fake_search", None)
+    monkeypatch.setattr(main, "OPENAI_API_KEY", None)
+    monkeypatch.setattr(main, "SERPAPI_API_KEY", None)
+    monkeypatch.setattr(lang_nodes, "OPENAI_API_KEY", None)
+
+    keys = ["descriptionEn", "metaTitle", "skinType"]
+    suggested = await main.suggest_metadata_via_openai("Serum", {}, keys)
+    assert all(suggested[k] not in ("", "unknown") for k in keys)
+    web = await main.search_online_for_metadata("Serum", ["usage"])
+    assert web["usage"].startswith("Apply")
+
+    node = await lang_nodes.suggest_with_openai("Serum", {}, ["howToUse"])
+    assert node["howToUse"] == "Sample howToUse text"
+    assert clients.fake_provider_stats()["llm"]["calls"] >= 2
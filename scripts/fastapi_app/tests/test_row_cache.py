@@ -0,0 +1,48 @@
+import pytest
+
+from fastapi_app import main
+from fastapi_app.row_cache import RowCache
+
+
+def test_row_cache_rejects_reads_overtaken_by_writes():
+    cache = RowCache(max_entries=2, ttl=60)
+    token = cache.begin("1")
+    cache.invalidate(["1"])  # a write lands while the read is in flight
+    cache.put("1", {"id": "1", "title": "old"}, token)
+    assert cache.get("1") is None
+
+    cache.put("1", {"id": "1", "updatedAt": 2})
+    cache.put("1", {"id": "1", "updatedAt": 1})  # older version never replaces newer
+    assert cache.get("1")["updatedAt"] == 2
+
+    cache.put("2", {"id": "2"})
+    cache.put("3", {"id": "3"})
+    assert cache.get("1") is None  # least recently used evicted
+    token = cache.begin("2")
+    cache.clear()
+    cache.put("2", {"id": "2"}, token)
+    assert cache.stats()["entries"] == 0
+
+
+@pytest.mark.asyncio
+async def test_fetch_is_served_from_cache_until_the_product_is_written(monkeypatch):
+    monkeypatch.setattr(main, "product_cache", RowCache())
+    monkeypatch.setattr(main, "prisma", None)
+    reads = []
+
+    class Store:
+        async def fetch(self, product_id):
+            reads.append(product_id)
+            return {"id": product_id, "title": f"v{len(reads)}"}
+
+        async def update(self, product_id, updates, returning=None):
+            return {"id": product_id, **updates}
+
+    monkeypatch.setattr(main, "_products", lambda background=False: Store())
+    assert (await main.db_fetch_product("7"))["title"] == "v1"
+    assert (await main.db_fetch_product("7"))["title"] == "v1"
+    assert reads == ["7"]
+
+    await main.db_update_product("7", {"title": "edited"})
+    assert (await main.db_fetch_product("7"))["title"] == "edited"
+    assert reads == ["7"]
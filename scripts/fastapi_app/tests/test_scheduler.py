@@ -0,0 +1,82 @@
+import asyncio
+import pytest
+
+from fastapi_app import main, scheduler
+
+
+def test_priority_sql_uses_only_existing_signal_columns():
+    types = {"isFeatured": "boolean", "metaTitle": "text", "howToUse": "text"}
+    sql = scheduler.priority_sql(["howToUse"], types, {"featured": 5})
+    assert '5.0 * (("isFeatured" IS TRUE)::int)' in sql
+    assert "coalesce(\"metaTitle\",'') = ''" in sql
+    assert "isActive" not in sql and "viewCount" not in sql
+
+
+@pytest.mark.asyncio
+async def test_feeder_yields_by_priority_and_refills_in_pages():
+    rows = [{"id": str(i), "priority": float(p)} for i, p in enumerate([9, 7, 7, 4, 2])]
+    cursors = []
+
+    async def fetch_page(after, size):
+        cursors.append(after)
+        start = 0 if after is None else next(
+            i + 1 for i, r in enumerate(rows) if [r["priority"], r["id"]] == after
+        )
+        await asyncio.sleep(0)
+        return rows[start : start + size]
+
+    feeder = scheduler.PriorityFeeder(fetch_page, page_size=2, limit=4)
+    got = [p["id"] async for p in feeder]
+    assert got == ["0", "1", "2", "3"]
+    assert cursors[0] is None and cursors[1] == [7.0, "1"]
+
+
+@pytest.mark.asyncio
+async def test_feeder_skips_products_whose_priority_dropped_after_processing():
+    rows = {str(i): float(p) for i, p in enumerate([9, 8, 7, 6])}
+
+    async def fetch_page(after, size):
+        ranked = sorted(((p, i) for i, p in rows.items()), reverse=True)
+        if after is not None:
+            ranked = [r for r in ranked if r < tuple(after)]
+        return [{"id": i, "priority": p} for p, i in ranked[:size]]
+
+    feeder = scheduler.PriorityFeeder(fetch_page, page_size=2, limit=10)
+    got = []
+    async for product in feeder:
+        got.append(product["id"])
+        # a partial commit lowers the score, but the row still matches
+        rows[product["id"]] -= 5
+    assert sorted(got) == ["0", "1", "2", "3"]
+
+
+@pytest.mark.asyncio
+async def test_priority_page_sql_is_keyset_by_score_then_id(monkeypatch):
+    fetched = []
+
+    class Conn:
+        async def fetch(self, sql, *args):
+            fetched.append((sql, list(args)))
+            return []
+
+    class Pool:
+        def acquire(self):
+            class Ctx:
+                async def __aenter__(self):
+                    return Conn()
+
+                async def __aexit__(self, *exc):
+                    return False
+
+            return Ctx()
+
+    monkeypatch.setattr(main, "COLUMN_TYPES", {"isActive": "boolean", "howToUse": "text"})
+    monkeypatch.setattr(main, "pool", Pool())
+    monkeypatch.setattr(main, "prisma", None)
+    await main.db_find_priority_products(["howToUse"], 50, after=[3.5, "abc"])
+
+    sql, args = fetched[0]
+    assert sql is main._products().sql.priority_page(["howToUse"], True)
+    assert '("__priority", "id") < ($2::float8, $3)' in sql
+    assert sql.endswith('ORDER BY "__priority" DESC, "id" DESC LIMIT $1')
+    assert args == [50, 3.5, "abc"]
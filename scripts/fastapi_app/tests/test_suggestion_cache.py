@@ -0,0 +1,79 @@
+import threading
+
+import pytest
+
+from fastapi_app import main
+from fastapi_app.suggestion_cache import SuggestionCache, suggestion_key
+
+
+def test_key_ignores_cosmetic_differences():
+    a = suggestion_key("Serum ", {"usage": " Daily", "sku": ""}, ["b", "a"], "m", "1")
+    b = suggestion_key("serum", {"usage": "Daily"}, ["a", "b"], "m", "1")
+    assert a == b
+    assert a != suggestion_key("serum", {"usage": "Daily"}, ["a", "b"], "m", "2")
+
+
+def test_cache_ttl_and_size_eviction(tmp_path):
+    cache = SuggestionCache(str(tmp_path / "c.sqlite3"), ttl_seconds=60, max_entries=2)
+    cache.set("k1", {"usage": "Daily"})
+    assert cache.get("k1") == {"usage": "Daily"}
+    assert cache.get("missing") is None
+
+    cache.set("k2", {"a": 1})
+    cache.set("k3", {"a": 2})
+    cache.get("k1")  # k2 becomes least recently used
+    cache.evict()
+    assert cache.get("k2") is None
+    assert cache.get("k1") is not None
+
+    cache.ttl_seconds = -1  # everything is expired
+    assert cache.get("k1") is None
+    stats = cache.stats()
+    assert stats["hits"] == 3 and stats["misses"] == 3
+
+
+@pytest.mark.asyncio
+async def test_autofill_reuses_cached_llm_suggestion(tmp_path, monkeypatch):
+    cache = SuggestionCache(str(tmp_path / "c.sqlite3"), ttl_seconds=60, max_entries=10)
+    monkeypatch.setattr(main, "suggestion_cache", cache)
+    calls = 0
+
+    async def fetch(product_id):
+        return {"id": product_id, "title": "Serum"}
+
+    async def llm(name, existing, keys):
+        nonlocal calls
+        calls += 1
+        return {k: "value" for k in keys}
+
+    monkeypatch.setattr(main, "db_fetch_product", fetch)
+    for _ in range(2):
+        result = await main._autofill_product("1", ["usage"], "llm", llm_suggest=llm)
+        assert result["suggestion"] == {"usage": "value"}
+    assert calls == 1
+
+    await main._autofill_product("1", ["usage"], "llm", llm_suggest=llm, refresh=True)
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_cache_lookups_run_off_the_event_loop(tmp_path, monkeypatch):
+    threads = []
+
+    class RecordingCache(SuggestionCache):
+        def get(self, key):
+            threads.append(threading.get_ident())
+            return super().get(key)
+
+        def set(self, key, value):
+            threads.append(threading.get_ident())
+            super().set(key, value)
+
+    cache = RecordingCache(str(tmp_path / "c.sqlite3"), ttl_seconds=60, max_entries=10)
+    monkeypatch.setattr(main, "suggestion_cache", cache)
+
+    async def llm(name, existing, keys):
+        return {k: "value" for k in keys}
+
+    await main._cached_llm_suggest(llm, "Serum", {}, ["usage"])
+    assert len(threads) == 2 and threading.get_ident() not in threads
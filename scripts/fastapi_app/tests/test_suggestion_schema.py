@@ -0,0 +1,53 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from fastapi_app import main, suggestion_schema
+
+
+def test_schema_covers_known_columns_and_validates_in_one_pass():
+    fmt = suggestion_schema.response_format(sorted(main.KNOWN_COLUMNS))
+    schema = fmt["json_schema"]["schema"]
+    assert set(schema["required"]) == main.KNOWN_COLUMNS
+    assert schema["properties"]["skinType"]["items"]["enum"] == suggestion_schema.SKIN_TYPES
+
+    values, errors = suggestion_schema.validate(
+        {
+            "skinType": ["Oily", "Dry"],
+            "metaTitle": "x" * 61,
+            "isNew": "yes",
+            "stockQuantity": 3.0,
+            "usage": None,
+        },
+        ["skinType", "metaTitle", "isNew", "stockQuantity", "usage", "features"],
+    )
+    assert values == {"skinType": "Oily, Dry", "stockQuantity": 3, "usage": "unknown"}
+    assert set(errors) == {"metaTitle", "isNew", "features"}
+
+
+@pytest.mark.asyncio
+async def test_only_invalid_fields_are_asked_again(monkeypatch):
+    monkeypatch.setattr(main, "OPENAI_API_KEY", "test")
+    asked = []
+    answers = [
+        {"metaTitle": "t" * 80, "metaDescription": "Good description"},
+        {"metaTitle": "Short title"},
+    ]
+
+    async def call(fn, **kwargs):
+        asked.append(kwargs["response_format"]["json_schema"]["schema"]["required"])
+        content = json.dumps(answers[len(asked) - 1])
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))]
+        )
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=None)))
+    monkeypatch.setattr(main.clients, "get_openai_client", lambda: client)
+    monkeypatch.setattr(main.provider_limits["openai"], "call", call)
+
+    result = await main.suggest_metadata_via_openai(
+        "Serum", {}, ["metaTitle", "metaDescription"]
+    )
+    assert result == {"metaTitle": "Short title", "metaDescription": "Good description"}
+    assert asked == [["metaTitle", "metaDescription"], ["metaTitle"]]
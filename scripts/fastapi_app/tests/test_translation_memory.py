@@ -0,0 +1,109 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from fastapi_app import main, translation_memory as tm
+
+
+def test_segments_roundtrip_with_arabic_separators():
+    segments, layout = tm.segment("Water, Glycerin; Niacinamide", "list")
+    assert segments == ["Water", "Glycerin", "Niacinamide"]
+    assert tm.assemble(["ماء", "جلسرين", "نياسيناميد"], layout) == "ماء، جلسرين؛ نياسيناميد"
+
+    segments, layout = tm.segment("Apply to clean skin. Rinse well!\nUse daily.", "sentences")
+    assert segments == ["Apply to clean skin.", "Rinse well!", "Use daily."]
+    assert tm.assemble(["a", "b", "c"], layout) == "a b\nc"
+    assert tm.segment('["Hydrating", "Soothing"]', "list") == (["Hydrating", "Soothing"], "json")
+
+
+def test_only_exact_matches_are_reused(tmp_path):
+    memory = tm.TranslationMemory(str(tmp_path / "tm.sqlite3"), fuzzy_threshold=0.9)
+    memory.store({"Apply once daily to clean dry skin.": "يوضع مرة واحدة يومياً على بشرة جافة نظيفة."})
+    memory.store({"Use 2 pumps every evening": "استخدمي ضختين كل مساء"})
+
+    assert memory.lookup("apply once daily to clean dry skin") is not None
+    # a near miss with a different meaning is never returned as its translation
+    assert memory.lookup("Apply twice daily to clean dry skin.") is None
+    assert memory.similar("Apply twice daily to clean dry skin.") == (
+        "Apply once daily to clean dry skin.",
+        "يوضع مرة واحدة يومياً على بشرة جافة نظيفة.",
+    )
+    assert memory.similar("Use 3 pumps every evening") is None  # numbers differ
+    assert memory.stats() == {"entries": 2, "exact_hits": 1, "fuzzy_hits": 1, "misses": 1}
+
+
+@pytest.mark.asyncio
+async def test_only_unseen_segments_are_translated(tmp_path, monkeypatch):
+    memory = tm.TranslationMemory(str(tmp_path / "tm.sqlite3"), fuzzy_threshold=0)
+    memory.store({"Glycerin": "جلسرين"})
+    monkeypatch.setattr(main, "translation_memory", memory)
+    monkeypatch.setattr(main, "OPENAI_API_KEY", "test")
+    requested = []
+
+    async def translate(segments, references=None):
+        requested.append(segments)
+        return [f"ar:{s}" for s in segments]
+
+    monkeypatch.setattr(main, "translate_segments_via_openai", translate)
+
+    suggested = {}
+    leftovers = await main._translate_from_memory(
+        [
+            ({"ingredients": "Water, Glycerin"}, suggested, ["ingredientsAr"]),
+            ({"ingredients": "Glycerin, Water"}, {}, ["ingredientsAr", "titleAr"]),
+        ]
+    )
+    assert requested == [["Water"]]
+    assert suggested == {"ingredientsAr": "ar:Water، جلسرين"}
+    assert leftovers == [[], ["titleAr"]]  # no English title to translate from
+    assert memory.lookup("Water") == "ar:Water"
+
+
+@pytest.mark.asyncio
+async def test_near_misses_are_translated_with_a_reference(tmp_path, monkeypatch):
+    memory = tm.TranslationMemory(str(tmp_path / "tm.sqlite3"), fuzzy_threshold=0.9)
+    memory.store({"Apply to dry skin in the morning": "يوضع على بشرة جافة صباحاً"})
+    monkeypatch.setattr(main, "translation_memory", memory)
+    calls = []
+
+    async def translate(segments, references=None):
+        calls.append((segments, references))
+        return ["يوضع على بشرة رطبة صباحاً" for _ in segments]
+
+    monkeypatch.setattr(main, "translate_segments_via_openai", translate)
+
+    found = await main._translate_segments(["Apply to wet skin in the morning"])
+    assert found == {"Apply to wet skin in the morning": "يوضع على بشرة رطبة صباحاً"}
+    assert calls == [
+        (
+            ["Apply to wet skin in the morning"],
+            [("Apply to dry skin in the morning", "يوضع على بشرة جافة صباحاً")],
+        )
+    ]
+
+
+@pytest.mark.asyncio
+async def test_autofill_context_adds_only_sources_of_derived_keys(monkeypatch):
+    row = {
+        "id": "1",
+        "title": "Serum",
+        "descriptionEn": "A light serum.",
+        "ingredients": "Water, Glycerin",
+        "price": 0,
+        "skinType": "Oily",
+    }
+    seen = {}
+
+    async def fetch(product_id):
+        return row
+
+    async def llm(name, existing, keys):
+        seen.update(existing=existing, keys=keys)
+        return {k: "x" for k in keys}
+
+    monkeypatch.setattr(main, "db_fetch_product", fetch)
+    monkeypatch.setattr(main, "suggestion_cache", None)
+    await main._autofill_product("1", ["price", "descriptionAr"], "llm", llm_suggest=llm)
+    # which keys are missing is decided as before; only descriptionAr's source is added
+    assert seen == {"existing": {"descriptionEn": "A light serum."}, "keys": ["price", "descriptionAr"]}
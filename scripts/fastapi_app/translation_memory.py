@@ -0,0 +1,190 @@
+"""
+Translation memory for the Arabic product fields.
+
+English copy is split into segments (list items for features and ingredients,
+sentences for descriptions and instructions, the whole text for titles), and each
+segment's Arabic translation is stored in a local SQLite table. Many segments repeat
+across the catalog — ingredient names, usage steps, common features — so autofill
+looks them up here first and only sends unseen segments to the model, batched into
+one translation request.
+
+Lookups are exact on a normalized form (case, spacing and trailing punctuation
+ignored); only exact matches are reused. A near-identical segment can differ in
+meaning ("once daily" / "twice daily"), so `similar` only offers the closest
+stored segment (sharing the first word, similar enough per difflib, with the same
+numbers) as a reference for the model's translation.
+"""
+import difflib
+import json
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from .local_store import LocalStore
+except ImportError:  # imported as a top-level module
+    from local_store import LocalStore
+
+# Arabic field -> English source column
+TRANSLATION_SOURCES = {
+    "titleAr": "title",
+    "descriptionAr": "descriptionEn",
+    "featuresAr": "features",
+    "ingredientsAr": "ingredients",
+    "howToUseAr": "howToUse",
+}
+
+# How each source column is segmented
+SEGMENT_MODES = {
+    "title": "whole",
+    "descriptionEn": "sentences",
+    "howToUse": "sentences",
+    "features": "list",
+    "ingredients": "list",
+}
+
+_SENTENCE_SPLIT = re.compile(r"(\s*\n\s*|(?<=[.!?])\s+)")
+_LIST_SPLIT = re.compile(r"(\s*[\n,;]\s*)")
+_NUMBERS = re.compile(r"\d+(?:[.,]\d+)?")
+
+
+def normalize(segment: str) -> str:
+    return re.sub(r"\s+", " ", segment.strip().lower()).rstrip(".!?;:,")
+
+
+def segment(text: str, mode: str) -> Tuple[List[str], object]:
+    """
+    Split `text` into translatable segments. Returns (segments, layout) where layout
+    is what `assemble` needs to rebuild the text from translated segments.
+    """
+    if mode == "list":
+        try:
+            items = json.loads(text)
+        except ValueError:
+            items = None
+        if isinstance(items, list) and all(isinstance(i, str) for i in items):
+            return [i.strip() for i in items if i.strip()], "json"
+    if mode == "whole":
+        return ([text.strip()] if text.strip() else []), []
+    parts = (_LIST_SPLIT if mode == "list" else _SENTENCE_SPLIT).split(text.strip())
+    pieces, seps = parts[0::2], parts[1::2]
+    segments: List[str] = []
+    separators: List[str] = []
+    pending = None  # first separator after the last kept segment
+    for j, piece in enumerate(pieces):
+        if piece.strip():
+            if segments:
+                separators.append(pending or " ")
+            segments.append(piece.strip())
+            pending = None
+        if j < len(seps) and pending is None:
+            pending = seps[j]
+    return segments, separators
+
+
+def assemble(translations: List[str], layout) -> str:
+    if layout == "json":
+        return json.dumps(translations, ensure_ascii=False)
+    out = translations[0] if translations else ""
+    for sep, part in zip(layout, translations[1:]):
+        # Arabic uses its own comma in lists
+        out += sep.replace(",", "،").replace(";", "؛") + part
+    return out
+
+
+class TranslationMemory(LocalStore):
+    schema = """
+    CREATE TABLE IF NOT EXISTS segments (
+        source_norm TEXT PRIMARY KEY,
+        bucket TEXT NOT NULL,
+        source TEXT NOT NULL,
+        target TEXT NOT NULL,
+        uses INTEGER NOT NULL DEFAULT 0,
+        updated_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS segments_bucket ON segments(bucket);
+    """
+
+    def __init__(self, path: str, fuzzy_threshold: float = 0.9, max_candidates: int = 200):
+        super().__init__(path)
+        self.fuzzy_threshold = fuzzy_threshold
+        self.max_candidates = max_candidates
+        self.exact_hits = 0
+        self.fuzzy_hits = 0  # references offered by `similar`
+        self.misses = 0
+
+    @staticmethod
+    def _bucket(norm: str) -> str:
+        return norm.split(" ", 1)[0]
+
+    def lookup(self, source: str) -> Optional[str]:
+        norm = normalize(source)
+        if not norm:
+            return source
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT target FROM segments WHERE source_norm = ?", (norm,)
+            ).fetchone()
+            if row:
+                self.exact_hits += 1
+                self._conn.execute(
+                    "UPDATE segments SET uses = uses + 1 WHERE source_norm = ?", (norm,)
+                )
+                return row["target"]
+        self.misses += 1
+        return None
+
+    def similar(self, source: str) -> Optional[Tuple[str, str]]:
+        """(stored source, its translation) closest to `source`, for use as a reference."""
+        norm = normalize(source)
+        if not norm or not self.fuzzy_threshold:
+            return None
+        with self._lock:
+            best = self._fuzzy_locked(norm)
+        if best is not None:
+            self.fuzzy_hits += 1
+        return best
+
+    def _fuzzy_locked(self, norm: str) -> Optional[Tuple[str, str]]:
+        rows = self._conn.execute(
+            "SELECT source_norm, source, target FROM segments WHERE bucket = ? "
+            "ORDER BY uses DESC LIMIT ?",
+            (self._bucket(norm), self.max_candidates),
+        ).fetchall()
+        numbers = _NUMBERS.findall(norm)
+        matcher = difflib.SequenceMatcher(b=norm, autojunk=False)
+        best, best_ratio = None, self.fuzzy_threshold
+        for row in rows:
+            if _NUMBERS.findall(row["source_norm"]) != numbers:
+                continue
+            matcher.set_seq1(row["source_norm"])
+            if matcher.real_quick_ratio() < best_ratio or matcher.quick_ratio() < best_ratio:
+                continue
+            ratio = matcher.ratio()
+            if ratio >= best_ratio and row["source_norm"] != norm:
+                best, best_ratio = (row["source"], row["target"]), ratio
+        return best
+
+    def store(self, pairs: Dict[str, str]):
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO segments "
+                "(source_norm, bucket, source, target, uses, updated_at) "
+                "VALUES (?, ?, ?, ?, 0, ?)",
+                [
+                    (normalize(s), self._bucket(normalize(s)), s, t, now)
+                    for s, t in pairs.items()
+                    if normalize(s) and t
+                ],
+            )
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM segments").fetchone()[0]
+        return {
+            "entries": entries,
+            "exact_hits": self.exact_hits,
+            "fuzzy_hits": self.fuzzy_hits,
+            "misses": self.misses,
+        }